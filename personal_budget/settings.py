@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os # Importez os pour la gestion des chemins de fichiers
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv() # Charge les variables du fichier .env
@@ -53,10 +54,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'webapp.middleware.query_instrumentation_middleware.QueryInstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'webapp.middleware.user_context_middleware.UserContextMiddleware',
     'webapp.middleware.timezone_middleware.TimezoneMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -81,15 +84,88 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'personal_budget.wsgi.application'
 
+# Profil SQLite
+# SQLITE_PROFILE: 'default' (par défaut: réglages d'origine de SQLite et de Django) ou 'production'
+# (à activer explicitement: journal WAL, connexions persistantes, verrou d'écriture pris dès le début des transactions)
+# Les PRAGMA sont appliqués à l'ouverture de chaque connexion (signal connection_created, voir webapp/signals.py),
+# après vérification contre la liste autorisée de webapp/services/sqlite_pragma_service.py.
+SQLITE_PROFILES = {
+    'default': {
+        'PRAGMAS': {},
+        'TRANSACTION_MODE': 'DEFERRED',
+        'CONN_MAX_AGE': 0,
+    },
+    'production': {
+        'PRAGMAS': {
+            'journal_mode': 'WAL',  # Les lectures ne bloquent plus l'écriture (et inversement)
+            'synchronous': 'NORMAL',  # Sûr avec WAL: pas de synchronisation disque à chaque validation
+            'busy_timeout': 5000,  # Attente (ms) quand la base est verrouillée, au lieu d'une erreur immédiate
+            'mmap_size': 256 * 1024 * 1024,  # Lecture de la base par projection mémoire (256 Mo)
+            'cache_size': -64000,  # Cache de pages par connexion, en Kio (64 Mo)
+            'temp_store': 'MEMORY',  # Tables et index temporaires (tris, GROUP BY) en mémoire
+        },
+        # Verrou d'écriture pris au BEGIN: une transaction en attente passe par busy_timeout
+        # au lieu d'échouer en cours de route avec "database is locked"
+        'TRANSACTION_MODE': 'IMMEDIATE',
+        'CONN_MAX_AGE': 600,
+    },
+}
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'default')
+SQLITE_PRAGMAS = SQLITE_PROFILES[SQLITE_PROFILE]['PRAGMAS']
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': DATA_DIR / 'db.sqlite3',  # Base de données dans data/db.sqlite3
+        # Durée de vie (secondes) des connexions réutilisées entre les requêtes (0: une connexion par requête)
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', SQLITE_PROFILES[SQLITE_PROFILE]['CONN_MAX_AGE'])),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': SQLITE_PROFILES[SQLITE_PROFILE]['TRANSACTION_MODE'],
+        },
     }
 }
 
+# Coordination des écritures (voir webapp/services/write_coordinator_service.py): verrou par processus
+# et nouvelles tentatives quand SQLite répond "database is locked" (WRITE_COORDINATION=0 pour désactiver)
+WRITE_COORDINATION = os.environ.get('WRITE_COORDINATION', '1') == '1'
+WRITE_RETRY_ATTEMPTS = int(os.environ.get('WRITE_RETRY_ATTEMPTS', 5))
+WRITE_RETRY_DELAY = float(os.environ.get('WRITE_RETRY_DELAY', 0.05))  # Délai (s) avant le 2e essai, doublé ensuite
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# CACHE_BACKEND: 'locmem' (par défaut, un seul processus, vidé à chaque démarrage), 'file' (partagé entre
+# les workers gunicorn, dans le dossier temporaire du système sauf CACHE_LOCATION) ou 'redis'
+# (tout serveur compatible Redis, CACHE_LOCATION=redis://host:6379/1)
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHE_DEFAULT_LOCATIONS = {
+    'locmem': 'budgetosaurus',
+    'file': os.path.join(tempfile.gettempdir(), 'budgetosaurus-cache'),
+    'redis': 'redis://127.0.0.1:6379/1',
+}
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.environ.get('CACHE_LOCATION', CACHE_DEFAULT_LOCATIONS[CACHE_BACKEND]),
+    }
+}
+
+# Durée de vie (secondes) des blocs de données mis en cache par utilisateur (tableau de bord, aperçus)
+USER_DATA_CACHE_TIMEOUT = int(os.environ.get('USER_DATA_CACHE_TIMEOUT', 60 * 60))
+
+# Mesure des requêtes SQL par requête HTTP (voir webapp/middleware/query_instrumentation_middleware.py):
+# en-tête Server-Timing et ligne JSON dans le logger 'webapp.queries' (QUERY_INSTRUMENTATION=1 pour activer)
+QUERY_INSTRUMENTATION = os.environ.get('QUERY_INSTRUMENTATION', '0') == '1'
+# Nombre d'exécutions à partir duquel une même requête est signalée comme répétée (boucle N+1)
+QUERY_DUPLICATE_THRESHOLD = int(os.environ.get('QUERY_DUPLICATE_THRESHOLD', 3))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
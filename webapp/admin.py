@@ -9,7 +9,8 @@ from django.db import transaction as db_transaction # Pour les opérations atomi
 from .models import (
     Account, Category, Transaction, Budget, SavingGoal, Fund, Tag,
     Allocation, AllocationLine,
-    FundDebitRecord, FundDebitLine
+    FundDebitRecord, FundDebitLine,
+    RecurringSeries
 )
 
 # Définir une classe Admin pour la Catégorie pour afficher le nouveau champ
@@ -122,6 +123,14 @@ class FundAdmin(admin.ModelAdmin):
     list_filter = ('category',)
     search_fields = ('category__name',)
 
+class RecurringSeriesAdmin(admin.ModelAdmin):
+    """
+    Personnalisation de l'administration pour le modèle RecurringSeries.
+    """
+    list_display = ('label', 'frequency', 'average_amount', 'occurrence_count', 'next_expected_date', 'confidence', 'is_active')
+    list_filter = ('frequency', 'is_active', 'transaction_type')
+    search_fields = ('label', 'description_key')
+
 
 # Enregistrement de chaque modèle pour qu'il apparaisse dans l'interface d'administration.
 admin.site.register(Account, AccountAdmin)
@@ -136,3 +145,4 @@ admin.site.register(Allocation, AllocationAdmin)
 admin.site.register(AllocationLine)
 admin.site.register(FundDebitRecord, FundDebitRecordAdmin)
 admin.site.register(FundDebitLine)
+admin.site.register(RecurringSeries, RecurringSeriesAdmin)
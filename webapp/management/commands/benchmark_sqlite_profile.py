@@ -0,0 +1,159 @@
+# webapp/management/commands/benchmark_sqlite_profile.py
+import multiprocessing
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from webapp.services.sqlite_pragma_service import SqlitePragmaService
+
+def apply_profile(connection, profile):
+    for statement in SqlitePragmaService.get_statements(profile['PRAGMAS']):
+        connection.execute(statement)
+
+def open_connection(path, profile):
+    # Comme Django: délai d'attente de 5 s par défaut, transactions ouvertes explicitement
+    connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+    apply_profile(connection, profile)
+    return connection
+
+def create_database(path, profile, rows, accounts):
+    """Crée une table de transactions (mêmes index que webapp_transaction pour les lectures testées)."""
+    connection = open_connection(path, profile)
+    connection.execute(
+        "CREATE TABLE bench_transaction (id INTEGER PRIMARY KEY, account_id INTEGER NOT NULL, "
+        "category_id INTEGER, date DATE NOT NULL, amount DECIMAL NOT NULL, description VARCHAR(255) NOT NULL)"
+    )
+    connection.execute("CREATE INDEX bench_tx_account_date_idx ON bench_transaction (account_id, date)")
+    rng = random.Random(42)
+    start = date.today() - timedelta(days=3 * 365)
+    connection.execute("BEGIN")
+    connection.executemany(
+        "INSERT INTO bench_transaction (account_id, category_id, date, amount, description) VALUES (?, ?, ?, ?, ?)",
+        (
+            (
+                rng.randrange(accounts), rng.randrange(40),
+                (start + timedelta(days=rng.randrange(3 * 365))).isoformat(),
+                rng.randrange(-50000, 50000) / 100, f"Transaction {index}",
+            )
+            for index in range(rows)
+        ),
+    )
+    connection.execute("COMMIT")
+    connection.close()
+
+def run_worker(kind, path, profile, accounts, start_at, stop_at, results):
+    """
+    Boucle d'un processus (comme un worker gunicorn) jusqu'à 'stop_at'.
+    Lecteur: totaux par catégorie d'un compte sur trois mois. Rédacteur: ajout d'une transaction
+    et modification d'une autre dans une même transaction. Retourne (opérations, erreurs de verrou).
+    """
+    connection = open_connection(path, profile)
+    begin = f"BEGIN {profile['TRANSACTION_MODE']}"
+    rng = random.Random()
+    operations = locked = 0
+    while time.time() < start_at:
+        time.sleep(0.001)
+    while time.time() < stop_at:
+        account_id = rng.randrange(accounts)
+        month_start = date.today() - timedelta(days=rng.randrange(30, 3 * 365))
+        try:
+            if kind == 'read':
+                connection.execute("BEGIN")
+                connection.execute(
+                    "SELECT category_id, SUM(amount), COUNT(*) FROM bench_transaction "
+                    "WHERE account_id = ? AND date BETWEEN ? AND ? GROUP BY category_id",
+                    (account_id, month_start.isoformat(), (month_start + timedelta(days=90)).isoformat()),
+                ).fetchall()
+                connection.execute("COMMIT")
+            else:
+                connection.execute(begin)
+                connection.execute(
+                    "INSERT INTO bench_transaction (account_id, category_id, date, amount, description) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (account_id, rng.randrange(40), month_start.isoformat(), -12.5, "Achat"),
+                )
+                connection.execute(
+                    "UPDATE bench_transaction SET category_id = ? WHERE id = ?",
+                    (rng.randrange(40), rng.randrange(1, 1000)),
+                )
+                connection.execute("COMMIT")
+            operations += 1
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e) and 'busy' not in str(e):
+                raise
+            locked += 1
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+    connection.close()
+    results.put((kind, operations, locked))
+
+class Command(BaseCommand):
+    """
+    Compare les profils SQLite (settings.SQLITE_PROFILES) sous une charge concurrente de lectures et d'écritures.
+    Chaque profil est testé sur une base temporaire (hors de data/), avec un processus par lecteur et par rédacteur,
+    comme plusieurs workers gunicorn: la base de l'application n'est pas utilisée.
+    Usage: python manage.py benchmark_sqlite_profile [--readers 4] [--writers 2] [--duration 5] [--rows 100000]
+    """
+    help = "Mesure le débit de lectures et d'écritures concurrentes pour chaque profil SQLite."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4, help="Processus lecteurs (4 par défaut).")
+        parser.add_argument('--writers', type=int, default=2, help="Processus rédacteurs (2 par défaut).")
+        parser.add_argument('--duration', type=float, default=5, help="Durée de la mesure en secondes (5 par défaut).")
+        parser.add_argument('--rows', type=int, default=100000, help="Transactions initiales (100000 par défaut).")
+        parser.add_argument('--accounts', type=int, default=20, help="Nombre de comptes (20 par défaut).")
+        parser.add_argument(
+            '--profile', action='append', dest='profiles',
+            help="Profil à tester (répétable; tous les profils de SQLITE_PROFILES par défaut).",
+        )
+
+    def handle(self, *args, **options):
+        profiles = options['profiles'] or list(settings.SQLITE_PROFILES)
+        unknown = set(profiles) - set(settings.SQLITE_PROFILES)
+        if unknown:
+            raise CommandError(f"Profil(s) SQLite inconnu(s): {', '.join(sorted(unknown))}.")
+
+        for name in profiles:
+            with tempfile.TemporaryDirectory(prefix='budgetosaurus-bench-') as directory:
+                path = str(Path(directory) / 'bench.sqlite3')
+                self.run_profile(name, settings.SQLITE_PROFILES[name], path, options)
+
+    def run_profile(self, name, profile, path, options):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Profil '{name}'"))
+        for pragma, value in profile['PRAGMAS'].items():
+            self.stdout.write(f"  PRAGMA {pragma} = {value}")
+        self.stdout.write(f"  transactions {profile['TRANSACTION_MODE']}")
+        create_database(path, profile, options['rows'], options['accounts'])
+
+        results = multiprocessing.Queue()
+        start_at = time.time() + 0.5
+        stop_at = start_at + options['duration']
+        workers = [
+            multiprocessing.Process(
+                target=run_worker,
+                args=(kind, path, profile, options['accounts'], start_at, stop_at, results),
+            )
+            for kind in ['read'] * options['readers'] + ['write'] * options['writers']
+        ]
+        for worker in workers:
+            worker.start()
+        totals = {'read': [0, 0], 'write': [0, 0]}
+        for _ in workers:
+            kind, operations, locked = results.get()
+            totals[kind][0] += operations
+            totals[kind][1] += locked
+        for worker in workers:
+            worker.join()
+
+        for kind, label in [('read', "lectures"), ('write', "écritures")]:
+            operations, locked = totals[kind]
+            self.stdout.write(
+                f"  {label}: {operations / options['duration']:.0f}/s "
+                f"({operations} au total, {locked} erreur(s) 'database is locked')"
+            )
+        self.stdout.write("")
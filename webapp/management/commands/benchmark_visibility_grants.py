@@ -0,0 +1,105 @@
+# webapp/management/commands/benchmark_visibility_grants.py
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction as db_transaction
+from django.db.models import Q, Sum
+
+from webapp.models import Account, Transaction
+from webapp.services.household_service import HouseholdService
+from webapp.services.permission_service import PermissionService
+
+class Command(BaseCommand):
+    """
+    Compare la lecture des transactions accessibles à un membre de ménage:
+    OR sur les critères de partage (ancien filtre) et jointure sur TransactionVisibilityGrant (filtre actuel).
+    Les données de test (un ménage, ses comptes et les transactions) sont créées dans une transaction
+    annulée à la fin: la base n'est pas modifiée.
+    Usage: python manage.py benchmark_visibility_grants [--members 6] [--other-users 20] [--transactions 500000]
+    """
+    help = "Mesure les requêtes de transactions accessibles avec et sans la table des droits de lecture."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=6, help="Nombre de membres du ménage (6 par défaut).")
+        parser.add_argument('--other-users', type=int, default=20, help="Utilisateurs hors du ménage (20 par défaut).")
+        parser.add_argument('--transactions', type=int, default=500000, help="Nombre total de transactions (500000 par défaut).")
+        parser.add_argument('--repeat', type=int, default=5, help="Nombre d'exécutions de chaque requête (5 par défaut).")
+
+    def handle(self, *args, **options):
+        with db_transaction.atomic():
+            viewer = self.create_dataset(options)
+            self.run_benchmark(viewer, options['repeat'])
+            db_transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS("Données de test annulées."))
+
+    def create_dataset(self, options):
+        random.seed(42)
+        suffix = f"{time.time_ns()}"
+        members = [User.objects.create(username=f"bench-member-{index}-{suffix}") for index in range(options['members'])]
+        others = [User.objects.create(username=f"bench-other-{index}-{suffix}") for index in range(options['other_users'])]
+        household = HouseholdService.create_household(f"Bench {suffix}", 'FAMILY_MIXED', members[0])
+        for member in members[1:]:
+            HouseholdService.add_member(household, member)
+        # Les droits de lecture sont normalement synchronisés après validation: les calculer ici
+        for user in members + others:
+            PermissionService.sync_visibility_grants(user)
+
+        accounts = []
+        for user in members + others:
+            accounts.append(Account.objects.create(user=user, name="Courant", is_shared=False))
+            accounts.append(Account.objects.create(user=user, name="Commun", is_shared=True))
+
+        start = date.today() - timedelta(days=3 * 365)
+        self.stdout.write(f"Création de {options['transactions']} transactions...")
+        batch = []
+        for index in range(options['transactions']):
+            account = random.choice(accounts)
+            batch.append(Transaction(
+                user_id=account.user_id,
+                account=account,
+                date=start + timedelta(days=random.randrange(3 * 365)),
+                amount=Decimal(random.randrange(-50000, 50000)) / 100,
+                description=f"Transaction {index}",
+                transaction_type='OUT',
+            ))
+            if len(batch) >= 5000:
+                Transaction.objects.bulk_create(batch)
+                batch = []
+        Transaction.objects.bulk_create(batch)
+        return members[-1]
+
+    def run_benchmark(self, viewer, repeat):
+        # Droits calculés sans passer par le cache (les utilisateurs de test sont annulés à la fin)
+        scope = PermissionService.build_access_scope(viewer)
+        viewer._access_scope = scope
+        # Ancien filtre: sous-requête des membres du ménage et partages explicites du profil
+        household_members = PermissionService.get_household_members(viewer)
+        legacy_filter = Q(user=viewer) | Q(user__in=household_members, account__is_shared=True)
+        shared_with_users = list(PermissionService.get_user_profile(viewer).shared_with_users.all())
+        if shared_with_users:
+            legacy_filter |= Q(user__in=shared_with_users)
+
+        queries = [
+            ("OR sur les critères de partage (avant)", Transaction.objects.filter(legacy_filter)),
+            ("Jointure sur les droits de lecture (après)", PermissionService.get_accessible_transactions(viewer)),
+        ]
+        for label, queryset in queries:
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(queryset.order_by().explain())
+            for name, run in [
+                ("nombre", lambda: queryset.order_by().count()),
+                ("page de 50", lambda: list(queryset.order_by('-date', '-id')[:50])),
+                ("total par mois", lambda: list(queryset.order_by().values('date__year', 'date__month').annotate(total=Sum('amount')))),
+            ]:
+                timings = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    result = run()
+                    timings.append(time.perf_counter() - started)
+                size = result if isinstance(result, int) else len(result)
+                self.stdout.write(f"  {name}: {min(timings) * 1000:.1f} ms (meilleur de {repeat}, {size} résultat(s))")
+            self.stdout.write("")
@@ -0,0 +1,139 @@
+# webapp/management/commands/check_query_budgets.py
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction as db_transaction
+from django.test import Client
+from django.urls import reverse
+
+from webapp.middleware.query_instrumentation_middleware import QueryRecorder
+from webapp.models import Account, Budget, Category, Tag, Transaction
+from webapp.services.category_tree_service import CategoryTreeService
+from webapp.services.monthly_total_service import MonthlyTotalService
+from webapp.services.permission_service import PermissionService
+from webapp.services.transaction_stats_service import TransactionStatsService
+from webapp.services.user_cache_service import UserCacheService
+
+class Command(BaseCommand):
+    """
+    Vérifie que les pages principales restent sous leur budget de requêtes SQL.
+    Chaque page est demandée deux fois: cache vide (comparé au budget), puis cache rempli.
+    Les requêtes répétées (même forme, au moins 3 fois) sont listées: ce sont en général des boucles N+1.
+
+    Sans --user, un jeu de données de test (comptes, catégories, budgets, une année de transactions)
+    est créé dans une transaction annulée à la fin: la base n'est pas modifiée.
+    La commande échoue (code de sortie non nul) si une page dépasse son budget.
+    Usage: python manage.py check_query_budgets [--user USERNAME] [--transactions 3000]
+    """
+    help = "Compte les requêtes SQL des pages principales et échoue si un budget est dépassé."
+
+    # (nom de l'URL, arguments, nombre maximal de requêtes SQL avec un cache vide)
+    QUERY_BUDGETS = [
+        ('dashboard_view', {}, 10),
+        ('budget_overview', {}, 15),
+        ('recap_overview_view', {}, 10),
+        ('category_transactions_summary_view', {}, 14),
+        ('all_transactions_summary_view', {}, 17),
+        ('all_transactions_summary_data', {}, 16),
+        ('review_transactions_view', {}, 10),
+    ]
+    DUPLICATE_THRESHOLD = 3
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=str, help="Mesure les pages avec les données de cet utilisateur.")
+        parser.add_argument('--transactions', type=int, default=3000, help="Transactions du jeu de test (3000 par défaut).")
+
+    def handle(self, *args, **options):
+        with db_transaction.atomic():
+            if options['user']:
+                try:
+                    user = User.objects.get(username=options['user'])
+                except User.DoesNotExist:
+                    raise CommandError(f"Utilisateur '{options['user']}' introuvable.")
+            else:
+                user = self.create_dataset(options['transactions'])
+            exceeded = self.check_budgets(user)
+            # Sessions et caches remplis pendant la mesure: rien n'est gardé
+            db_transaction.set_rollback(True)
+
+        if exceeded:
+            raise CommandError(f"Budget de requêtes dépassé: {', '.join(exceeded)}.")
+        self.stdout.write(self.style.SUCCESS("Toutes les pages respectent leur budget de requêtes."))
+
+    def create_dataset(self, transaction_count):
+        random.seed(42)
+        user = User.objects.create(username=f"query-budget-{time.time_ns()}")
+        accounts = [
+            Account.objects.create(user=user, name="Courant"),
+            Account.objects.create(user=user, name="Épargne", account_type='EP'),
+        ]
+        categories = []
+        for index in range(8):
+            parent = Category.objects.create(user=user, name=f"Catégorie {index}", is_budgeted=index % 2 == 0)
+            categories.append(parent)
+            categories.extend(
+                Category.objects.create(user=user, name=f"Sous-catégorie {index}.{child}", parent=parent)
+                for child in range(3)
+            )
+        tags = [Tag.objects.create(user=user, name=f"tag-{index}") for index in range(5)]
+        start = date.today().replace(day=1) - timedelta(days=365)
+        for category in categories[::4]:
+            Budget.objects.create(user=user, category=category, amount=Decimal('500.00'), start_date=start)
+
+        transactions = []
+        for index in range(transaction_count):
+            amount = Decimal(random.randrange(100, 50000)) / 100
+            transaction_type = 'IN' if index % 10 == 0 else 'OUT'
+            transactions.append(Transaction(
+                user=user,
+                account=random.choice(accounts),
+                # Une transaction sur vingt reste sans catégorie (page de révision)
+                category=None if index % 20 == 0 else random.choice(categories),
+                date=start + timedelta(days=random.randrange(365)),
+                amount=amount if transaction_type == 'IN' else -amount,
+                description=f"Marchand {random.randrange(60)}",
+                transaction_type=transaction_type,
+            ))
+        Transaction.objects.bulk_create(transactions, batch_size=1000)
+        Transaction.tags.through.objects.bulk_create([
+            Transaction.tags.through(transaction_id=transaction.pk, tag_id=random.choice(tags).pk)
+            for transaction in transactions[::3]
+        ], batch_size=1000)
+        # Données dérivées, ignorées par bulk_create
+        MonthlyTotalService.rebuild(user=user)
+        TransactionStatsService.rebuild(user=user)
+        return user
+
+    def check_budgets(self, user):
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(user)
+        exceeded = []
+        for url_name, kwargs, budget in self.QUERY_BUDGETS:
+            url = reverse(url_name, kwargs=kwargs)
+            # Cache vide pour cet utilisateur seulement: nouvelle version de chaque espace de noms
+            for namespace in [UserCacheService.DEFAULT_NAMESPACE, CategoryTreeService.CACHE_NAMESPACE, PermissionService.CACHE_NAMESPACE]:
+                UserCacheService.bump_version(user.pk, namespace)
+            with QueryRecorder() as cold:
+                response = client.get(url)
+            with QueryRecorder() as warm:
+                client.get(url)
+
+            line = (
+                f"{url_name}: {cold.count} requête(s) ({cold.total_time * 1000:.1f} ms), "
+                f"cache rempli {warm.count}, budget {budget}"
+            )
+            if response.status_code != 200:
+                exceeded.append(url_name)
+                self.stdout.write(self.style.ERROR(f"{line} - réponse HTTP {response.status_code}"))
+            elif cold.count > budget:
+                exceeded.append(url_name)
+                self.stdout.write(self.style.ERROR(f"{line} - DÉPASSÉ"))
+            else:
+                self.stdout.write(line)
+            for fingerprint, group in cold.duplicates(self.DUPLICATE_THRESHOLD).items():
+                self.stdout.write(f"    {group['count']}x [{fingerprint}] {group['sql'][:160]}")
+        return exceeded
@@ -0,0 +1,36 @@
+# webapp/management/commands/detect_recurring_series.py
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from webapp.services.recurring_detection_service import RecurringDetectionService
+
+class Command(BaseCommand):
+    """
+    Détecte les séries de transactions récurrentes (RecurringSeries) et affiche la durée du calcul.
+    Usage: python manage.py detect_recurring_series [--user <username>]
+    """
+    help = "Détecte les transactions récurrentes (abonnements, loyer, salaire...)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            dest='username',
+            help="Nom d'utilisateur à analyser (tous par défaut).",
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['username']:
+            users = users.filter(username=options['username'])
+            if not users.exists():
+                raise CommandError(f"Utilisateur '{options['username']}' introuvable.")
+
+        for user in users:
+            started = time.perf_counter()
+            active_count = RecurringDetectionService.detect(user)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(
+                f"{user.username}: {active_count} série(s) récurrente(s) active(s) en {elapsed * 1000:.0f} ms."
+            ))
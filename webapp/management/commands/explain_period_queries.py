@@ -0,0 +1,48 @@
+# webapp/management/commands/explain_period_queries.py
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Sum
+
+from webapp.models import Transaction
+from webapp.services.period_service import PeriodService
+
+class Command(BaseCommand):
+    """
+    Affiche les plans d'exécution (EXPLAIN QUERY PLAN sous SQLite) d'un filtre mensuel sur les transactions:
+    avec extraction de l'année et du mois (date__year / date__month, ancien filtre)
+    et avec une plage de dates semi-ouverte (PeriodService, filtre actuel).
+    Usage: python manage.py explain_period_queries --user <username> [--year 2025] [--month 6]
+    """
+    help = "Compare les plans d'exécution des filtres par période sur les transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', dest='username', required=True, help="Nom d'utilisateur à utiliser.")
+        parser.add_argument('--year', type=int, default=date.today().year, help="Année (année courante par défaut).")
+        parser.add_argument('--month', type=int, default=date.today().month, help="Mois (mois courant par défaut).")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"Utilisateur '{options['username']}' introuvable.")
+        try:
+            start, end = PeriodService.month(options['year'], options['month'])
+        except ValueError as e:
+            raise CommandError(f"Période invalide: {e}")
+
+        transactions = Transaction.objects.filter(user=user).order_by()
+        queries = [
+            ("Extraction année/mois (avant)", transactions.filter(date__year=start.year, date__month=start.month)),
+            ("Plage semi-ouverte (après)", transactions.filter(date__gte=start, date__lt=end)),
+            ("Plage semi-ouverte par catégorie (après)", transactions.filter(
+                category__isnull=False, date__gte=start, date__lt=end,
+            ).values('category_id').annotate(total=Sum('amount'))),
+        ]
+
+        for label, queryset in queries:
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain())
+            self.stdout.write("")
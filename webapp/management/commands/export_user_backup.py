@@ -0,0 +1,35 @@
+# webapp/management/commands/export_user_backup.py
+import gzip
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from webapp.services.backup_service import BackupService
+
+class Command(BaseCommand):
+    """
+    Écrit une archive de sauvegarde complète des données d'un utilisateur (JSON Lines compressé en gzip).
+    Usage: python manage.py export_user_backup --user <username> <fichier.jsonl.gz>
+    """
+    help = "Sauvegarde toutes les données d'un utilisateur dans une archive (restaurable avec restore_user_backup)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Chemin du fichier d'archive à écrire (.jsonl.gz).")
+        parser.add_argument(
+            '--user',
+            dest='username',
+            required=True,
+            help="Nom d'utilisateur dont les données doivent être sauvegardées.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"Utilisateur '{options['username']}' introuvable.")
+
+        with gzip.open(options['path'], 'wt', encoding='utf-8') as archive:
+            counts = BackupService.write_archive(user, archive)
+        self.stdout.write(self.style.SUCCESS(
+            f"{sum(counts.values())} enregistrement(s) sauvegardé(s) dans {options['path']}."
+        ))
@@ -0,0 +1,30 @@
+# webapp/management/commands/rebuild_category_closure.py
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from webapp.services.category_closure_service import CategoryClosureService
+
+class Command(BaseCommand):
+    """
+    Reconstruit la table de fermeture des catégories (CategoryClosure) à partir de Category.parent.
+    Usage: python manage.py rebuild_category_closure [--user <username>]
+    """
+    help = "Reconstruit les liens ancêtre/descendant des catégories."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            dest='username',
+            help="Nom d'utilisateur dont l'arbre doit être reconstruit (tous par défaut).",
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options['username']:
+            try:
+                user = User.objects.get(username=options['username'])
+            except User.DoesNotExist:
+                raise CommandError(f"Utilisateur '{options['username']}' introuvable.")
+
+        link_count = CategoryClosureService.rebuild(user=user)
+        self.stdout.write(self.style.SUCCESS(f"{link_count} lien(s) de catégorie reconstruit(s)."))
@@ -0,0 +1,30 @@
+# webapp/management/commands/rebuild_monthly_totals.py
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from webapp.services.monthly_total_service import MonthlyTotalService
+
+class Command(BaseCommand):
+    """
+    Reconstruit les tables de cumuls mensuels (MonthlyCategoryTotal, MonthlyTagTotal) à partir des transactions.
+    Usage: python manage.py rebuild_monthly_totals [--user <username>]
+    """
+    help = "Reconstruit les cumuls mensuels par catégorie à partir des transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            dest='username',
+            help="Nom d'utilisateur dont les cumuls doivent être reconstruits (tous par défaut).",
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options['username']:
+            try:
+                user = User.objects.get(username=options['username'])
+            except User.DoesNotExist:
+                raise CommandError(f"Utilisateur '{options['username']}' introuvable.")
+
+        created_count = MonthlyTotalService.rebuild(user=user)
+        self.stdout.write(self.style.SUCCESS(f"{created_count} cumul(s) mensuel(s) reconstruit(s)."))
@@ -0,0 +1,30 @@
+# webapp/management/commands/rebuild_transaction_stats.py
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from webapp.services.transaction_stats_service import TransactionStatsService
+
+class Command(BaseCommand):
+    """
+    Reconstruit les compteurs des transactions par utilisateur (UserTransactionStats).
+    Usage: python manage.py rebuild_transaction_stats [--user <username>]
+    """
+    help = "Reconstruit les compteurs des transactions (total, non catégorisées, totaux par année)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            dest='username',
+            help="Nom d'utilisateur dont les compteurs doivent être reconstruits (tous par défaut).",
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options['username']:
+            try:
+                user = User.objects.get(username=options['username'])
+            except User.DoesNotExist:
+                raise CommandError(f"Utilisateur '{options['username']}' introuvable.")
+
+        created_count = TransactionStatsService.rebuild(user=user)
+        self.stdout.write(self.style.SUCCESS(f"Compteurs reconstruits pour {created_count} utilisateur(s)."))
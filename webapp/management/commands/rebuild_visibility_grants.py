@@ -0,0 +1,30 @@
+# webapp/management/commands/rebuild_visibility_grants.py
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from webapp.services.permission_service import PermissionService
+
+class Command(BaseCommand):
+    """
+    Recalcule les droits de lecture dénormalisés (TransactionVisibilityGrant) à partir des ménages et des profils.
+    Usage: python manage.py rebuild_visibility_grants [--user <username>]
+    """
+    help = "Recalcule les droits de lecture des transactions entre utilisateurs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            dest='username',
+            help="Nom d'utilisateur dont les droits doivent être recalculés (tous par défaut).",
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options['username']:
+            try:
+                user = User.objects.get(username=options['username'])
+            except User.DoesNotExist:
+                raise CommandError(f"Utilisateur '{options['username']}' introuvable.")
+
+        user_count = PermissionService.rebuild_visibility_grants(user=user)
+        self.stdout.write(self.style.SUCCESS(f"Droits de lecture recalculés pour {user_count} utilisateur(s)."))
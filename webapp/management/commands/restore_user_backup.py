@@ -0,0 +1,45 @@
+# webapp/management/commands/restore_user_backup.py
+import gzip
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from webapp.services.backup_service import BackupService
+
+class Command(BaseCommand):
+    """
+    Restaure une archive écrite par export_user_backup dans le compte d'un utilisateur.
+    Usage: python manage.py restore_user_backup --user <username> [--replace] <fichier.jsonl.gz>
+    """
+    help = "Restaure une archive de sauvegarde dans le compte d'un utilisateur."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Chemin de l'archive à restaurer (.jsonl.gz).")
+        parser.add_argument(
+            '--user',
+            dest='username',
+            required=True,
+            help="Nom d'utilisateur dans lequel restaurer les données.",
+        )
+        parser.add_argument(
+            '--replace',
+            action='store_true',
+            help="Supprime d'abord les données existantes de l'utilisateur.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"Utilisateur '{options['username']}' introuvable.")
+
+        try:
+            with gzip.open(options['path'], 'rt', encoding='utf-8') as archive:
+                counts = BackupService.restore_archive(user, archive, replace=options['replace'])
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Restauration impossible: {e}")
+        except IntegrityError as e:
+            # Noms de tags et de règles uniques sur toute l'instance
+            raise CommandError(f"Restauration impossible, données en conflit avec un autre utilisateur: {e}")
+        self.stdout.write(self.style.SUCCESS(f"{sum(counts.values())} enregistrement(s) restauré(s)."))
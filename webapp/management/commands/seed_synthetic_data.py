@@ -0,0 +1,462 @@
+# webapp/management/commands/seed_synthetic_data.py
+import argparse
+import calendar
+import random
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction as db_transaction
+
+from webapp.models import (
+    Account, Allocation, AllocationLine, Budget, CategorizationRule, Category, Fund, FundDebitLine,
+    FundDebitRecord, Household, HouseholdMember, SavingGoal, Tag, Transaction, UserProfile,
+)
+from webapp.services.category_closure_service import CategoryClosureService
+from webapp.services.monthly_total_service import MonthlyTotalService
+from webapp.services.permission_service import PermissionService
+from webapp.services.recurring_detection_service import RecurringDetectionService
+from webapp.services.transaction_stats_service import TransactionStatsService
+
+# Arbre des catégories (même découpage que populate_categories.py): (parent, description, enfants)
+CATEGORY_TREE = [
+    ("Revenus", "Sources d'argent entrant.", ["Salaire", "Bonus", "Intérêts", "Remboursements Reçus", "Autres Revenus"]),
+    ("Logement", "Dépenses liées à l'habitation.", [
+        "Loyer / Hypothèque", "Charges Copropriété / Taxes Immobilières", "Électricité", "Gaz", "Eau", "Internet",
+        "Téléphone / Abonnements Médias", "Assurance Habitation / Ménage", "Réparations & Entretien Maison", "Jardinage",
+    ]),
+    ("Transport", "Dépenses liées aux déplacements.", [
+        "Abonnements Transports", "Tickets Transports", "Carburant", "Entretien & Réparations Véhicule",
+        "Parking / Péage", "Assurance Automobile",
+    ]),
+    ("Santé & Bien-être", "Dépenses de santé, assurances et bien-être personnel.", [
+        "Assurance Maladie (Cotisation)", "Frais Médicaux (Consultations)", "Médicaments", "Cote-part Assurance Maladie",
+        "Soins Corporels & Bien-être", "Activités Sportives",
+    ]),
+    ("Alimentation & Restauration", "Dépenses de nourriture et repas à l'extérieur.", [
+        "Courses Alimentaires", "Restaurants / Plats à Emporter", "Boulangerie / Cafés",
+    ]),
+    ("Habillement & Soins Personnels", "Dépenses de vêtements, chaussures et produits d'hygiène/beauté.", [
+        "Vêtements", "Chaussures", "Vêtements de Sport", "Accessoires Habillement", "Produits de Beauté / Hygiène",
+    ]),
+    ("Loisirs & Culture", "Dépenses pour les divertissements, hobbies, culture et voyages.", [
+        "Sorties & Divertissements", "Vacances & Voyages", "Livres & Médias", "Hobbies & Matériel", "Cadeaux Offerts",
+    ]),
+    ("Finances & Impôts", "Dépenses liées aux impôts, crédits et frais financiers.", [
+        "Impôts Annuels", "Remboursements de Crédits / Emprunts", "Frais Bancaires", "Investissements (3ème Pilier, Or)",
+    ]),
+    ("Animaux", "Dépenses pour les animaux de compagnie.", ["Nourriture Animaux", "Vétérinaire", "Pension / Garde Animaux"]),
+    ("Dons & Cotisations", "Dons, charité et cotisations à des organisations.", [
+        "Donations / Charité", "Cotisations Associations / Clubs",
+    ]),
+    ("Achats Divers & Imprévus", "Achats non récurrents et dépenses imprévues.", [
+        "Électroménager", "Meubles", "Remplacement Appareils", "Autres Achats Divers", "Réparations Imprévues",
+    ]),
+]
+# Catégories gérées comme des fonds (alimentées par les allocations du salaire: montant mensuel)
+FUND_CATEGORIES = {
+    "Vacances & Voyages": Decimal('250.00'),
+    "Réparations & Entretien Maison": Decimal('80.00'),
+    "Vétérinaire": Decimal('40.00'),
+    "Impôts Annuels": Decimal('350.00'),
+}
+# Catégories parentes budgétées (budget mensuel)
+BUDGETED_CATEGORIES = {
+    "Alimentation & Restauration": Decimal('900.00'),
+    "Transport": Decimal('250.00'),
+    "Loisirs & Culture": Decimal('300.00'),
+    "Habillement & Soins Personnels": Decimal('150.00'),
+}
+TAGS = [
+    ("Fixe", "Dépense ou revenu dont le montant et la fréquence sont réguliers."),
+    ("Variable", "Dépense ou revenu dont le montant ou la fréquence peuvent varier."),
+    ("Essentiel", "Dépense nécessaire à la vie quotidienne."),
+    ("Plaisir", "Dépense non essentielle, liée aux loisirs ou au confort."),
+    ("Commun", "Dépense ou revenu partagé avec un foyer ou un groupe."),
+    ("Personnel", "Dépense ou revenu propre à un individu."),
+    ("Vacances", "Dépense spécifique aux périodes de vacances."),
+    ("Imprévu", "Dépense inattendue ou urgente."),
+    ("Investissement", "Opération visant à générer un rendement futur."),
+    ("Transfert", "Mouvement de fonds entre vos propres comptes."),
+]
+CITIES = ["GENEVE", "LAUSANNE", "CAROUGE", "NYON", "VEVEY", "MORGES"]
+NAMES = ["DU LAC", "DE LA GARE", "CENTRAL", "DU MARCHE", "DES ALPES", "SAINT-JEAN"]
+
+# Opérations mensuelles: (description, catégorie, type, montant min, max, jour du mois, tags)
+# Le montant est tiré une fois par utilisateur puis varie peu d'un mois à l'autre
+RECURRING = [
+    ("SALAIRE {employer}", "Salaire", 'IN', 4800, 8200, 25, ["Fixe"]),
+    ("LOYER REGIE {name}", "Loyer / Hypothèque", 'OUT', 1300, 2600, 1, ["Fixe", "Essentiel", "Commun"]),
+    ("ASSURA PRIME LAMAL", "Assurance Maladie (Cotisation)", 'OUT', 330, 520, 5, ["Fixe", "Essentiel"]),
+    ("SWISSCOM INTERNET", "Internet", 'OUT', 55, 90, 12, ["Fixe"]),
+    ("SALT MOBILE", "Téléphone / Abonnements Médias", 'OUT', 29, 55, 15, ["Fixe"]),
+    ("NETFLIX.COM", "Téléphone / Abonnements Médias", 'OUT', 16, 21, 18, ["Fixe", "Plaisir"]),
+    ("SIG ELECTRICITE", "Électricité", 'OUT', 55, 110, 20, ["Fixe", "Essentiel"]),
+    ("TPG ABONNEMENT", "Abonnements Transports", 'OUT', 45, 70, 2, ["Fixe", "Essentiel"]),
+    ("UBS FRAIS DE TENUE DE COMPTE", "Frais Bancaires", 'OUT', 5, 5, 28, ["Fixe"]),
+]
+# Opérations annuelles: (description, catégorie, montant min, max, mois, jour, tags)
+ANNUAL = [
+    ("ADMINISTRATION FISCALE CANTONALE", "Impôts Annuels", 3000, 6500, 4, 30, ["Fixe", "Essentiel"]),
+    ("VIGNETTE AUTOROUTE", "Parking / Péage", 40, 40, 1, 15, ["Fixe"]),
+]
+# Achats courants: (description, catégorie ou None, montant min, max, poids, tags)
+# Les poids suivent une distribution à longue traîne: quelques enseignes font l'essentiel des achats
+MERCHANTS = [
+    ("MIGROS M{n} {city}", "Courses Alimentaires", 6, 160, 35, ["Essentiel"]),
+    ("COOP-{n} {city}", "Courses Alimentaires", 5, 140, 30, ["Essentiel"]),
+    ("DENNER {n} {city}", "Courses Alimentaires", 4, 70, 10, ["Essentiel"]),
+    ("LIDL SUISSE {n}", "Courses Alimentaires", 5, 90, 8, ["Essentiel"]),
+    ("BOULANGERIE {name}", "Boulangerie / Cafés", 2, 16, 12, []),
+    ("STARBUCKS {city}", "Boulangerie / Cafés", 4, 13, 6, ["Plaisir"]),
+    ("RESTAURANT {name}", "Restaurants / Plats à Emporter", 25, 130, 8, ["Plaisir"]),
+    ("MCDONALDS {city}", "Restaurants / Plats à Emporter", 9, 32, 6, ["Plaisir"]),
+    ("UBER EATS", "Restaurants / Plats à Emporter", 18, 65, 4, ["Plaisir"]),
+    ("SBB CFF MOBILE", "Tickets Transports", 3, 95, 8, []),
+    ("SHELL {city}", "Carburant", 40, 115, 5, ["Essentiel"]),
+    ("PARKING {name}", "Parking / Péage", 2, 25, 4, []),
+    ("PHARMACIE {name}", "Médicaments", 8, 85, 4, ["Essentiel"]),
+    ("SUN STORE {city}", "Produits de Beauté / Hygiène", 6, 60, 3, []),
+    ("COIFFEUR {name}", "Soins Corporels & Bien-être", 35, 95, 2, []),
+    ("ZALANDO", "Vêtements", 35, 220, 3, ["Plaisir"]),
+    ("H&M {city}", "Vêtements", 15, 120, 3, []),
+    ("OCHSNER SPORT", "Vêtements de Sport", 30, 180, 1, ["Plaisir"]),
+    ("GALAXUS.CH", "Hobbies & Matériel", 15, 450, 3, []),
+    ("FNAC {city}", "Livres & Médias", 12, 90, 2, ["Plaisir"]),
+    ("PATHE {city}", "Sorties & Divertissements", 17, 45, 2, ["Plaisir"]),
+    ("FRESSNAPF {city}", "Nourriture Animaux", 15, 85, 2, []),
+    ("CABINET VETERINAIRE {name}", "Vétérinaire", 80, 420, 0.3, ["Imprévu"]),
+    ("EASYJET", "Vacances & Voyages", 70, 420, 0.5, ["Vacances", "Plaisir"]),
+    ("BOOKING.COM", "Vacances & Voyages", 140, 950, 0.4, ["Vacances"]),
+    ("JUMBO BRICOLAGE {city}", "Réparations & Entretien Maison", 15, 300, 0.6, []),
+    ("IKEA {city}", "Meubles", 25, 650, 0.4, []),
+    ("DIGITEC", "Remplacement Appareils", 50, 1300, 0.3, ["Imprévu"]),
+    # Paiements entre particuliers: jamais catégorisés automatiquement (page de révision)
+    ("TWINT {name}", None, 5, 120, 3, []),
+]
+EMPLOYERS = ["ETAT DE GENEVE", "HUG", "NESTLE SA", "ROLEX SA", "MIGROS GENEVE", "UBS SA", "EPFL", "SIG"]
+HOUSEHOLD_TYPES = ['COUPLE_SHARED', 'COUPLE_MIXED', 'FAMILY_MIXED', 'COUPLE_SEPARATE', 'ROOMMATES']
+
+def iso_date(value):
+    """Type argparse: date au format AAAA-MM-JJ."""
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"date invalide (AAAA-MM-JJ attendu): {value!r}")
+
+class Command(BaseCommand):
+    """
+    Génère un jeu de données synthétique volumineux pour les tests de charge et les mesures:
+    des utilisateurs regroupés en ménages, chacun avec ses comptes, l'arbre des catégories, ses tags,
+    budgets, fonds, allocations, règles de catégorisation et plusieurs années de transactions
+    (opérations mensuelles et achats répartis sur des enseignes réalistes).
+
+    Tout est écrit par lots (bulk_create) puis les données dérivées sont reconstruites une fois
+    (arbre des catégories, cumuls mensuels, compteurs, séries récurrentes, droits de lecture),
+    dans la même transaction: en cas d'échec, rien n'est écrit et le --prefix reste libre.
+    Les transactions couvrent les mois jusqu'à --today (date du jour par défaut): deux exécutions
+    avec les mêmes options, --today compris, donnent les mêmes données.
+    Usage: python manage.py seed_synthetic_data [--users 10] [--household-size 2] [--years 3]
+           [--transactions-per-month 120] [--seed 42] [--today AAAA-MM-JJ] [--prefix seed] [--password PASSWORD]
+    """
+    help = "Génère des utilisateurs, ménages et transactions synthétiques (reproductibles avec --seed et --today)."
+
+    BATCH_SIZE = 5000
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help="Nombre d'utilisateurs (10 par défaut).")
+        parser.add_argument('--household-size', type=int, default=2, help="Membres par ménage (2 par défaut, 1: personnes seules).")
+        parser.add_argument('--years', type=int, default=3, help="Années de transactions jusqu'au mois courant (3 par défaut).")
+        parser.add_argument(
+            '--transactions-per-month', type=int, default=120,
+            help="Achats courants par utilisateur et par mois, en plus des opérations mensuelles (120 par défaut).",
+        )
+        parser.add_argument('--seed', type=int, default=42, help="Graine du générateur aléatoire (42 par défaut).")
+        parser.add_argument(
+            '--today', type=iso_date,
+            help="Date de fin des transactions, AAAA-MM-JJ (date du jour par défaut): à fixer pour des données reproductibles.",
+        )
+        parser.add_argument('--prefix', type=str, default='seed', help="Préfixe des noms d'utilisateur ('seed' par défaut).")
+        parser.add_argument('--password', type=str, help="Mot de passe commun des utilisateurs (sinon aucune connexion possible).")
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['household_size'] < 1 or options['years'] < 1:
+            raise CommandError("--users, --household-size et --years doivent être positifs.")
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=f"{prefix}-").exists():
+            raise CommandError(f"Des utilisateurs '{prefix}-...' existent déjà: choisissez un autre --prefix.")
+
+        self.rng = random.Random(options['seed'])
+        today = options['today'] or date.today()
+        self.months = [
+            (year, month)
+            for year in range(today.year - options['years'], today.year + 1)
+            for month in range(1, 13)
+            if (year, month) > (today.year - options['years'], today.month) and (year, month) <= (today.year, today.month)
+        ]
+        self.used_patterns = set(CategorizationRule.objects.values_list('description_pattern', flat=True))
+
+        started = time.perf_counter()
+        transaction_count = 0
+        with db_transaction.atomic():
+            users = self.create_users(prefix, options['users'], options['password'])
+            households = self.create_households(prefix, users, options['household_size'])
+            for user in users:
+                transaction_count += self.create_user_data(
+                    user, households[user.pk], options['transactions_per_month'], today
+                )
+                self.stdout.write(f"  {user.username}: {transaction_count} transactions au total")
+            written = time.perf_counter() - started
+            self.stdout.write(f"Écriture: {transaction_count} transactions en {written:.1f} s.")
+
+            # Données dérivées, ignorées par bulk_create
+            # (les droits de lecture sont aussi synchronisés par apply_sharing_settings à la validation)
+            started = time.perf_counter()
+            for user in users:
+                CategoryClosureService.rebuild(user=user)
+                MonthlyTotalService.rebuild(user=user)
+                TransactionStatsService.rebuild(user=user)
+                RecurringDetectionService.detect(user, today=today)
+                PermissionService.rebuild_visibility_grants(user=user)
+            self.stdout.write(f"Données dérivées reconstruites en {time.perf_counter() - started:.1f} s.")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(users)} utilisateurs et {transaction_count} transactions générés ('{prefix}-1' à '{prefix}-{len(users)}')."
+        ))
+
+    def create_users(self, prefix, count, password):
+        # Un seul calcul du mot de passe (coûteux), partagé par tous les utilisateurs
+        password_hash = make_password(password)
+        users = User.objects.bulk_create([
+            User(username=f"{prefix}-{index}", email=f"{prefix}-{index}@example.com", password=password_hash)
+            for index in range(1, count + 1)
+        ])
+        UserProfile.objects.bulk_create([UserProfile(user=user) for user in users])
+        return users
+
+    def create_households(self, prefix, users, household_size):
+        """Regroupe les utilisateurs en ménages (le premier membre est administrateur). Retourne {user_id: ménage}."""
+        groups = [users[start:start + household_size] for start in range(0, len(users), household_size)]
+        households = Household.objects.bulk_create([
+            Household(
+                name=f"Ménage {prefix} {index}",
+                household_type='SINGLE' if len(group) == 1 else self.rng.choice(HOUSEHOLD_TYPES),
+            )
+            for index, group in enumerate(groups, start=1)
+        ])
+        HouseholdMember.objects.bulk_create([
+            HouseholdMember(household=household, user=user, role='ADMIN' if position == 0 else 'MEMBER')
+            for household, group in zip(households, groups)
+            for position, user in enumerate(group)
+        ])
+        for household in households:
+            household.apply_sharing_settings()
+        return {user.pk: (household, len(group)) for household, group in zip(households, groups) for user in group}
+
+    def create_user_data(self, user, household_info, transactions_per_month, today):
+        """Crée toutes les données d'un utilisateur. Retourne le nombre de transactions créées."""
+        rng = self.rng
+        household, household_size = household_info
+        is_household_admin = household_size > 1 and HouseholdMember.objects.filter(
+            household=household, user=user, role='ADMIN'
+        ).exists()
+
+        accounts = Account.objects.bulk_create([
+            Account(user=user, name="Compte courant", account_type='CH', initial_balance=Decimal(rng.randrange(500, 8000))),
+            Account(user=user, name="Compte épargne", account_type='EP', initial_balance=Decimal(rng.randrange(1000, 30000))),
+            Account(user=user, name="Carte de crédit", account_type='CR'),
+        ] + ([Account(user=user, name="Compte commun", account_type='CH', is_shared=True)] if is_household_admin else []))
+        checking, savings, credit_card = accounts[:3]
+        shared_account = accounts[3] if is_household_admin else None
+
+        # Catégories: parents d'abord (leurs identifiants servent aux enfants)
+        parents = Category.objects.bulk_create([
+            Category(user=user, name=name, description=description, is_budgeted=name in BUDGETED_CATEGORIES)
+            for name, description, _ in CATEGORY_TREE
+        ])
+        children = Category.objects.bulk_create([
+            Category(user=user, name=child, parent=parent, is_fund_managed=child in FUND_CATEGORIES)
+            for parent, (_, _, child_names) in zip(parents, CATEGORY_TREE)
+            for child in child_names
+        ])
+        categories = {category.name: category for category in parents + children}
+        # Le nom d'un tag est unique dans toute la base: suffixé par le nom d'utilisateur
+        tags = dict(zip((name for name, _ in TAGS), Tag.objects.bulk_create([
+            Tag(user=user, name=f"{name} ({user.username})", description=description) for name, description in TAGS
+        ])))
+
+        first_month = date(*self.months[0], 1)
+        Budget.objects.bulk_create([
+            Budget(user=user, category=categories[name], amount=amount, period_type='M', start_date=first_month)
+            for name, amount in BUDGETED_CATEGORIES.items()
+        ])
+        SavingGoal.objects.create(
+            user=user, name="Fonds d'urgence", category=categories["Investissements (3ème Pilier, Or)"],
+            target_amount=Decimal('15000.00'), current_amount_saved=Decimal(rng.randrange(0, 12000)),
+            target_date=date(today.year + 2, 12, 31),
+        )
+
+        # Opérations et enseignes de l'utilisateur: variantes de description (magasins, villes) et préférences propres.
+        # Boucle principale sur les identifiants seulement (plus rapide que les instances liées)
+        shared_or_checking = shared_account or checking
+        fund_category_ids = {categories[name].pk for name in FUND_CATEGORIES}
+        fund_lines = [(categories[name].pk, amount) for name, amount in FUND_CATEGORIES.items()]
+        recurring = []  # (description, catégorie, type, montant en centimes, jour, tags, montant variable, compte)
+        for description, category_name, transaction_type, low, high, day, tag_names in RECURRING:
+            recurring.append((
+                description.format(employer=rng.choice(EMPLOYERS), name=rng.choice(NAMES)),
+                categories[category_name].pk, transaction_type, rng.randrange(low * 100, high * 100 + 1), day,
+                [tags[name].pk for name in tag_names + (["Personnel"] if transaction_type == 'IN' else [])],
+                # Le salaire et le loyer ne varient pas d'un mois à l'autre; le loyer est payé depuis le compte commun
+                category_name not in ("Salaire", "Loyer / Hypothèque"),
+                shared_or_checking.pk if category_name == "Loyer / Hypothèque" else checking.pk,
+            ))
+        annual = [
+            (description, categories[category_name].pk, rng.randrange(low * 100, high * 100 + 1), month, day,
+             [tags[name].pk for name in tag_names])
+            for description, category_name, low, high, month, day, tag_names in ANNUAL
+        ]
+        merchants = []  # (description, catégorie, montant min et écart en centimes, tags, comptes possibles)
+        weights = []
+        for description, category_name, low, high, weight, tag_names in MERCHANTS:
+            variants = sorted({
+                description.format(n=rng.randrange(1000, 9999), city=rng.choice(CITIES), name=rng.choice(NAMES))
+                for _ in range(rng.randint(1, 3))
+            })
+            # Courses: une sur deux sur le compte commun; sinon une sur quatre par carte de crédit
+            account_ids = [checking.pk, checking.pk, checking.pk, credit_card.pk]
+            if category_name == "Courses Alimentaires" and shared_account:
+                account_ids = [checking.pk, credit_card.pk, shared_account.pk, shared_account.pk]
+            for variant in variants:
+                merchants.append((
+                    variant, categories[category_name].pk if category_name else None, low * 100, (high - low) * 100,
+                    [tags[name].pk for name in tag_names + ["Variable"]], account_ids,
+                ))
+                weights.append(weight * rng.uniform(0.3, 1.7) / len(variants))
+
+        pending = []  # (Transaction, identifiants des tags)
+        allocations = []  # transactions de salaire, réparties sur les fonds
+        count = 0
+        for year, month in self.months:
+            days_in_month = calendar.monthrange(year, month)[1]
+            last_day = today.day if (year, month) == (today.year, today.month) else days_in_month
+            for description, category_id, transaction_type, cents, day, tag_ids, varies, account_id in recurring:
+                if day > last_day:
+                    continue
+                if varies:
+                    # Variation de quelques pourcents d'un mois à l'autre
+                    cents = round(cents * rng.uniform(0.97, 1.03))
+                transaction = Transaction(
+                    user_id=user.pk, account_id=account_id, category_id=category_id, date=date(year, month, day),
+                    description=description, transaction_type=transaction_type,
+                    amount=Decimal(cents if transaction_type == 'IN' else -cents).scaleb(-2),
+                )
+                pending.append((transaction, tag_ids))
+                if transaction_type == 'IN':
+                    allocations.append(transaction)
+            for description, category_id, cents, annual_month, day, tag_ids in annual:
+                if annual_month == month and day <= last_day:
+                    pending.append((Transaction(
+                        user_id=user.pk, account_id=checking.pk, category_id=category_id, date=date(year, month, day),
+                        description=description, transaction_type='OUT', amount=Decimal(-cents).scaleb(-2),
+                    ), tag_ids))
+            # Virement mensuel vers l'épargne
+            if last_day >= 26:
+                amount = Decimal(rng.randrange(2, 12) * 50)
+                for account_id, signed in [(checking.pk, -amount), (savings.pk, amount)]:
+                    pending.append((Transaction(
+                        user_id=user.pk, account_id=account_id, date=date(year, month, 26), description="VIREMENT EPARGNE",
+                        transaction_type='TRF', amount=signed,
+                    ), [tags["Transfert"].pk]))
+
+            purchases = transactions_per_month * last_day // days_in_month
+            for merchant_index in rng.choices(range(len(merchants)), weights=weights, k=purchases):
+                description, category_id, low, span, tag_ids, account_ids = merchants[merchant_index]
+                # Montants à longue traîne: la plupart des achats sont proches du minimum
+                cents = low + int(span * rng.random() ** 2)
+                pending.append((Transaction(
+                    user_id=user.pk, account_id=rng.choice(account_ids), category_id=category_id,
+                    date=date(year, month, rng.randint(1, last_day)),
+                    description=description, transaction_type='OUT', amount=Decimal(-cents).scaleb(-2),
+                ), tag_ids[:rng.randint(0, len(tag_ids))]))
+
+            if len(pending) >= self.BATCH_SIZE:
+                count += self.flush_transactions(user, pending, allocations, fund_lines, fund_category_ids)
+                pending, allocations = [], []
+        count += self.flush_transactions(user, pending, allocations, fund_lines, fund_category_ids)
+
+        self.create_funds(user, fund_category_ids)
+        self.create_rules(user, [(description, category_id, tag_ids) for description, category_id, *_, tag_ids in annual] + [
+            (description, category_id, tag_ids) for description, category_id, _, _, _, tag_ids, _, _ in recurring
+        ] + [
+            (description, category_id, tag_ids) for description, category_id, _, _, tag_ids, _ in merchants if category_id
+        ])
+        return count
+
+    def flush_transactions(self, user, pending, allocations, fund_lines, fund_category_ids):
+        """Écrit un lot de transactions, leurs tags, les allocations des salaires et les débits des fonds."""
+        transactions = Transaction.objects.bulk_create([transaction for transaction, _ in pending], batch_size=self.BATCH_SIZE)
+        Transaction.tags.through.objects.bulk_create([
+            Transaction.tags.through(transaction_id=transaction.pk, tag_id=tag_id)
+            for transaction, tag_ids in pending
+            for tag_id in tag_ids
+        ], batch_size=self.BATCH_SIZE)
+
+        created_allocations = Allocation.objects.bulk_create([
+            Allocation(user_id=user.pk, transaction_id=transaction.pk, notes="Répartition mensuelle du salaire",
+                       total_allocated_amount=sum(amount for _, amount in fund_lines))
+            for transaction in allocations
+        ])
+        AllocationLine.objects.bulk_create([
+            AllocationLine(user_id=user.pk, allocation_id=allocation.pk, category_id=category_id, amount=amount)
+            for allocation in created_allocations
+            for category_id, amount in fund_lines
+        ], batch_size=self.BATCH_SIZE)
+
+        # Dépenses dans une catégorie de fonds: débitées du fonds
+        debited = [transaction for transaction in transactions if transaction.category_id in fund_category_ids]
+        records = FundDebitRecord.objects.bulk_create([
+            FundDebitRecord(user_id=user.pk, transaction_id=transaction.pk, total_debited_amount=-transaction.amount)
+            for transaction in debited
+        ], batch_size=self.BATCH_SIZE)
+        FundDebitLine.objects.bulk_create([
+            FundDebitLine(user_id=user.pk, fund_debit_record_id=record.pk, category_id=transaction.category_id, amount=-transaction.amount)
+            for record, transaction in zip(records, debited)
+        ], batch_size=self.BATCH_SIZE)
+        return len(transactions)
+
+    def create_funds(self, user, fund_category_ids):
+        """Un fonds par catégorie de fonds: solde = allocations - débits."""
+        balances = {category_id: Decimal('0.00') for category_id in fund_category_ids}
+        for category_id, amount in AllocationLine.objects.filter(user=user).values_list('category_id', 'amount'):
+            balances[category_id] += amount
+        for category_id, amount in FundDebitLine.objects.filter(user=user).values_list('category_id', 'amount'):
+            balances[category_id] -= amount
+        Fund.objects.bulk_create([
+            Fund(user=user, category_id=category_id, current_balance=balance) for category_id, balance in sorted(balances.items())
+        ])
+
+    def create_rules(self, user, rules):
+        """
+        Une règle de catégorisation par description: [(description, catégorie, tags)].
+        Le modèle de description est unique dans toute la base: une description déjà utilisée est ignorée.
+        """
+        # Tirages faits pour toutes les règles, ignorées comprises: la suite des données
+        # ne dépend pas des règles déjà présentes dans la base
+        hit_counts = [self.rng.randint(1, 40) for _ in rules]
+        rules = [(rule, hit_count) for rule, hit_count in zip(rules, hit_counts) if rule[0] not in self.used_patterns]
+        self.used_patterns.update(description for (description, _, _), _ in rules)
+
+        created = CategorizationRule.objects.bulk_create([
+            CategorizationRule(
+                user=user, description_pattern=description, suggested_category_id=category_id, hit_count=hit_count,
+            )
+            for (description, category_id, _), hit_count in rules
+        ])
+        CategorizationRule.suggested_tags.through.objects.bulk_create([
+            CategorizationRule.suggested_tags.through(categorizationrule_id=rule.pk, tag_id=tag_id)
+            for rule, ((_, _, tag_ids), _) in zip(created, rules)
+            for tag_id in tag_ids
+        ])
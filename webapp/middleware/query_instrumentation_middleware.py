@@ -0,0 +1,123 @@
+# webapp/middleware/query_instrumentation_middleware.py
+
+import hashlib
+import json
+import logging
+import re
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger('webapp.queries')
+
+# Listes de paramètres "IN (%s, %s, ...)" ou lignes "VALUES (...), (...)" ramenées à une seule forme
+PARAMETER_LIST_RE = re.compile(r'\((?:%s, )*%s\)(?:, \((?:%s, )*%s\))*')
+
+def get_fingerprint(sql):
+    """Empreinte courte d'une requête SQL, indépendante des valeurs et du nombre de paramètres."""
+    return hashlib.sha1(PARAMETER_LIST_RE.sub('(...)', sql).encode()).hexdigest()[:10]
+
+class QueryRecorder:
+    """
+    Enregistre les requêtes SQL exécutées sur la connexion par défaut (avec leur durée)
+    pendant un bloc 'with'. Fonctionne aussi avec DEBUG=False (connection.execute_wrapper).
+
+    Utilisé par QueryInstrumentationMiddleware et par la commande check_query_budgets.
+    """
+    def __init__(self):
+        self.queries = []  # [(sql, durée en secondes)]
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._wrapper.__exit__(*exc_info)
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_time(self):
+        return sum(duration for _, duration in self.queries)
+
+    def slowest(self, limit=3):
+        """Les 'limit' requêtes les plus longues: [(sql, durée)]."""
+        return sorted(self.queries, key=lambda query: query[1], reverse=True)[:limit]
+
+    def duplicates(self, threshold=2):
+        """
+        Requêtes de même forme exécutées au moins 'threshold' fois (signe d'une boucle N+1):
+        {empreinte: {'count', 'time', 'sql'}}, les plus fréquentes d'abord.
+        """
+        groups = {}
+        for sql, duration in self.queries:
+            group = groups.setdefault(get_fingerprint(sql), {'count': 0, 'time': 0.0, 'sql': sql})
+            group['count'] += 1
+            group['time'] += duration
+        return dict(sorted(
+            ((fingerprint, group) for fingerprint, group in groups.items() if group['count'] >= threshold),
+            key=lambda item: item[1]['count'], reverse=True,
+        ))
+
+class QueryInstrumentationMiddleware:
+    """
+    Middleware (activé par settings.QUERY_INSTRUMENTATION) qui mesure les requêtes SQL de chaque requête HTTP:
+    nombre, temps SQL total, requêtes les plus lentes et requêtes répétées (empreintes).
+
+    Les mesures sont ajoutées à la réponse dans l'en-tête 'Server-Timing' (visible dans les outils
+    de développement du navigateur) et écrites en une ligne JSON dans le logger 'webapp.queries'.
+    """
+    SLOWEST_LIMIT = 3
+
+    def __init__(self, get_response):
+        if not settings.QUERY_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        total_time = time.perf_counter() - started
+
+        duplicates = recorder.duplicates(settings.QUERY_DUPLICATE_THRESHOLD)
+        # En-tête en ASCII uniquement; pour les réponses en flux (exports), les requêtes faites
+        # pendant l'envoi du contenu ne sont pas comptées
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={recorder.total_time * 1000:.1f};desc="SQL x{recorder.count}"',
+            f'dup;desc="SQL repetees x{sum(group["count"] for group in duplicates.values())}"',
+            f'total;dur={total_time * 1000:.1f}',
+        ])
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': getattr(request.resolver_match, 'view_name', None),
+            'status': response.status_code,
+            'queries': recorder.count,
+            'sql_ms': round(recorder.total_time * 1000, 1),
+            'total_ms': round(total_time * 1000, 1),
+            'slowest': [
+                {'ms': round(duration * 1000, 1), 'sql': sql[:300]}
+                for sql, duration in recorder.slowest(self.SLOWEST_LIMIT)
+            ],
+            'duplicates': [
+                {'fingerprint': fingerprint, 'count': group['count'], 'ms': round(group['time'] * 1000, 1), 'sql': group['sql'][:300]}
+                for fingerprint, group in duplicates.items()
+            ],
+        }
+        level = logging.WARNING if duplicates else logging.INFO
+        logger.log(level, json.dumps(record, ensure_ascii=False))
+        return response
@@ -0,0 +1,101 @@
+# webapp/middleware/user_context_middleware.py
+
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from webapp.models import HouseholdMember
+from webapp.services.permission_service import PermissionService
+from webapp.services.user_cache_service import UserCacheService
+
+@lru_cache(maxsize=None)
+def get_timezone(name):
+    """Retourne le fuseau horaire 'name', créé une seule fois par processus (None s'il est inconnu)."""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+class UserContext:
+    """
+    Données de l'utilisateur connecté utilisées par la plupart des requêtes:
+    fuseau horaire du profil, indicateurs de partage et rôle dans chacun de ses ménages.
+    Disponible dans les vues sous 'request.user_context'.
+    """
+    def __init__(self, user_id=None, timezone_name=None, can_view_all_transactions=False,
+                 can_edit_all_transactions=False, can_view_all_categories=False, household_roles=None):
+        self.user_id = user_id
+        self.timezone_name = timezone_name
+        self.can_view_all_transactions = can_view_all_transactions
+        self.can_edit_all_transactions = can_edit_all_transactions
+        self.can_view_all_categories = can_view_all_categories
+        # {household_id: rôle ('ADMIN', 'MEMBER' ou 'VIEWER')}
+        self.household_roles = household_roles or {}
+
+    @property
+    def timezone(self):
+        return get_timezone(self.timezone_name) if self.timezone_name else None
+
+    def is_household_member(self, household_id):
+        return household_id in self.household_roles
+
+    def is_household_admin(self, household_id):
+        return self.household_roles.get(household_id) == 'ADMIN'
+
+    def to_session(self):
+        return {
+            'user_id': self.user_id,
+            'timezone_name': self.timezone_name,
+            'can_view_all_transactions': self.can_view_all_transactions,
+            'can_edit_all_transactions': self.can_edit_all_transactions,
+            'can_view_all_categories': self.can_view_all_categories,
+            # Clés JSON: les identifiants sont convertis en texte
+            'household_roles': {str(household_id): role for household_id, role in self.household_roles.items()},
+        }
+
+    @classmethod
+    def from_session(cls, data):
+        data = dict(data)
+        data['household_roles'] = {int(household_id): role for household_id, role in data['household_roles'].items()}
+        return cls(**data)
+
+class UserContextMiddleware:
+    """
+    Middleware qui charge une fois par requête le contexte de l'utilisateur connecté (UserContext)
+    et le place dans 'request.user_context'.
+
+    Le contexte est gardé en session avec un numéro de version: celui des droits d'accès de l'utilisateur
+    (PermissionService.CACHE_NAMESPACE), incrémenté à chaque modification de son profil ou de ses ménages.
+    Tant que la version n'a pas changé, aucune requête n'est faite pour le profil ni pour les ménages.
+    """
+    SESSION_KEY = 'user_context'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.user_context = self.get_user_context(request) if request.user.is_authenticated else UserContext()
+        return self.get_response(request)
+
+    def get_user_context(self, request):
+        user = request.user
+        version = UserCacheService.get_version(user.pk, PermissionService.CACHE_NAMESPACE)
+        stored = request.session.get(self.SESSION_KEY)
+        if stored and stored.get('version') == version and stored['context'].get('user_id') == user.pk:
+            return UserContext.from_session(stored['context'])
+
+        context = self.load_user_context(user)
+        request.session[self.SESSION_KEY] = {'version': version, 'context': context.to_session()}
+        return context
+
+    @staticmethod
+    def load_user_context(user):
+        """Charge le contexte depuis la base: profil, puis rôles dans les ménages."""
+        profile = PermissionService.get_user_profile(user)
+        return UserContext(
+            user_id=user.pk,
+            timezone_name=profile.timezone,
+            can_view_all_transactions=profile.can_view_all_transactions,
+            can_edit_all_transactions=profile.can_edit_all_transactions,
+            can_view_all_categories=profile.can_view_all_categories,
+            household_roles=dict(HouseholdMember.objects.filter(user=user).values_list('household_id', 'role')),
+        )
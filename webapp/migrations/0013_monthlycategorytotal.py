@@ -0,0 +1,69 @@
+# Generated by Django 5.2.1 on 2026-10-19 13:03
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def populate_monthly_totals(apps, schema_editor):
+    """Calcule les cumuls initiaux à partir des transactions existantes."""
+    Transaction = apps.get_model('webapp', 'Transaction')
+    MonthlyCategoryTotal = apps.get_model('webapp', 'MonthlyCategoryTotal')
+    amount_field = DecimalField(max_digits=15, decimal_places=2)
+    rows = Transaction.objects.annotate(
+        year=ExtractYear('date'),
+        month=ExtractMonth('date'),
+    ).order_by().values('user_id', 'account_id', 'category_id', 'year', 'month').annotate(
+        total_income=Sum(Case(When(amount__gt=0, then=F('amount')), default=Value(Decimal('0.00')), output_field=amount_field)),
+        total_expense=Sum(Case(When(amount__lt=0, then=F('amount')), default=Value(Decimal('0.00')), output_field=amount_field)),
+        total_count=Sum(Value(1)),
+    )
+    MonthlyCategoryTotal.objects.bulk_create([
+        MonthlyCategoryTotal(
+            user_id=row['user_id'],
+            account_id=row['account_id'],
+            category_id=row['category_id'],
+            year=row['year'],
+            month=row['month'],
+            income=row['total_income'] or Decimal('0.00'),
+            expense=row['total_expense'] or Decimal('0.00'),
+            count=row['total_count'],
+        )
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webapp', '0012_category_is_shared'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyCategoryTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Année')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Mois')),
+                ('income', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Revenus')),
+                ('expense', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Dépenses')),
+                ('count', models.IntegerField(default=0, verbose_name='Nombre de transactions')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_category_totals', to='webapp.account', verbose_name='Compte')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='monthly_totals', to='webapp.category', verbose_name='Catégorie')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_category_totals', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Cumul Mensuel par Catégorie',
+                'verbose_name_plural': 'Cumuls Mensuels par Catégorie',
+                'ordering': ['-year', '-month'],
+                'indexes': [models.Index(fields=['user', 'year', 'month'], name='webapp_mct_user_period_idx')],
+                'unique_together': {('user', 'account', 'category', 'year', 'month')},
+            },
+        ),
+        migrations.RunPython(populate_monthly_totals, migrations.RunPython.noop),
+    ]
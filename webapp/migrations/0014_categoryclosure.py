@@ -0,0 +1,47 @@
+# Generated by Django 5.2.1 on 2026-10-19 13:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_category_closure(apps, schema_editor):
+    """Calcule les liens ancêtre/descendant à partir des catégories existantes."""
+    Category = apps.get_model('webapp', 'Category')
+    CategoryClosure = apps.get_model('webapp', 'CategoryClosure')
+    category_parents = dict(Category.objects.order_by().values_list('id', 'parent_id'))
+    links = []
+    for category_id in category_parents:
+        visited = set()
+        current = category_id
+        depth = 0
+        while current is not None and current not in visited:
+            visited.add(current)
+            links.append(CategoryClosure(ancestor_id=current, descendant_id=category_id, depth=depth))
+            current = category_parents.get(current)
+            depth += 1
+    CategoryClosure.objects.bulk_create(links, batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webapp', '0013_monthlycategorytotal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField(verbose_name='Profondeur')),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='webapp.category', verbose_name='Ancêtre')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='webapp.category', verbose_name='Descendant')),
+            ],
+            options={
+                'verbose_name': 'Lien Ancêtre/Descendant de Catégorie',
+                'verbose_name_plural': 'Liens Ancêtre/Descendant de Catégorie',
+                'indexes': [models.Index(fields=['descendant', 'ancestor'], name='webapp_cc_descendant_idx')],
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+        migrations.RunPython(populate_category_closure, migrations.RunPython.noop),
+    ]
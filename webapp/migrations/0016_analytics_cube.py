@@ -0,0 +1,97 @@
+# Generated by Django 5.2.1 on 2026-10-19 13:18
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def populate_analytics_cube(apps, schema_editor):
+    """Recalcule les cumuls par catégorie avec le type de transaction et calcule les cumuls par tag."""
+    Transaction = apps.get_model('webapp', 'Transaction')
+    MonthlyCategoryTotal = apps.get_model('webapp', 'MonthlyCategoryTotal')
+    MonthlyTagTotal = apps.get_model('webapp', 'MonthlyTagTotal')
+    amount_field = DecimalField(max_digits=15, decimal_places=2)
+    measures = {
+        'total_income': Sum(Case(When(amount__gt=0, then=F('amount')), default=Value(Decimal('0.00')), output_field=amount_field)),
+        'total_expense': Sum(Case(When(amount__lt=0, then=F('amount')), default=Value(Decimal('0.00')), output_field=amount_field)),
+        'total_count': Sum(Value(1)),
+    }
+    periods = Transaction.objects.annotate(year=ExtractYear('date'), month=ExtractMonth('date')).order_by()
+
+    MonthlyCategoryTotal.objects.all().delete()
+    MonthlyCategoryTotal.objects.bulk_create([
+        MonthlyCategoryTotal(
+            user_id=row['user_id'],
+            account_id=row['account_id'],
+            category_id=row['category_id'],
+            transaction_type=row['transaction_type'],
+            year=row['year'],
+            month=row['month'],
+            income=row['total_income'] or Decimal('0.00'),
+            expense=row['total_expense'] or Decimal('0.00'),
+            count=row['total_count'],
+        )
+        for row in periods.values('user_id', 'account_id', 'category_id', 'transaction_type', 'year', 'month').annotate(**measures)
+    ], batch_size=500)
+    MonthlyTagTotal.objects.bulk_create([
+        MonthlyTagTotal(
+            user_id=row['user_id'],
+            tag_id=row['tags'],
+            transaction_type=row['transaction_type'],
+            year=row['year'],
+            month=row['month'],
+            income=row['total_income'] or Decimal('0.00'),
+            expense=row['total_expense'] or Decimal('0.00'),
+            count=row['total_count'],
+        )
+        for row in periods.filter(tags__isnull=False).values('user_id', 'tags', 'transaction_type', 'year', 'month').annotate(**measures)
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webapp', '0015_transaction_date_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='monthlycategorytotal',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='monthlycategorytotal',
+            name='transaction_type',
+            field=models.CharField(choices=[('IN', 'Revenu'), ('OUT', 'Dépense'), ('TRF', 'Transfert')], default='OUT', max_length=3, verbose_name='Type de transaction'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='monthlycategorytotal',
+            unique_together={('user', 'account', 'category', 'transaction_type', 'year', 'month')},
+        ),
+        migrations.CreateModel(
+            name='MonthlyTagTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_type', models.CharField(choices=[('IN', 'Revenu'), ('OUT', 'Dépense'), ('TRF', 'Transfert')], default='OUT', max_length=3, verbose_name='Type de transaction')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Année')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Mois')),
+                ('income', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Revenus')),
+                ('expense', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Dépenses')),
+                ('count', models.IntegerField(default=0, verbose_name='Nombre de transactions')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_totals', to='webapp.tag', verbose_name='Tag')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_tag_totals', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Cumul Mensuel par Tag',
+                'verbose_name_plural': 'Cumuls Mensuels par Tag',
+                'ordering': ['-year', '-month'],
+                'indexes': [models.Index(fields=['user', 'year', 'month'], name='webapp_mtt_user_period_idx')],
+                'unique_together': {('user', 'tag', 'transaction_type', 'year', 'month')},
+            },
+        ),
+        migrations.RunPython(populate_analytics_cube, migrations.RunPython.noop),
+    ]
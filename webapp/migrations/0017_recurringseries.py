@@ -0,0 +1,45 @@
+# Generated by Django 5.2.1 on 2026-10-19 13:21
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webapp', '0016_analytics_cube'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('description_key', models.CharField(max_length=255, verbose_name='Libellé normalisé')),
+                ('label', models.CharField(max_length=255, verbose_name='Libellé')),
+                ('transaction_type', models.CharField(choices=[('IN', 'Revenu'), ('OUT', 'Dépense'), ('TRF', 'Transfert')], default='OUT', max_length=3, verbose_name='Type de transaction')),
+                ('frequency', models.CharField(choices=[('W', 'Hebdomadaire'), ('M', 'Mensuelle'), ('Q', 'Trimestrielle'), ('Y', 'Annuelle')], max_length=1, verbose_name='Fréquence')),
+                ('interval_days', models.FloatField(verbose_name='Intervalle moyen (jours)')),
+                ('average_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10, verbose_name='Montant moyen')),
+                ('occurrence_count', models.IntegerField(default=0, verbose_name="Nombre d'occurrences")),
+                ('first_date', models.DateField(verbose_name='Première occurrence')),
+                ('last_date', models.DateField(verbose_name='Dernière occurrence')),
+                ('next_expected_date', models.DateField(verbose_name='Prochaine occurrence attendue')),
+                ('confidence', models.FloatField(default=0.0, verbose_name='Confiance')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Active')),
+                ('detected_at', models.DateTimeField(auto_now=True, verbose_name='Détectée le')),
+                ('account', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recurring_series', to='webapp.account', verbose_name='Compte')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recurring_series', to='webapp.category', verbose_name='Catégorie')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurring_series', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Série Récurrente',
+                'verbose_name_plural': 'Séries Récurrentes',
+                'ordering': ['label'],
+                'unique_together': {('user', 'description_key', 'transaction_type')},
+            },
+        ),
+    ]
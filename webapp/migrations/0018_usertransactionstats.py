@@ -0,0 +1,58 @@
+# Generated by Django 5.2.1 on 2026-10-19 13:24
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Q, Sum, Case, When, Value, DecimalField
+from django.db.models.functions import ExtractYear
+
+
+def populate_transaction_stats(apps, schema_editor):
+    """Calcule les compteurs initiaux à partir des transactions existantes."""
+    Transaction = apps.get_model('webapp', 'Transaction')
+    UserTransactionStats = apps.get_model('webapp', 'UserTransactionStats')
+    amount_field = DecimalField(max_digits=15, decimal_places=2)
+    rows = Transaction.objects.annotate(year=ExtractYear('date')).order_by().values('user_id', 'year').annotate(
+        total_income=Sum(Case(When(amount__gt=0, then=F('amount')), default=Value(Decimal('0.00')), output_field=amount_field)),
+        total_expense=Sum(Case(When(amount__lt=0, then=F('amount')), default=Value(Decimal('0.00')), output_field=amount_field)),
+        total_count=Count('id'),
+        uncategorized=Count('id', filter=Q(category__isnull=True)),
+    )
+    stats_by_user = {}
+    for row in rows:
+        stats = stats_by_user.setdefault(row['user_id'], UserTransactionStats(user_id=row['user_id'], yearly_totals={}))
+        stats.total_count += row['total_count']
+        stats.uncategorized_count += row['uncategorized']
+        stats.yearly_totals[str(row['year'])] = {
+            'income': str((row['total_income'] or Decimal('0.00')).quantize(Decimal('0.01'))),
+            'expense': str((row['total_expense'] or Decimal('0.00')).quantize(Decimal('0.01'))),
+            'count': row['total_count'],
+        }
+    UserTransactionStats.objects.bulk_create(stats_by_user.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('webapp', '0017_recurringseries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTransactionStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='transaction_stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+                ('total_count', models.IntegerField(default=0, verbose_name='Nombre de transactions')),
+                ('uncategorized_count', models.IntegerField(default=0, verbose_name='Transactions non catégorisées')),
+                ('yearly_totals', models.JSONField(blank=True, default=dict, verbose_name='Totaux par année')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Mis à jour le')),
+            ],
+            options={
+                'verbose_name': 'Statistiques des Transactions',
+                'verbose_name_plural': 'Statistiques des Transactions',
+            },
+        ),
+        migrations.RunPython(populate_transaction_stats, migrations.RunPython.noop),
+    ]
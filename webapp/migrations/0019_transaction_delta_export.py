@@ -0,0 +1,43 @@
+# Generated by Django 5.2.1 on 2026-10-19 13:27
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webapp', '0018_usertransactionstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_id', models.BigIntegerField(verbose_name='ID de la transaction supprimée')),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Supprimée le')),
+            ],
+            options={
+                'verbose_name': 'Transaction Supprimée',
+                'verbose_name_plural': 'Transactions Supprimées',
+                'ordering': ['deleted_at', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='webapp_tx_user_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='transactiontombstone',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transaction_tombstones', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur'),
+        ),
+        migrations.AddIndex(
+            model_name='transactiontombstone',
+            index=models.Index(fields=['user', 'deleted_at', 'id'], name='webapp_tt_user_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.1 on 2026-10-19 13:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_visibility_grants(apps, schema_editor):
+    """Calcule les droits de lecture initiaux à partir des ménages et des profils existants."""
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    HouseholdMember = apps.get_model('webapp', 'HouseholdMember')
+    UserProfile = apps.get_model('webapp', 'UserProfile')
+    TransactionVisibilityGrant = apps.get_model('webapp', 'TransactionVisibilityGrant')
+
+    household_members = {}
+    for household_id, user_id in HouseholdMember.objects.values_list('household_id', 'user_id'):
+        household_members.setdefault(household_id, set()).add(user_id)
+    members_by_user = {}
+    for member_ids in household_members.values():
+        for user_id in member_ids:
+            members_by_user.setdefault(user_id, set()).update(member_ids - {user_id})
+    shared_with_by_user = {}
+    for user_id, shared_user_id in UserProfile.shared_with_users.through.objects.values_list('userprofile__user_id', 'user_id'):
+        shared_with_by_user.setdefault(user_id, set()).add(shared_user_id)
+
+    grants = []
+    for user_id in User.objects.values_list('id', flat=True):
+        scopes = {user_id: 'ALL'}
+        if members_by_user.get(user_id):
+            for owner_id in members_by_user[user_id]:
+                scopes.setdefault(owner_id, 'SHARED')
+            for owner_id in shared_with_by_user.get(user_id, ()):
+                scopes[owner_id] = 'ALL'
+        grants.extend(
+            TransactionVisibilityGrant(viewer_id=user_id, owner_id=owner_id, scope=scope)
+            for owner_id, scope in scopes.items()
+        )
+    TransactionVisibilityGrant.objects.bulk_create(grants, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webapp', '0019_transaction_delta_export'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionVisibilityGrant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('ALL', 'Toutes les transactions'), ('SHARED', 'Comptes partagés uniquement')], default='ALL', max_length=6, verbose_name='Portée')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='granted_visibility', to=settings.AUTH_USER_MODEL, verbose_name='Propriétaire')),
+                ('viewer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visibility_grants', to=settings.AUTH_USER_MODEL, verbose_name='Lecteur')),
+            ],
+            options={
+                'verbose_name': 'Droit de Lecture des Transactions',
+                'verbose_name_plural': 'Droits de Lecture des Transactions',
+                'unique_together': {('viewer', 'owner')},
+            },
+        ),
+        migrations.RunPython(populate_visibility_grants, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:05
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_uncategorized_totals(apps, schema_editor):
+    """Regroupe les cumuls non catégorisés en double (possibles sans cette contrainte) en une seule ligne."""
+    MonthlyCategoryTotal = apps.get_model('webapp', 'MonthlyCategoryTotal')
+    key_fields = ['user_id', 'account_id', 'transaction_type', 'year', 'month']
+    duplicates = MonthlyCategoryTotal.objects.filter(category__isnull=True).order_by().values(*key_fields).annotate(
+        rows=Count('id'), keep_id=Min('id'),
+        total_income=Sum('income'), total_expense=Sum('expense'), total_count=Sum('count'),
+    ).filter(rows__gt=1)
+    for row in duplicates:
+        key = {field: row[field] for field in key_fields}
+        MonthlyCategoryTotal.objects.filter(category__isnull=True, **key).exclude(id=row['keep_id']).delete()
+        MonthlyCategoryTotal.objects.filter(id=row['keep_id']).update(
+            income=row['total_income'], expense=row['total_expense'], count=row['total_count'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webapp', '0020_transaction_visibility_grants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_uncategorized_totals, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='monthlycategorytotal',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('user', 'account', 'transaction_type', 'year', 'month'), name='webapp_mct_uncategorized_uniq'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:32
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_tombstones_to_change_log(apps, schema_editor):
+    """Reprend les traces de suppression existantes comme suppressions du journal, dans leur ordre."""
+    TransactionTombstone = apps.get_model('webapp', 'TransactionTombstone')
+    TransactionChange = apps.get_model('webapp', 'TransactionChange')
+    TransactionChange.objects.bulk_create([
+        TransactionChange(user_id=tombstone.user_id, transaction_id=tombstone.transaction_id, is_deletion=True, changed_at=tombstone.deleted_at)
+        for tombstone in TransactionTombstone.objects.order_by('deleted_at', 'id').iterator()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webapp', '0021_monthlycategorytotal_uncategorized_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_id', models.BigIntegerField(verbose_name='ID de la transaction')),
+                ('is_deletion', models.BooleanField(default=False, verbose_name='Suppression')),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Modifiée le')),
+            ],
+            options={
+                'verbose_name': 'Modification de Transaction',
+                'verbose_name_plural': 'Modifications de Transactions',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='webapp_tx_user_updated_idx',
+        ),
+        migrations.AddField(
+            model_name='transactionchange',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transaction_changes', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur'),
+        ),
+        migrations.RunPython(copy_tombstones_to_change_log, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='transactiontombstone',
+            name='user',
+        ),
+        migrations.DeleteModel(
+            name='TransactionTombstone',
+        ),
+        migrations.AddIndex(
+            model_name='transactionchange',
+            index=models.Index(fields=['user', 'id'], name='webapp_tc_user_seq_idx'),
+        ),
+    ]
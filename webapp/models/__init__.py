@@ -14,6 +14,13 @@ from .allocations import Allocation, AllocationLine # Nouveaux modèles d'alloca
 from .fund_debits import FundDebitRecord, FundDebitLine # Nouveaux modèles de débits de fonds
 from .user_profiles import UserProfile # Modèle pour le profil utilisateur
 from .households import Household, HouseholdMember # Modèle pour les foyers
+from .monthly_category_totals import MonthlyCategoryTotal # Cumuls mensuels par catégorie
+from .category_closures import CategoryClosure # Arbre des catégories (ancêtres/descendants)
+from .monthly_tag_totals import MonthlyTagTotal # Cumuls mensuels par tag
+from .recurring_series import RecurringSeries # Séries de transactions récurrentes détectées
+from .user_transaction_stats import UserTransactionStats # Compteurs des transactions par utilisateur
+from .transaction_changes import TransactionChange # Journal des modifications des transactions (export incrémental)
+from .transaction_visibility_grants import TransactionVisibilityGrant # Droits de lecture dénormalisés entre utilisateurs
 
 #  __all__  pour ce qui est importé avec '*'
 __all__ = [
@@ -33,5 +40,12 @@ __all__ = [
     'UserProfile',  # profil utilisateur
     'Household',  # modèle pour les foyers
     'HouseholdMember',  # modèle pour les membres du foyer
+    'MonthlyCategoryTotal',  # cumul mensuel par catégorie
+    'CategoryClosure',  # liens ancêtre/descendant des catégories
+    'MonthlyTagTotal',  # cumul mensuel par tag
+    'RecurringSeries',  # série récurrente (abonnement, loyer, salaire...)
+    'UserTransactionStats',  # compteurs des transactions par utilisateur
+    'TransactionChange',  # modification ou suppression d'une transaction
+    'TransactionVisibilityGrant',  # droit de lecture d'un utilisateur sur les transactions d'un autre
 ]
 
@@ -55,4 +55,7 @@ class Category(models.Model):
         """Valide les données du modèle avant la sauvegarde."""
         if self.parent and self.parent == self:
             raise ValidationError(_("Une catégorie ne peut pas être sa propre parente."))
+        from webapp.services.category_closure_service import CategoryClosureService
+        if CategoryClosureService.would_create_cycle(self, self.parent_id):
+            raise ValidationError({'parent': _("Une catégorie ne peut pas être rattachée à l'une de ses sous-catégories.")})
 
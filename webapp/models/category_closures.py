@@ -0,0 +1,38 @@
+# webapp/models/category_closures.py
+from django.db import models
+# Importez les modèles depuis le même paquet 'models'
+from .categories import Category
+
+class CategoryClosure(models.Model):
+    """
+    Table de fermeture (closure table) de l'arbre des catégories:
+    une ligne par couple (ancêtre, descendant), y compris la catégorie elle-même (profondeur 0).
+    Elle est maintenue par les signaux de Category (voir webapp/signals.py) et peut être
+    reconstruite avec la commande 'rebuild_category_closure'.
+    Un filtre "catégorie et tous ses descendants" devient une simple jointure indexée:
+    Transaction.objects.filter(category__ancestor_links__ancestor=category)
+    """
+    ancestor = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='descendant_links',
+        verbose_name="Ancêtre"
+    )
+    descendant = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='ancestor_links',
+        verbose_name="Descendant"
+    )
+    depth = models.PositiveSmallIntegerField(verbose_name="Profondeur")
+
+    class Meta:
+        verbose_name = "Lien Ancêtre/Descendant de Catégorie"
+        verbose_name_plural = "Liens Ancêtre/Descendant de Catégorie"
+        unique_together = ('ancestor', 'descendant')
+        indexes = [
+            models.Index(fields=['descendant', 'ancestor'], name='webapp_cc_descendant_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} > {self.descendant_id} ({self.depth})"
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from .user_profiles import UserProfile
 
@@ -30,51 +30,64 @@ class Household(models.Model):
         return self.name
     
     def apply_sharing_settings(self):
-        """Applique les paramètres de partage selon le type de ménage"""
-        members = self.members.all()
-        
-        # Réinitialiser les paramètres
-        for member in members:
-            profile, _ = UserProfile.objects.get_or_create(user=member.user)
-            profile.can_view_all_transactions = False
-            profile.can_edit_all_transactions = False
-            profile.can_view_all_categories = False
-            profile.shared_with_users.clear()
-            profile.save()
-        
-        # Appliquer les paramètres selon le type de ménage
-        if self.household_type == 'SINGLE':
-            # Rien à faire, tout est personnel
-            pass
-            
-        elif self.household_type == 'COUPLE_SHARED' or self.household_type == 'FAMILY_SHARED':
-            # Tout est partagé entre les membres
-            for member in members:
-                profile, _ = UserProfile.objects.get_or_create(user=member.user)
-                other_users = [m.user for m in members if m.user != member.user]
-                profile.shared_with_users.add(*other_users)
-                profile.save()
-                
-        elif self.household_type == 'COUPLE_MIXED' or self.household_type == 'FAMILY_MIXED':
-            # Seuls les comptes marqués comme partagés sont visibles par tous
-            # Cette logique est gérée au niveau des requêtes via le service de permissions
-            for member in members:
-                profile, _ = UserProfile.objects.get_or_create(user=member.user)
-                other_users = [m.user for m in members if m.user != member.user]
-                profile.shared_with_users.add(*other_users)
-                profile.save()
-                
-        elif self.household_type == 'COUPLE_SEPARATE' or self.household_type == 'ROOMMATES':
-            # Chacun voit uniquement ses propres comptes
-            # Mais on peut quand même partager des catégories pour le budget
-            for member in members:
-                profile, _ = UserProfile.objects.get_or_create(user=member.user)
-                profile.can_view_all_categories = True
-                profile.save()
-                
-        elif self.household_type == 'CUSTOM':
-            # Configuration personnalisée, ne rien changer automatiquement
-            pass
+        """
+        Applique les paramètres de partage selon le type de ménage.
+        La configuration cible (indicateurs des profils et utilisateurs avec qui chaque membre partage)
+        est calculée en mémoire puis comparée à l'existant: seules les différences sont écrites,
+        par requêtes groupées et dans une seule transaction.
+        """
+        from webapp.services.permission_service import PermissionService
+
+        member_ids = list(self.members.values_list('user_id', flat=True))
+        # Tout partagé, ou comptes mixtes (seuls les comptes marqués comme partagés sont visibles par tous,
+        # logique gérée au niveau des requêtes via le service de permissions)
+        shares_with_members = self.household_type in ('COUPLE_SHARED', 'FAMILY_SHARED', 'COUPLE_MIXED', 'FAMILY_MIXED')
+        # Chacun voit uniquement ses propres comptes, mais les catégories sont partagées pour le budget
+        can_view_all_categories = self.household_type in ('COUPLE_SEPARATE', 'ROOMMATES')
+        # SINGLE et CUSTOM: paramètres réinitialisés, rien de partagé automatiquement
+
+        with transaction.atomic():
+            profiles = {profile.user_id: profile for profile in UserProfile.objects.filter(user_id__in=member_ids)}
+            missing = [UserProfile(user_id=user_id) for user_id in member_ids if user_id not in profiles]
+            profiles.update((profile.user_id, profile) for profile in UserProfile.objects.bulk_create(missing))
+
+            # Partages explicites: (profil, utilisateur) actuels et attendus
+            SharedWith = UserProfile.shared_with_users.through
+            current = {
+                (profile_id, user_id): row_id
+                for row_id, profile_id, user_id in SharedWith.objects.filter(
+                    userprofile_id__in=[profile.pk for profile in profiles.values()]
+                ).values_list('id', 'userprofile_id', 'user_id')
+            }
+            target = {
+                (profiles[user_id].pk, other_user_id)
+                for user_id in member_ids
+                for other_user_id in member_ids
+                if shares_with_members and other_user_id != user_id
+            }
+            stale_ids = [row_id for pair, row_id in current.items() if pair not in target]
+            if stale_ids:
+                SharedWith.objects.filter(id__in=stale_ids).delete()
+            SharedWith.objects.bulk_create([
+                SharedWith(userprofile_id=profile_id, user_id=user_id) for profile_id, user_id in target - current.keys()
+            ])
+
+            # Indicateurs des profils
+            changed_profiles = []
+            for profile in profiles.values():
+                flags = (profile.can_view_all_transactions, profile.can_edit_all_transactions, profile.can_view_all_categories)
+                if flags != (False, False, can_view_all_categories):
+                    profile.can_view_all_transactions = False
+                    profile.can_edit_all_transactions = False
+                    profile.can_view_all_categories = can_view_all_categories
+                    changed_profiles.append(profile)
+            UserProfile.objects.bulk_update(
+                changed_profiles, ['can_view_all_transactions', 'can_edit_all_transactions', 'can_view_all_categories']
+            )
+
+            # Les écritures groupées ne déclenchent pas de signal: invalider les droits d'accès en cache
+            for user_id in member_ids:
+                PermissionService.invalidate_on_commit(user_id)
 
 class HouseholdMember(models.Model):
     """Membre d'un ménage avec son rôle"""
@@ -0,0 +1,72 @@
+# webapp/models/monthly_category_totals.py
+from django.db import models
+from django.contrib.auth.models import User
+from decimal import Decimal
+# Importez les modèles depuis le même paquet 'models'
+from .categories import Category
+from .accounts import Account
+from .transactions import Transaction
+
+class MonthlyCategoryTotal(models.Model):
+    """
+    Table de cumul mensuel des transactions par utilisateur, compte, catégorie et type de transaction.
+    Elle est maintenue de manière incrémentale par les signaux de Transaction
+    (voir webapp/signals.py) et peut être reconstruite avec la commande
+    'rebuild_monthly_totals'. Les vues de synthèse lisent ces quelques lignes
+    au lieu d'agréger toutes les transactions à chaque affichage.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='monthly_category_totals', verbose_name="Utilisateur")
+    account = models.ForeignKey(
+        Account,
+        on_delete=models.CASCADE,
+        related_name='monthly_category_totals',
+        verbose_name="Compte"
+    )
+    # Nullable: les transactions non catégorisées ont aussi leur cumul
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='monthly_totals',
+        verbose_name="Catégorie"
+    )
+    transaction_type = models.CharField(
+        max_length=3,
+        choices=Transaction.TRANSACTION_TYPES,
+        default='OUT',
+        verbose_name="Type de transaction"
+    )
+    year = models.PositiveSmallIntegerField(verbose_name="Année")
+    month = models.PositiveSmallIntegerField(verbose_name="Mois")
+    # Somme des montants positifs
+    income = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'), verbose_name="Revenus")
+    # Somme des montants négatifs (valeur négative, comme dans Transaction.amount)
+    expense = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'), verbose_name="Dépenses")
+    count = models.IntegerField(default=0, verbose_name="Nombre de transactions")
+
+    class Meta:
+        verbose_name = "Cumul Mensuel par Catégorie"
+        verbose_name_plural = "Cumuls Mensuels par Catégorie"
+        ordering = ['-year', '-month']
+        unique_together = ('user', 'account', 'category', 'transaction_type', 'year', 'month')
+        constraints = [
+            # Une contrainte unique ne compare pas les NULL: les cumuls non catégorisés ont la leur
+            models.UniqueConstraint(
+                fields=['user', 'account', 'transaction_type', 'year', 'month'],
+                condition=models.Q(category__isnull=True),
+                name='webapp_mct_uncategorized_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'year', 'month'], name='webapp_mct_user_period_idx'),
+        ]
+
+    def __str__(self):
+        category_name = self.category.name if self.category else 'Non catégorisé'
+        return f"{self.year}-{self.month:02d} {category_name}: +{self.income} / {self.expense} ({self.count})"
+
+    @property
+    def net(self):
+        """Solde net du mois (revenus + dépenses négatives)."""
+        return self.income + self.expense
@@ -0,0 +1,53 @@
+# webapp/models/monthly_tag_totals.py
+from django.db import models
+from django.contrib.auth.models import User
+from decimal import Decimal
+# Importez les modèles depuis le même paquet 'models'
+from .tags import Tag
+from .transactions import Transaction
+
+class MonthlyTagTotal(models.Model):
+    """
+    Table de cumul mensuel des transactions par utilisateur, tag et type de transaction.
+    Pendant de MonthlyCategoryTotal pour l'axe des tags: une transaction portant
+    plusieurs tags est comptée dans le cumul de chacun d'eux.
+    Maintenue par les signaux de Transaction et de Transaction.tags (voir webapp/signals.py)
+    et reconstruite avec la commande 'rebuild_monthly_totals'.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='monthly_tag_totals', verbose_name="Utilisateur")
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='monthly_totals',
+        verbose_name="Tag"
+    )
+    transaction_type = models.CharField(
+        max_length=3,
+        choices=Transaction.TRANSACTION_TYPES,
+        default='OUT',
+        verbose_name="Type de transaction"
+    )
+    year = models.PositiveSmallIntegerField(verbose_name="Année")
+    month = models.PositiveSmallIntegerField(verbose_name="Mois")
+    # Somme des montants positifs
+    income = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'), verbose_name="Revenus")
+    # Somme des montants négatifs (valeur négative, comme dans Transaction.amount)
+    expense = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'), verbose_name="Dépenses")
+    count = models.IntegerField(default=0, verbose_name="Nombre de transactions")
+
+    class Meta:
+        verbose_name = "Cumul Mensuel par Tag"
+        verbose_name_plural = "Cumuls Mensuels par Tag"
+        ordering = ['-year', '-month']
+        unique_together = ('user', 'tag', 'transaction_type', 'year', 'month')
+        indexes = [
+            models.Index(fields=['user', 'year', 'month'], name='webapp_mtt_user_period_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.year}-{self.month:02d} {self.tag.name}: +{self.income} / {self.expense} ({self.count})"
+
+    @property
+    def net(self):
+        """Solde net du mois (revenus + dépenses négatives)."""
+        return self.income + self.expense
@@ -0,0 +1,71 @@
+# webapp/models/recurring_series.py
+from django.db import models
+from django.contrib.auth.models import User
+from decimal import Decimal
+# Importez les modèles depuis le même paquet 'models'
+from .categories import Category
+from .accounts import Account
+from .transactions import Transaction
+
+class RecurringSeries(models.Model):
+    """
+    Série de transactions récurrentes détectée automatiquement
+    (abonnements, loyer, salaire...): même libellé, montant stable et cadence régulière.
+    Les séries sont recalculées par RecurringDetectionService à la première lecture qui suit
+    une importation, ou avec la commande 'detect_recurring_series'.
+    """
+    FREQUENCY_CHOICES = [
+        ('W', 'Hebdomadaire'),
+        ('M', 'Mensuelle'),
+        ('Q', 'Trimestrielle'),
+        ('Y', 'Annuelle'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recurring_series', verbose_name="Utilisateur")
+    # Libellé normalisé servant à regrouper les transactions (chiffres et ponctuation retirés)
+    description_key = models.CharField(max_length=255, verbose_name="Libellé normalisé")
+    label = models.CharField(max_length=255, verbose_name="Libellé")
+    transaction_type = models.CharField(
+        max_length=3,
+        choices=Transaction.TRANSACTION_TYPES,
+        default='OUT',
+        verbose_name="Type de transaction"
+    )
+    # Compte et catégorie de la dernière occurrence
+    account = models.ForeignKey(
+        Account,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='recurring_series',
+        verbose_name="Compte"
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='recurring_series',
+        verbose_name="Catégorie"
+    )
+    frequency = models.CharField(max_length=1, choices=FREQUENCY_CHOICES, verbose_name="Fréquence")
+    interval_days = models.FloatField(verbose_name="Intervalle moyen (jours)")
+    average_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'), verbose_name="Montant moyen")
+    occurrence_count = models.IntegerField(default=0, verbose_name="Nombre d'occurrences")
+    first_date = models.DateField(verbose_name="Première occurrence")
+    last_date = models.DateField(verbose_name="Dernière occurrence")
+    next_expected_date = models.DateField(verbose_name="Prochaine occurrence attendue")
+    # Entre 0 et 1: régularité de la cadence et stabilité du montant
+    confidence = models.FloatField(default=0.0, verbose_name="Confiance")
+    # Une série qui n'est plus détectée reste en base mais devient inactive
+    is_active = models.BooleanField(default=True, verbose_name="Active")
+    detected_at = models.DateTimeField(auto_now=True, verbose_name="Détectée le")
+
+    class Meta:
+        verbose_name = "Série Récurrente"
+        verbose_name_plural = "Séries Récurrentes"
+        ordering = ['label']
+        unique_together = ('user', 'description_key', 'transaction_type')
+
+    def __str__(self):
+        return f"{self.label} ({self.get_frequency_display()}, {self.average_amount})"
@@ -0,0 +1,32 @@
+# webapp/models/transaction_changes.py
+from django.db import models
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+class TransactionChange(models.Model):
+    """
+    Journal des modifications des transactions, pour l'export incrémental (DeltaExportService):
+    une ligne par transaction créée, modifiée (y compris son compte ou sa catégorie) ou supprimée.
+    Écrite dans la même transaction que la modification (voir webapp/signals.py).
+
+    L'identifiant sert de numéro de séquence: AUTOINCREMENT ne réutilise jamais un identifiant,
+    et SQLite n'admettant qu'un rédacteur à la fois, les identifiants sont attribués dans
+    l'ordre de validation des transactions.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transaction_changes', verbose_name="Utilisateur")
+    # Pas de clé étrangère: la transaction peut avoir été supprimée
+    transaction_id = models.BigIntegerField(verbose_name="ID de la transaction")
+    is_deletion = models.BooleanField(default=False, verbose_name="Suppression")
+    changed_at = models.DateTimeField(default=timezone.now, verbose_name="Modifiée le")
+
+    class Meta:
+        verbose_name = "Modification de Transaction"
+        verbose_name_plural = "Modifications de Transactions"
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['user', 'id'], name='webapp_tc_user_seq_idx'),
+        ]
+
+    def __str__(self):
+        operation = "supprimée" if self.is_deletion else "modifiée"
+        return f"Transaction {self.transaction_id} {operation} le {self.changed_at}"
@@ -0,0 +1,29 @@
+# webapp/models/transaction_visibility_grants.py
+from django.db import models
+from django.contrib.auth.models import User
+
+class TransactionVisibilityGrant(models.Model):
+    """
+    Droit de lecture d'un utilisateur (viewer) sur les transactions d'un autre (owner), dénormalisé:
+    une ligne par couple, y compris l'utilisateur lui-même. Calculée à partir des ménages et des
+    paramètres de partage (AccessScope) et maintenue par les signaux qui les modifient (voir webapp/signals.py);
+    reconstruite avec la commande 'rebuild_visibility_grants'.
+    Les transactions accessibles se lisent ainsi par une simple jointure indexée au lieu d'un OR
+    sur plusieurs critères de partage.
+    """
+    SCOPE_CHOICES = [
+        ('ALL', 'Toutes les transactions'),
+        ('SHARED', 'Comptes partagés uniquement'),
+    ]
+
+    viewer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='visibility_grants', verbose_name="Lecteur")
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='granted_visibility', verbose_name="Propriétaire")
+    scope = models.CharField(max_length=6, choices=SCOPE_CHOICES, default='ALL', verbose_name="Portée")
+
+    class Meta:
+        verbose_name = "Droit de Lecture des Transactions"
+        verbose_name_plural = "Droits de Lecture des Transactions"
+        unique_together = ('viewer', 'owner')
+
+    def __str__(self):
+        return f"{self.viewer_id} -> {self.owner_id} ({self.get_scope_display()})"
@@ -50,6 +50,11 @@ class Transaction(models.Model):
         verbose_name = "Transaction"
         verbose_name_plural = "Transactions"
         ordering = ['-date', '-created_at']
+        # Filtres par période en plages semi-ouvertes (date__gte / date__lt), voir PeriodService
+        indexes = [
+            models.Index(fields=['user', 'date'], name='webapp_tx_user_date_idx'),
+            models.Index(fields=['user', 'category', 'date'], name='webapp_tx_user_cat_date_idx'),
+        ]
 
     def __str__(self):
         """Retourne une représentation en chaîne de caractères de l'objet."""
@@ -0,0 +1,46 @@
+# webapp/models/user_transaction_stats.py
+from django.db import models
+from django.contrib.auth.models import User
+from decimal import Decimal
+
+class UserTransactionStats(models.Model):
+    """
+    Compteurs des transactions d'un utilisateur (une ligne par utilisateur):
+    nombre total, nombre de transactions non catégorisées et totaux par année.
+    Maintenue par les signaux de Transaction (voir webapp/signals.py) et reconstruite
+    avec la commande 'rebuild_transaction_stats'. L'en-tête du tableau de bord
+    se résume ainsi à la lecture d'une ligne par clé primaire.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='transaction_stats',
+        verbose_name="Utilisateur"
+    )
+    total_count = models.IntegerField(default=0, verbose_name="Nombre de transactions")
+    uncategorized_count = models.IntegerField(default=0, verbose_name="Transactions non catégorisées")
+    # Totaux par année: {"2025": {"income": "1200.00", "expense": "-850.50", "count": 42}}
+    yearly_totals = models.JSONField(default=dict, blank=True, verbose_name="Totaux par année")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Mis à jour le")
+
+    class Meta:
+        verbose_name = "Statistiques des Transactions"
+        verbose_name_plural = "Statistiques des Transactions"
+
+    def __str__(self):
+        return f"{self.user.username}: {self.total_count} transaction(s), {self.uncategorized_count} non catégorisée(s)"
+
+    def get_year_totals(self, year=None):
+        """
+        Retourne {'income', 'expense', 'count'} pour une année, ou toutes années confondues si year est None.
+        """
+        if year is not None:
+            entries = [self.yearly_totals[str(year)]] if str(year) in self.yearly_totals else []
+        else:
+            entries = list(self.yearly_totals.values())
+        return {
+            'income': sum((Decimal(entry['income']) for entry in entries), Decimal('0.00')),
+            'expense': sum((Decimal(entry['expense']) for entry in entries), Decimal('0.00')),
+            'count': sum(entry['count'] for entry in entries),
+        }
@@ -2,10 +2,40 @@ from .transaction_service import TransactionService
 from .transaction_import_service import TransactionImportService
 from .household_service import HouseholdService
 from .permission_service import PermissionService
+from .monthly_total_service import MonthlyTotalService
+from .user_cache_service import UserCacheService
+from .budget_overview_service import BudgetOverviewService
+from .transaction_page_service import TransactionPageService
+from .category_tree_service import CategoryTreeService
+from .period_service import PeriodService
+from .budget_evaluation_service import BudgetEvaluationService
+from .category_closure_service import CategoryClosureService
+from .analytics_service import AnalyticsService
+from .recurring_detection_service import RecurringDetectionService
+from .cash_flow_forecast_service import CashFlowForecastService
+from .transaction_stats_service import TransactionStatsService
+from .delta_export_service import DeltaExportService
+from .backup_service import BackupService
+from .write_coordinator_service import WriteCoordinatorService
 
 __all__ = [
     'TransactionService',
     'TransactionImportService',
     'HouseholdService',
-    'PermissionService'
+    'PermissionService',
+    'MonthlyTotalService',
+    'UserCacheService',
+    'BudgetOverviewService',
+    'TransactionPageService',
+    'CategoryTreeService',
+    'PeriodService',
+    'BudgetEvaluationService',
+    'CategoryClosureService',
+    'AnalyticsService',
+    'RecurringDetectionService',
+    'CashFlowForecastService',
+    'TransactionStatsService',
+    'DeltaExportService',
+    'BackupService',
+    'WriteCoordinatorService',
 ]
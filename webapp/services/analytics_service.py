@@ -0,0 +1,182 @@
+from decimal import Decimal
+
+from django.db.models import Q, Sum
+from webapp.models import Account, Category, MonthlyCategoryTotal, MonthlyTagTotal, Tag
+from webapp.services.period_service import PeriodService
+from webapp.services.user_cache_service import UserCacheService
+
+ZERO = Decimal('0.00')
+
+class AnalyticsService:
+    """
+    Cube d'analyse des transactions: cumuls mensuels par catégorie, compte, type
+    de transaction (MonthlyCategoryTotal) et par tag (MonthlyTagTotal).
+
+    Les deux tables sont maintenues de manière incrémentale par les signaux:
+    une requête de graphique ne lit que quelques lignes par mois et par axe,
+    quelle que soit la profondeur de l'historique.
+    """
+    # Axes du cube: nom public -> champ des tables de cumul
+    DIMENSIONS = {
+        'year': 'year',
+        'month': 'month',
+        'category': 'category_id',
+        'account': 'account_id',
+        'type': 'transaction_type',
+        'tag': 'tag_id',
+    }
+    CATEGORY_DIMENSIONS = ('year', 'month', 'category', 'account', 'type')
+    TAG_DIMENSIONS = ('year', 'month', 'tag', 'type')
+    # Comparaisons: décalage en mois de la période de référence et axes temporels requis
+    COMPARISONS = {
+        'mom': (1, ('year', 'month')),
+        'yoy': (12, ('year',)),
+    }
+
+    @staticmethod
+    def _period_filter(period):
+        """Filtre (year, month) des tables de cumul pour une période alignée sur des mois."""
+        start, end = period
+        return (
+            Q(year__gt=start.year) | Q(year=start.year, month__gte=start.month),
+            Q(year__lt=end.year) | Q(year=end.year, month__lt=end.month),
+        )
+
+    @staticmethod
+    def query(user, group_by, period=None, filters=None):
+        """
+        Découpe le cube selon les axes 'group_by' (voir DIMENSIONS), sur une période alignée
+        sur des mois (toute la période si None) et avec des filtres optionnels
+        {'category', 'account', 'type', 'tag'}. Le filtre de catégorie inclut toutes ses sous-catégories.
+        Retourne une liste de lignes {axe: valeur, ..., 'income', 'expense', 'net', 'count'}.
+        Lève ValueError si les axes ou les filtres ne peuvent pas être combinés.
+        """
+        filters = filters or {}
+        axes = set(group_by) | set(filters)
+        unknown = axes - set(AnalyticsService.DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Axe inconnu: {', '.join(sorted(unknown))}")
+
+        if 'tag' in axes:
+            if not axes <= set(AnalyticsService.TAG_DIMENSIONS):
+                raise ValueError("L'axe 'tag' ne peut être combiné qu'avec l'année, le mois et le type.")
+            totals = MonthlyTagTotal.objects.filter(user=user)
+        else:
+            totals = MonthlyCategoryTotal.objects.filter(user=user)
+
+        if period is not None:
+            if not PeriodService.is_month_aligned(period):
+                raise ValueError("La période doit commencer et se terminer sur un début de mois.")
+            totals = totals.filter(*AnalyticsService._period_filter(period))
+        if 'category' in filters:
+            totals = totals.filter(category__ancestor_links__ancestor_id=filters['category'])
+        if 'account' in filters:
+            totals = totals.filter(account_id=filters['account'])
+        if 'type' in filters:
+            totals = totals.filter(transaction_type=filters['type'])
+        if 'tag' in filters:
+            totals = totals.filter(tag_id=filters['tag'])
+
+        fields = [AnalyticsService.DIMENSIONS[axis] for axis in group_by]
+        rows = totals.order_by().values(*fields).annotate(
+            total_income=Sum('income'),
+            total_expense=Sum('expense'),
+            total_count=Sum('count'),
+        ).order_by(*fields)
+
+        result = []
+        for row in rows:
+            income = row['total_income'] or ZERO
+            expense = row['total_expense'] or ZERO
+            line = {axis: row[AnalyticsService.DIMENSIONS[axis]] for axis in group_by}
+            line.update({
+                'income': float(income),
+                'expense': float(expense),
+                'net': float(income + expense),
+                'count': row['total_count'] or 0,
+            })
+            result.append(line)
+        return result
+
+    @staticmethod
+    def compare(rows, group_by, comparison, period=None):
+        """
+        Ajoute à chaque ligne le solde net de la période de référence ('previous_net') et l'écart
+        ('change_net'): mois précédent pour 'mom', même mois (ou année) de l'année précédente pour 'yoy'.
+        Les lignes doivent couvrir la période de référence: seules celles de 'period' sont retournées.
+        """
+        months_back, required_axes = AnalyticsService.COMPARISONS[comparison]
+        if not set(required_axes) <= set(group_by):
+            raise ValueError(f"La comparaison '{comparison}' requiert les axes: {', '.join(required_axes)}.")
+        has_month = 'month' in group_by
+        other_axes = [axis for axis in group_by if axis not in ('year', 'month')]
+
+        def row_key(row, year, month):
+            return (year, month if has_month else None, tuple(row[axis] for axis in other_axes))
+
+        net_by_key = {row_key(row, row['year'], row.get('month')): row['net'] for row in rows}
+        result = []
+        for row in rows:
+            month_start = PeriodService.add_months(
+                PeriodService.month(row['year'], row['month'] if has_month else 1)[0], -months_back
+            )
+            if period is not None and (row['year'], row.get('month', 1)) < (period[0].year, period[0].month):
+                continue
+            previous_net = net_by_key.get(row_key(row, month_start.year, month_start.month), 0.0)
+            result.append({
+                **row,
+                'previous_net': previous_net,
+                'change_net': row['net'] - previous_net,
+            })
+        return result
+
+    @staticmethod
+    def get_labels(user, group_by):
+        """Retourne les libellés des axes catégorie, compte et tag présents dans group_by."""
+        labels = {}
+        if 'category' in group_by:
+            labels['category'] = dict(Category.objects.filter(user=user).values_list('id', 'name'))
+        if 'account' in group_by:
+            labels['account'] = dict(Account.objects.filter(user=user).values_list('id', 'name'))
+        if 'tag' in group_by:
+            labels['tag'] = dict(Tag.objects.filter(user=user).values_list('id', 'name'))
+        return labels
+
+    @staticmethod
+    def slice(user, group_by, period=None, filters=None, comparison=None):
+        """
+        Point d'entrée du cube: lignes agrégées, comparaison éventuelle et libellés.
+        Pour une comparaison, la période lue est étendue vers le passé pour couvrir la référence.
+        """
+        query_period = period
+        if comparison is not None:
+            if comparison not in AnalyticsService.COMPARISONS:
+                raise ValueError(f"Comparaison inconnue: {comparison}")
+            if period is not None:
+                months_back = AnalyticsService.COMPARISONS[comparison][0]
+                query_period = (PeriodService.add_months(period[0], -months_back), period[1])
+
+        rows = AnalyticsService.query(user, group_by, period=query_period, filters=filters)
+        if comparison is not None:
+            rows = AnalyticsService.compare(rows, group_by, comparison, period=period)
+        return {
+            'group_by': list(group_by),
+            'rows': rows,
+            'labels': AnalyticsService.get_labels(user, group_by),
+        }
+
+    @staticmethod
+    def slice_cached(user, group_by, period=None, filters=None, comparison=None):
+        """Comme slice(), servi depuis le cache tant que les données de l'utilisateur n'ont pas changé."""
+        filters = filters or {}
+        name = 'analytics:{}:{}:{}:{}'.format(
+            ','.join(group_by),
+            f'{period[0].isoformat()}-{period[1].isoformat()}' if period else 'all',
+            ','.join(f'{key}={filters[key]}' for key in sorted(filters)),
+            comparison or '',
+        )
+        return UserCacheService.get_or_set(
+            user,
+            name,
+            lambda: AnalyticsService.slice(user, group_by, period=period, filters=filters, comparison=comparison),
+        )
@@ -0,0 +1,293 @@
+import json
+import logging
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db import transaction as db_transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from webapp.models import (
+    Account, Category, Tag, Transaction, Fund, Allocation, AllocationLine,
+    FundDebitRecord, FundDebitLine, Budget, SavingGoal, CategorizationRule,
+)
+from webapp.services.category_closure_service import CategoryClosureService
+from webapp.services.category_tree_service import CategoryTreeService
+from webapp.services.delta_export_service import DeltaExportService
+from webapp.services.monthly_total_service import MonthlyTotalService
+from webapp.services.recurring_detection_service import RecurringDetectionService
+from webapp.services.transaction_stats_service import TransactionStatsService
+from webapp.services.user_cache_service import UserCacheService
+
+logger = logging.getLogger(__name__)
+
+# Champs dont la valeur JSON (texte) doit être convertie à la restauration (montants, dates)
+CONVERTED_FIELDS = (models.DecimalField, models.DateField, models.TimeField, models.DurationField, models.UUIDField)
+
+class InvalidBackupError(ValueError):
+    """Archive de sauvegarde illisible, d'un autre format ou d'une version plus récente."""
+
+class BackupService:
+    """
+    Sauvegarde et restauration complètes des données d'un utilisateur.
+
+    L'archive est un fichier JSON Lines: une ligne d'en-tête (format, version), puis une ligne
+    par enregistrement {"model", "id", "fields"}, section par section dans l'ordre de SECTIONS.
+    Chaque section ne référence que des sections précédentes (ou elle-même pour les catégories,
+    écrites parents d'abord): la restauration peut donc insérer les lignes par lots au fil de la lecture,
+    en convertissant les anciens identifiants en nouveaux.
+
+    Les lignes sont créées par lots avec bulk_create (sans déclencher de signal, identifiants attribués
+    par la base): les montants sont restaurés tels qu'enregistrés (déjà normalisés) et les données dérivées
+    (arbre des catégories, cumuls mensuels, compteurs) sont reconstruits une seule fois à la fin;
+    les séries récurrentes sont recalculées à leur prochaine lecture. Les transactions créées ou supprimées
+    sont inscrites en bloc au journal de l'export incrémental (TransactionChange).
+    Les dates techniques (created_at, updated_at...) ne sont pas sauvegardées: elles prennent
+    la date de la restauration.
+    """
+    ARCHIVE_FORMAT = 'budgetosaurus-backup'
+    ARCHIVE_VERSION = 1
+    BATCH_SIZE = 2000
+
+    # Sections dans l'ordre d'écriture et de restauration
+    SECTIONS = [
+        ('account', Account),
+        ('category', Category),
+        ('tag', Tag),
+        ('transaction', Transaction),
+        ('transaction_tag', Transaction.tags.through),
+        ('fund', Fund),
+        ('allocation', Allocation),
+        ('allocation_line', AllocationLine),
+        ('fund_debit_record', FundDebitRecord),
+        ('fund_debit_line', FundDebitLine),
+        ('budget', Budget),
+        ('saving_goal', SavingGoal),
+        ('categorization_rule', CategorizationRule),
+        ('categorization_rule_tag', CategorizationRule.suggested_tags.through),
+    ]
+
+    @staticmethod
+    def get_fields(model):
+        """Champs sauvegardés d'un modèle: tous sauf la clé primaire, l'utilisateur et les dates automatiques."""
+        return [
+            field for field in model._meta.concrete_fields
+            if not field.primary_key
+            and field.name != 'user'
+            and not getattr(field, 'auto_now', False)
+            and not getattr(field, 'auto_now_add', False)
+        ]
+
+    @staticmethod
+    def get_queryset(name, model, user):
+        """Lignes de la section appartenant à l'utilisateur, dans l'ordre d'écriture."""
+        if name == 'transaction_tag':
+            return model.objects.filter(transaction__user=user).order_by('id')
+        if name == 'categorization_rule_tag':
+            return model.objects.filter(categorizationrule__user=user).order_by('id')
+        if name == 'category':
+            # Parents avant enfants: le nombre d'ancêtres (table de fermeture) donne le niveau
+            return model.objects.filter(user=user).annotate(level=Count('ancestor_links')).order_by('level', 'id')
+        return model.objects.filter(user=user).order_by('id')
+
+    @staticmethod
+    def write_archive(user, stream):
+        """
+        Écrit l'archive des données de l'utilisateur dans 'stream' (fichier texte ouvert en écriture),
+        au fil de la lecture. Retourne le nombre d'enregistrements écrits par section.
+        """
+        def write(record):
+            stream.write(json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+
+        write({
+            'format': BackupService.ARCHIVE_FORMAT,
+            'version': BackupService.ARCHIVE_VERSION,
+            'created_at': timezone.now(),
+            'username': user.username,
+        })
+        counts = {}
+        for name, model in BackupService.SECTIONS:
+            attnames = [field.attname for field in BackupService.get_fields(model)]
+            rows = BackupService.get_queryset(name, model, user).values_list('id', *attnames).iterator(
+                chunk_size=BackupService.BATCH_SIZE
+            )
+            counts[name] = 0
+            for row in rows:
+                write({'model': name, 'id': row[0], 'fields': dict(zip(attnames, row[1:]))})
+                counts[name] += 1
+        return counts
+
+    @staticmethod
+    def read_header(line):
+        """Vérifie la ligne d'en-tête de l'archive et la retourne."""
+        try:
+            header = json.loads(line)
+        except ValueError as e:
+            raise InvalidBackupError("En-tête de l'archive illisible.") from e
+        if not isinstance(header, dict) or header.get('format') != BackupService.ARCHIVE_FORMAT:
+            raise InvalidBackupError("Ce fichier n'est pas une archive de sauvegarde.")
+        if not isinstance(header.get('version'), int) or header['version'] > BackupService.ARCHIVE_VERSION:
+            raise InvalidBackupError(f"Version d'archive non prise en charge: {header.get('version')}.")
+        return header
+
+    @staticmethod
+    def clear(user):
+        """
+        Supprime les données de l'utilisateur couvertes par l'archive et tout ce qui en dépend
+        (suppression Django, avec ses cascades). Les mises à jour incrémentales faites par les signaux
+        sont suspendues: les données dérivées sont reconstruites ensuite par restore_archive().
+        Les transactions supprimées, et celles d'autres utilisateurs détachées d'une catégorie supprimée,
+        sont inscrites en bloc au journal de l'export incrémental.
+        Doit être appelé dans une transaction. Retourne les autres utilisateurs dont des transactions
+        ont été modifiées ou supprimées (catégorie ou compte partagé de l'utilisateur).
+        """
+        # Import local: webapp.signals importe les services
+        from webapp.signals import derived_data_updates_suspended
+
+        deleted = Transaction.objects.filter(Q(user=user) | Q(account__user=user))
+        detached = Transaction.objects.filter(category__user=user).exclude(user=user).exclude(account__user=user)
+        other_user_ids = (
+            set(deleted.exclude(user=user).values_list('user_id', flat=True))
+            | set(detached.values_list('user_id', flat=True))
+        )
+        DeltaExportService.record_changes(deleted.order_by().values_list('user_id', 'id').iterator(), is_deletion=True)
+        DeltaExportService.record_queryset(detached)
+
+        with derived_data_updates_suspended():
+            for model in (Account, CategorizationRule, SavingGoal, Tag, Category):
+                model.objects.filter(user=user).delete()
+        return list(User.objects.filter(pk__in=other_user_ids))
+
+    @staticmethod
+    def insert_rows(model, rows, user):
+        """
+        Crée les lignes (dictionnaires attname -> valeur) avec bulk_create, par lots de BATCH_SIZE,
+        en les rattachant à l'utilisateur si le modèle a ce champ. Les identifiants sont attribués par la base.
+        Retourne les identifiants créés, dans l'ordre des lignes.
+        """
+        owner = {'user': user} if any(field.name == 'user' for field in model._meta.concrete_fields) else {}
+        objects = model.objects.bulk_create(
+            [model(**row, **owner) for row in rows],
+            batch_size=BackupService.BATCH_SIZE,
+        )
+        return [obj.pk for obj in objects]
+
+    @staticmethod
+    def has_data(user):
+        """Indique si l'utilisateur a déjà des comptes, catégories ou tags."""
+        return (
+            Account.objects.filter(user=user).exists()
+            or Category.objects.filter(user=user).exists()
+            or Tag.objects.filter(user=user).exists()
+        )
+
+    @staticmethod
+    def restore_archive(user, stream, replace=False):
+        """
+        Restaure une archive (fichier texte ouvert en lecture) dans le compte de l'utilisateur.
+        Si 'replace' est faux, l'utilisateur ne doit avoir aucune donnée; sinon ses données existantes
+        sont supprimées d'abord. Tout est fait dans une seule transaction de base de données.
+        Retourne le nombre d'enregistrements restaurés par section.
+        Lève InvalidBackupError si l'archive est invalide.
+        """
+        BackupService.read_header(stream.readline())
+        models_by_name = dict(BackupService.SECTIONS)
+        # Plan préparé une fois par modèle: (attname, modèle référencé, conversion)
+        # Seuls les types que JSON ne représente pas directement (montants, dates) sont convertis
+        plans = {}
+        for _, model in BackupService.SECTIONS:
+            plans[model] = [
+                (
+                    field.attname,
+                    field.related_model if field.is_relation else None,
+                    field.to_python if isinstance(field, CONVERTED_FIELDS) else None,
+                )
+                for field in BackupService.get_fields(model)
+            ]
+        self_references = {
+            model: [attname for attname, related_model, _ in plan if related_model is model] for model, plan in plans.items()
+        }
+        # Anciens identifiants -> nouveaux, par modèle
+        new_ids = {model: {} for _, model in BackupService.SECTIONS}
+        counts = {name: 0 for name, _ in BackupService.SECTIONS}
+        pending = {'name': None, 'old_ids': [], 'rows': []}
+
+        def flush():
+            if not pending['rows']:
+                return
+            model = models_by_name[pending['name']]
+            created_ids = BackupService.insert_rows(model, pending['rows'], user)
+            new_ids[model].update(zip(pending['old_ids'], created_ids))
+            if model is Transaction:
+                DeltaExportService.record_changes((user.pk, transaction_id) for transaction_id in created_ids)
+            counts[pending['name']] += len(created_ids)
+            pending['old_ids'], pending['rows'] = [], []
+
+        def build(model, record):
+            fields = record['fields']
+            row = {}
+            for attname, related_model, convert in plans[model]:
+                value = fields.get(attname)
+                if value is not None:
+                    if related_model is not None:
+                        try:
+                            value = new_ids[related_model][value]
+                        except KeyError:
+                            raise InvalidBackupError(
+                                f"Référence inconnue dans l'archive: {related_model.__name__} {value}."
+                            ) from None
+                    elif convert is not None:
+                        try:
+                            value = convert(value)
+                        except ValidationError as e:
+                            raise InvalidBackupError(f"Valeur invalide dans l'archive: {model.__name__}.{attname}.") from e
+                row[attname] = value
+            return row
+
+        with db_transaction.atomic():
+            other_users = []
+            if BackupService.has_data(user):
+                if not replace:
+                    raise ValueError(f"L'utilisateur '{user.username}' a déjà des données.")
+                other_users = BackupService.clear(user)
+
+            for line_number, line in enumerate(stream, start=2):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    model = models_by_name[record['model']]
+                    old_id = record['id']
+                except (ValueError, TypeError, KeyError) as e:
+                    raise InvalidBackupError(f"Ligne {line_number} de l'archive illisible.") from e
+
+                if record['model'] != pending['name'] or len(pending['rows']) >= BackupService.BATCH_SIZE:
+                    flush()
+                    pending['name'] = record['model']
+                # Référence à une ligne du même lot (catégorie parente): créer le lot d'abord
+                elif any(
+                    record['fields'].get(attname) is not None and record['fields'][attname] not in new_ids[model]
+                    for attname in self_references[model]
+                ):
+                    flush()
+                pending['old_ids'].append(old_id)
+                pending['rows'].append(build(model, record))
+            flush()
+
+            # Données dérivées, ignorées par bulk_create
+            CategoryClosureService.rebuild(user=user)
+            MonthlyTotalService.rebuild(user=user)
+            TransactionStatsService.rebuild(user=user)
+            UserCacheService.bump_version_on_commit(user.pk)
+            CategoryTreeService.invalidate_on_commit(user.pk)
+            # Transactions d'autres utilisateurs sur les catégories ou comptes partagés supprimés
+            for other_user in other_users:
+                MonthlyTotalService.rebuild(user=other_user)
+                TransactionStatsService.rebuild(user=other_user)
+                UserCacheService.bump_version_on_commit(other_user.pk)
+
+        # Séries récurrentes recalculées à leur prochaine lecture
+        RecurringDetectionService.mark_stale(user.pk)
+        logger.info(f"Sauvegarde restaurée pour {user.username}: {sum(counts.values())} enregistrements.")
+        return counts
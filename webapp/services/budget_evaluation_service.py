@@ -0,0 +1,205 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import Q, Sum, Case, When, Value, DecimalField
+from webapp.models import Budget, Category, Transaction, MonthlyCategoryTotal
+from webapp.services.period_service import PeriodService
+from webapp.services.user_cache_service import UserCacheService
+
+ZERO = Decimal('0.00')
+CENT = Decimal('0.01')
+
+class BudgetEvaluationService:
+    """
+    Moteur d'évaluation des budgets sur une période quelconque (mois, trimestre, année, plage personnalisée).
+
+    Pour chaque budget actif sur la période (mensuel ou annuel, avec ou sans date de fin), calcule
+    le montant budgété au prorata de la période et les dépenses réelles de sa catégorie et de toutes
+    ses sous-catégories, quelle que soit la profondeur de l'arbre.
+    Le calcul utilise trois requêtes, quel que soit le nombre de budgets et de catégories:
+    les catégories de l'utilisateur, les budgets qui chevauchent la période et les totaux par catégorie.
+    """
+
+    @staticmethod
+    def get_budgets(user, period):
+        """Retourne les budgets de l'utilisateur qui chevauchent la période."""
+        start, end = period
+        return Budget.objects.filter(
+            user=user,
+            start_date__lt=end,
+        ).filter(
+            Q(end_date__isnull=True) | Q(end_date__gte=start)
+        ).select_related('category').order_by('category__name', 'start_date')
+
+    @staticmethod
+    def get_category_actuals(user, period):
+        """
+        Retourne {category_id: {'income', 'expense'}} pour la période.
+        Les périodes alignées sur des mois sont lues depuis les cumuls mensuels,
+        les autres sont agrégées directement sur les transactions.
+        """
+        start, end = period
+        if PeriodService.is_month_aligned(period):
+            rows = MonthlyCategoryTotal.objects.filter(user=user).filter(
+                Q(year__gt=start.year) | Q(year=start.year, month__gte=start.month),
+                Q(year__lt=end.year) | Q(year=end.year, month__lt=end.month),
+            ).order_by().values('category_id').annotate(
+                total_income=Sum('income'),
+                total_expense=Sum('expense'),
+            )
+        else:
+            amount_field = DecimalField(max_digits=15, decimal_places=2)
+            rows = Transaction.objects.filter(
+                user=user,
+                date__gte=start,
+                date__lt=end,
+            ).order_by().values('category_id').annotate(
+                total_income=Sum(Case(When(amount__gt=0, then='amount'), default=Value(ZERO), output_field=amount_field)),
+                total_expense=Sum(Case(When(amount__lt=0, then='amount'), default=Value(ZERO), output_field=amount_field)),
+            )
+        return {
+            row['category_id']: {
+                'income': row['total_income'] or ZERO,
+                'expense': row['total_expense'] or ZERO,
+            }
+            for row in rows
+        }
+
+    @staticmethod
+    def roll_up(category_parents, actuals):
+        """
+        Cumule les totaux de chaque catégorie sur tous ses ancêtres.
+        'category_parents' est {category_id: parent_id}. Retourne {category_id: {'income', 'expense'}}.
+        """
+        rolled = defaultdict(lambda: {'income': ZERO, 'expense': ZERO})
+        for category_id, totals in actuals.items():
+            if category_id is None:
+                continue
+            visited = set()
+            current = category_id
+            # Remonter jusqu'à la racine (garde-fou contre une boucle parent/enfant)
+            while current is not None and current not in visited:
+                visited.add(current)
+                rolled[current]['income'] += totals['income']
+                rolled[current]['expense'] += totals['expense']
+                current = category_parents.get(current)
+        return rolled
+
+    @staticmethod
+    def get_budget_window(budget, period):
+        """Retourne la partie de la période pendant laquelle le budget est actif, ou None."""
+        budget_end = budget.end_date + timedelta(days=1) if budget.end_date else period[1]
+        return PeriodService.overlap(period, (budget.start_date, budget_end))
+
+    @staticmethod
+    def get_budgeted_amount(budget, window):
+        """
+        Montant budgété sur la fenêtre donnée: le montant mensuel (ou annuel) est compté
+        pour chaque mois (ou année) couvert, au prorata des jours pour les mois (ou années) partiels.
+        """
+        start, end = window
+        fraction = Decimal(0)
+        if budget.period_type == 'Y':
+            for year in range(start.year, end.year + 1):
+                covered = PeriodService.overlap(window, PeriodService.year(year))
+                if covered:
+                    year_start, year_end = PeriodService.year(year)
+                    fraction += Decimal((covered[1] - covered[0]).days) / Decimal((year_end - year_start).days)
+        else:
+            for year, month in PeriodService.iter_months(window):
+                covered = PeriodService.overlap(window, PeriodService.month(year, month))
+                fraction += Decimal((covered[1] - covered[0]).days) / Decimal(PeriodService.days_in_month(year, month))
+        return (budget.amount * fraction).quantize(CENT, rounding=ROUND_HALF_UP)
+
+    @staticmethod
+    def _evaluation_line(budgeted_amount, spent_amount):
+        remaining = budgeted_amount - spent_amount
+        return {
+            'budgeted_amount': budgeted_amount,
+            'spent_amount': spent_amount,
+            'remaining': remaining,
+            'percentage_spent': round(float(spent_amount / budgeted_amount * 100), 2) if budgeted_amount > 0 else 0,
+            'status': 'ok' if remaining >= 0 else 'overbudget',
+        }
+
+    @staticmethod
+    def evaluate(user, period):
+        """
+        Évalue tous les budgets de l'utilisateur sur la période (start inclus, end exclu).
+        Retourne un dictionnaire avec le détail par budget ('budgets'), le cumul par catégorie
+        budgétée ('categories', plusieurs budgets d'une même catégorie étant additionnés,
+        'is_top_level' si aucun ancêtre n'est lui-même budgété) et les totaux.
+        """
+        start, end = period
+        category_parents = dict(Category.objects.filter(user=user).order_by().values_list('id', 'parent_id'))
+        budgets = list(BudgetEvaluationService.get_budgets(user, period))
+        actuals = BudgetEvaluationService.get_category_actuals(user, period)
+        rolled = BudgetEvaluationService.roll_up(category_parents, actuals)
+
+        budget_lines = []
+        budgeted_by_category = defaultdict(lambda: ZERO)
+        budget_categories = {}
+        for budget in budgets:
+            window = BudgetEvaluationService.get_budget_window(budget, period)
+            if window is None:
+                continue
+            budgeted_amount = BudgetEvaluationService.get_budgeted_amount(budget, window)
+            spent_amount = abs(rolled[budget.category_id]['expense']) if budget.category_id in rolled else ZERO
+            budgeted_by_category[budget.category_id] += budgeted_amount
+            budget_categories[budget.category_id] = budget.category
+            budget_lines.append({
+                'budget_id': budget.id,
+                'category_id': budget.category_id,
+                'category_name': budget.category.name,
+                'period_type': budget.period_type,
+                'start_date': budget.start_date,
+                'end_date': budget.end_date,
+                **BudgetEvaluationService._evaluation_line(budgeted_amount, spent_amount),
+            })
+
+        # Les totaux portent sur les catégories budgétées de plus haut niveau
+        # pour ne pas compter deux fois une dépense budgétée à la fois sur un parent et un enfant
+        budgeted_ids = set(budgeted_by_category)
+        top_level_ids = set()
+        for category_id in budgeted_ids:
+            visited = {category_id}
+            parent_id = budget_categories[category_id].parent_id
+            while parent_id is not None and parent_id not in budgeted_ids and parent_id not in visited:
+                visited.add(parent_id)
+                parent_id = category_parents.get(parent_id)
+            if parent_id is None or parent_id in visited:
+                top_level_ids.add(category_id)
+
+        category_lines = []
+        for category_id, budgeted_amount in budgeted_by_category.items():
+            spent_amount = abs(rolled[category_id]['expense']) if category_id in rolled else ZERO
+            category_lines.append({
+                'category_id': category_id,
+                'category_name': budget_categories[category_id].name,
+                'is_budgeted': budget_categories[category_id].is_budgeted,
+                'is_top_level': category_id in top_level_ids,
+                **BudgetEvaluationService._evaluation_line(budgeted_amount, spent_amount),
+            })
+        category_lines.sort(key=lambda line: line['category_name'])
+
+        total_spent = sum((abs(rolled[category_id]['expense']) for category_id in top_level_ids if category_id in rolled), ZERO)
+
+        return {
+            'start_date': start,
+            'end_date': end,
+            'budgets': budget_lines,
+            'categories': category_lines,
+            'total_budgeted': sum((line['budgeted_amount'] for line in budget_lines), ZERO),
+            'total_spent': total_spent,
+        }
+
+    @staticmethod
+    def evaluate_cached(user, period):
+        """Comme evaluate(), servi depuis le cache tant que les données de l'utilisateur n'ont pas changé."""
+        start, end = period
+        return UserCacheService.get_or_set(
+            user,
+            f'budget-evaluation:{start.isoformat()}:{end.isoformat()}',
+            lambda: BudgetEvaluationService.evaluate(user, period),
+        )
@@ -0,0 +1,113 @@
+from decimal import Decimal
+
+from django.db.models import Sum, Case, When, F, Value, DecimalField, IntegerField
+from webapp.models import Category, MonthlyCategoryTotal
+from webapp.services.budget_evaluation_service import BudgetEvaluationService
+from webapp.services.period_service import PeriodService
+
+ZERO = Decimal('0.00')
+
+class BudgetOverviewService:
+    """
+    Moteur de l'aperçu des budgets et des fonds.
+    Les trois sections (fonds, budgets de planification, récapitulatif par catégorie)
+    sont calculées en un nombre constant de requêtes, quel que soit le nombre de catégories:
+    les catégories de l'utilisateur, un agrégat groupé par catégorie sur les cumuls mensuels
+    (MonthlyCategoryTotal) et l'évaluation des budgets de l'année (BudgetEvaluationService).
+    """
+
+    @staticmethod
+    def get_category_aggregates(user, year):
+        """
+        Retourne {category_id: {...}} avec, en une seule requête groupée,
+        les totaux toutes périodes confondues et ceux de l'année demandée.
+        """
+        amount_field = DecimalField(max_digits=15, decimal_places=2)
+
+        def for_year(field):
+            return Case(When(year=year, then=F(field)), default=Value(ZERO), output_field=amount_field)
+
+        rows = MonthlyCategoryTotal.objects.filter(user=user).order_by().values('category_id').annotate(
+            all_income=Sum('income'),
+            all_expense=Sum('expense'),
+            all_count=Sum('count'),
+            year_income=Sum(for_year('income')),
+            year_expense=Sum(for_year('expense')),
+            year_count=Sum(Case(When(year=year, then=F('count')), default=Value(0), output_field=IntegerField())),
+        )
+        return {row['category_id']: row for row in rows}
+
+    @staticmethod
+    def build(user, today):
+        """
+        Calcule les données de l'aperçu des budgets pour l'année de la date donnée.
+        Si l'utilisateur n'a aucune transaction cette année, les totaux portent sur toutes les périodes.
+        """
+        current_year = today.year
+
+        categories = list(Category.objects.filter(user=user).order_by('name'))
+        # Budgets évalués sur l'année: montants budgétés au prorata, dépenses des sous-catégories incluses
+        budget_evaluation = BudgetEvaluationService.evaluate(user, PeriodService.year(current_year))
+        budget_lines = {line['category_id']: line for line in budget_evaluation['categories']}
+        aggregates = BudgetOverviewService.get_category_aggregates(user, current_year)
+
+        # Si pas de transactions cette année, prendre toutes les périodes
+        has_current_year = any(row['year_count'] for row in aggregates.values())
+        period = 'year' if has_current_year else 'all'
+
+        def period_value(category_id, field):
+            row = aggregates.get(category_id)
+            if row is None:
+                return ZERO
+            return row[f'{period}_{field}'] or ZERO
+
+        # Résumé de la période
+        total_income = sum((row[f'{period}_income'] or ZERO for row in aggregates.values()), ZERO)
+        total_expense = sum((row[f'{period}_expense'] or ZERO for row in aggregates.values()), ZERO)
+
+        fund_data = []
+        budget_data = []
+        monthly_category_summary_data = []
+        for category in categories:
+            row = aggregates.get(category.id)
+
+            # Fonds budgétaires: solde cumulé toutes périodes confondues
+            if category.is_fund_managed:
+                current_balance = (row['all_income'] + row['all_expense']) if row else ZERO
+                if current_balance >= 100:  # Seuil arbitraire pour "sain"
+                    status = 'healthy'
+                elif current_balance >= 0:
+                    status = 'low'
+                else:
+                    status = 'critical'
+                fund_data.append({
+                    'category_name': category.name,
+                    'current_balance': current_balance,
+                    'status': status
+                })
+
+            # Budgets de planification
+            budget_line = budget_lines.get(category.id)
+            if category.is_budgeted and budget_line:
+                budget_data.append({
+                    'category_name': category.name,
+                    'budgeted_amount': budget_line['budgeted_amount'],
+                    'spent_amount': budget_line['spent_amount'],
+                    'remaining': budget_line['remaining'],
+                    'percentage_spent': budget_line['percentage_spent']
+                })
+
+            # Récapitulatif annuel: catégories ayant des transactions cette année
+            if row and row['year_count']:
+                monthly_category_summary_data.append({
+                    'category_name': category.name,
+                    'total_amount': period_value(category.id, 'income') + period_value(category.id, 'expense')
+                })
+
+        return {
+            'total_income_month': total_income,
+            'total_expense_month': total_expense,
+            'fund_data': fund_data,
+            'budget_data': budget_data,
+            'monthly_category_summary_data': monthly_category_summary_data,
+        }
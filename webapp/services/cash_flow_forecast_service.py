@@ -0,0 +1,217 @@
+from datetime import date, timedelta
+from decimal import Decimal
+import math
+
+import numpy as np
+from django.db.models import Count, Sum
+from webapp.models import Account, Category, SavingGoal
+from webapp.services.budget_evaluation_service import BudgetEvaluationService
+from webapp.services.period_service import PeriodService
+from webapp.services.recurring_detection_service import RecurringDetectionService
+from webapp.services.user_cache_service import UserCacheService
+
+ZERO = Decimal('0.00')
+
+class CashFlowForecastService:
+    """
+    Prévision de trésorerie: soldes projetés jour par jour, par compte, sur les prochains mois.
+
+    Le point de départ est le solde actuel de chaque compte (solde initial + somme des transactions).
+    Y sont ajoutés les flux connus:
+    - les séries récurrentes actives (RecurringSeries), sur leur compte;
+    - le reste à dépenser des budgets, hors dépenses déjà couvertes par une série récurrente,
+      réparti uniformément sur les jours restants;
+    - les versements mensuels nécessaires pour atteindre les objectifs d'épargne ouverts.
+    Les budgets et les objectifs n'étant pas liés à un compte, ils sont imputés au compte principal
+    (celui qui a le plus de transactions). Les soldes quotidiens sont obtenus par une somme cumulée
+    NumPy sur une matrice comptes x jours, sans requête par jour.
+    """
+    MIN_MONTHS = 3
+    MAX_MONTHS = 12
+    DEFAULT_MONTHS = 3
+
+    @staticmethod
+    def get_horizon(today, months):
+        """Retourne la période (aujourd'hui inclus, fin exclue) couverte par la prévision."""
+        if months < CashFlowForecastService.MIN_MONTHS or months > CashFlowForecastService.MAX_MONTHS:
+            raise ValueError(
+                f"L'horizon doit être compris entre {CashFlowForecastService.MIN_MONTHS} et {CashFlowForecastService.MAX_MONTHS} mois."
+            )
+        month_start = date(today.year, today.month, 1)
+        end = PeriodService.add_months(month_start, months) + timedelta(days=today.day - 1)
+        return today, end
+
+    @staticmethod
+    def get_accounts(user):
+        """
+        Retourne les comptes de l'utilisateur avec leur solde actuel ('current_balance')
+        et leur nombre de transactions ('transaction_count'), en une requête.
+        """
+        accounts = list(Account.objects.filter(user=user).annotate(
+            transactions_total=Sum('transactions__amount'),
+            transaction_count=Count('transactions'),
+        ).order_by('name'))
+        for account in accounts:
+            account.current_balance = account.initial_balance + (account.transactions_total or ZERO)
+        return accounts
+
+    @staticmethod
+    def get_recurring_occurrences(series_list, horizon):
+        """
+        Retourne les occurrences à venir des séries récurrentes sur l'horizon,
+        sous forme de tableaux (account_id, jour depuis le début, montant).
+        """
+        start, end = horizon
+        account_ids, offsets, amounts = [], [], []
+        for series in series_list:
+            if series.account_id is None or series.interval_days <= 0:
+                continue
+            # Première occurrence à partir d'aujourd'hui (les occurrences en retard sont ignorées)
+            first_offset = (series.next_expected_date - start).days
+            skipped = math.ceil(-first_offset / series.interval_days) if first_offset < 0 else 0
+            series_offsets = np.round(
+                first_offset + (skipped + np.arange(int((end - start).days / series.interval_days) + 2)) * series.interval_days
+            ).astype(np.int64)
+            series_offsets = series_offsets[(series_offsets >= 0) & (series_offsets < (end - start).days)]
+            offsets.append(series_offsets)
+            account_ids.append(np.full(len(series_offsets), series.account_id, dtype=np.int64))
+            amounts.append(np.full(len(series_offsets), float(series.average_amount)))
+        if not offsets:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+        return np.concatenate(account_ids), np.concatenate(offsets), np.concatenate(amounts)
+
+    @staticmethod
+    def get_budget_outflows(user, horizon, series_list):
+        """
+        Retourne le montant des dépenses budgétées restant à venir sur l'horizon (valeur négative),
+        déduction faite des dépenses déjà réalisées et de celles couvertes par une série récurrente.
+        Seules les catégories budgétées de plus haut niveau sont comptées.
+        """
+        start, end = horizon
+        # Mois complets couvrant l'horizon: les dépenses du mois en cours sont déduites du budget
+        period_end = end if end.day == 1 else PeriodService.add_months(end, 1)
+        evaluation = BudgetEvaluationService.evaluate(user, (date(start.year, start.month, 1), period_end))
+        top_level_lines = [line for line in evaluation['categories'] if line['is_top_level']]
+        if not top_level_lines:
+            return ZERO
+
+        # Dépenses récurrentes prévues sur l'horizon, cumulées sur les catégories parentes
+        horizon_days = (end - start).days
+        recurring_by_category = {}
+        for series in series_list:
+            if series.transaction_type == 'OUT' and series.category_id is not None and series.interval_days > 0:
+                expected = Decimal(str(horizon_days / series.interval_days)) * series.average_amount
+                totals = recurring_by_category.setdefault(series.category_id, {'income': ZERO, 'expense': ZERO})
+                totals['expense'] += expected
+        category_parents = dict(Category.objects.filter(user=user).order_by().values_list('id', 'parent_id'))
+        recurring = BudgetEvaluationService.roll_up(category_parents, recurring_by_category)
+
+        outflow = ZERO
+        for line in top_level_lines:
+            covered = abs(recurring[line['category_id']]['expense']) if line['category_id'] in recurring else ZERO
+            outflow += max(line['remaining'] - covered, ZERO)
+        return -outflow
+
+    @staticmethod
+    def get_saving_contributions(user, horizon):
+        """
+        Retourne les versements d'épargne prévus sous forme de tableaux (jour depuis le début, montant):
+        le reste à épargner de chaque objectif ouvert, réparti sur le 1er de chaque mois jusqu'à sa date cible.
+        """
+        start, end = horizon
+        offsets, amounts = [], []
+        for goal in SavingGoal.objects.filter(user=user, status='OU', target_date__gt=start):
+            remaining = goal.target_amount - goal.current_amount_saved
+            if remaining <= 0:
+                continue
+            contribution_dates = list(PeriodService.iter_months((PeriodService.add_months(date(start.year, start.month, 1), 1), goal.target_date)))
+            if not contribution_dates:
+                continue
+            monthly = float(remaining) / len(contribution_dates)
+            for year, month in contribution_dates:
+                day = date(year, month, 1)
+                if day < end:
+                    offsets.append((day - start).days)
+                    amounts.append(-monthly)
+        return np.array(offsets, dtype=np.int64), np.array(amounts, dtype=np.float64)
+
+    @staticmethod
+    def forecast(user, today=None, months=DEFAULT_MONTHS):
+        """
+        Calcule la prévision de trésorerie de l'utilisateur sur 'months' mois.
+        Retourne les dates, les soldes projetés par compte et au total, ainsi que pour chacun
+        le solde minimal et la première date de solde négatif (None si aucune).
+        """
+        today = today or date.today()
+        horizon = CashFlowForecastService.get_horizon(today, months)
+        start, end = horizon
+        days = (end - start).days
+        accounts = CashFlowForecastService.get_accounts(user)
+        dates = [(start + timedelta(days=offset)).isoformat() for offset in range(days)]
+        if not accounts:
+            return {'start_date': start, 'end_date': end, 'dates': dates, 'main_account_id': None, 'accounts': [], 'total': None}
+
+        account_index = {account.id: index for index, account in enumerate(accounts)}
+        main_account = max(accounts, key=lambda account: account.transaction_count)
+        main_index = account_index[main_account.id]
+        series_list = list(RecurringDetectionService.get_active_series(user).exclude(transaction_type='TRF'))
+
+        # Matrice des mouvements prévus: une ligne par compte, une colonne par jour
+        deltas = np.zeros((len(accounts), days))
+        account_ids, offsets, amounts = CashFlowForecastService.get_recurring_occurrences(series_list, horizon)
+        known = np.isin(account_ids, list(account_index))
+        rows = np.array([account_index[account_id] for account_id in account_ids[known]], dtype=np.int64)
+        np.add.at(deltas, (rows, offsets[known]), amounts[known])
+
+        budget_outflow = CashFlowForecastService.get_budget_outflows(user, horizon, series_list)
+        deltas[main_index, :] += float(budget_outflow) / days
+
+        goal_offsets, goal_amounts = CashFlowForecastService.get_saving_contributions(user, horizon)
+        np.add.at(deltas[main_index], goal_offsets, goal_amounts)
+
+        current_balances = np.array([float(account.current_balance) for account in accounts])
+        balances = current_balances[:, None] + np.cumsum(deltas, axis=1)
+
+        def summarize(projected):
+            negative_days = np.flatnonzero(projected < 0)
+            lowest = int(projected.argmin())
+            return {
+                'balances': np.round(projected, 2).tolist(),
+                'min_balance': round(float(projected[lowest]), 2),
+                'min_balance_date': dates[lowest],
+                'first_negative_date': dates[negative_days[0]] if len(negative_days) else None,
+            }
+
+        return {
+            'start_date': start,
+            'end_date': end,
+            'dates': dates,
+            'main_account_id': main_account.id,
+            'budget_outflow': float(budget_outflow),
+            'accounts': [
+                {
+                    'account_id': account.id,
+                    'name': account.name,
+                    'currency': account.currency,
+                    'current_balance': float(account.current_balance),
+                    **summarize(balances[index]),
+                }
+                for index, account in enumerate(accounts)
+            ],
+            'total': {
+                'current_balance': float(current_balances.sum()),
+                **summarize(balances.sum(axis=0)),
+            },
+        }
+
+    @staticmethod
+    def forecast_cached(user, today=None, months=DEFAULT_MONTHS):
+        """Comme forecast(), servi depuis le cache tant que les données de l'utilisateur n'ont pas changé."""
+        today = today or date.today()
+        # Séries récurrentes recalculées avant la lecture du cache: la détection change la version des données
+        RecurringDetectionService.refresh_if_stale(user)
+        return UserCacheService.get_or_set(
+            user,
+            f'cash-flow-forecast:{today.isoformat()}:{months}',
+            lambda: CashFlowForecastService.forecast(user, today=today, months=months),
+        )
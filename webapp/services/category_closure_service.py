@@ -0,0 +1,152 @@
+import logging
+
+from django.db import transaction as db_transaction
+from django.db.models import Q
+from webapp.models import Category, CategoryClosure
+
+logger = logging.getLogger(__name__)
+
+class CategoryClosureService:
+    """
+    Service de maintenance et de lecture de la table de fermeture des catégories (CategoryClosure).
+
+    La table est tenue à jour par les signaux de Category (création, déplacement, suppression).
+    Les écritures en masse qui contournent les signaux (bulk_create, QuerySet.update du parent)
+    doivent être suivies d'un appel à rebuild().
+    """
+
+    @staticmethod
+    def build_links(category_parents):
+        """
+        Calcule les liens (ancêtre, descendant, profondeur) à partir de {category_id: parent_id}.
+        Une boucle parent/enfant éventuelle est coupée au premier ancêtre déjà visité.
+        """
+        links = []
+        for category_id in category_parents:
+            visited = set()
+            current = category_id
+            depth = 0
+            while current is not None and current not in visited:
+                visited.add(current)
+                links.append((current, category_id, depth))
+                current = category_parents.get(current)
+                depth += 1
+        return links
+
+    @staticmethod
+    def insert(category):
+        """Ajoute les liens d'une nouvelle catégorie: elle-même et tous les ancêtres de son parent."""
+        links = [CategoryClosure(ancestor_id=category.pk, descendant_id=category.pk, depth=0)]
+        if category.parent_id is not None:
+            for ancestor_id, depth in CategoryClosure.objects.filter(
+                descendant_id=category.parent_id
+            ).values_list('ancestor_id', 'depth'):
+                links.append(CategoryClosure(ancestor_id=ancestor_id, descendant_id=category.pk, depth=depth + 1))
+        CategoryClosure.objects.bulk_create(links, ignore_conflicts=True)
+
+    @staticmethod
+    def get_descendant_ids(category, include_self=True):
+        """Retourne les IDs de la catégorie et de tous ses descendants, à toute profondeur."""
+        links = CategoryClosure.objects.filter(ancestor_id=category.pk)
+        if not include_self:
+            links = links.exclude(descendant_id=category.pk)
+        return list(links.values_list('descendant_id', flat=True))
+
+    @staticmethod
+    def get_ancestor_ids(category, include_self=True):
+        """Retourne les IDs de la catégorie et de tous ses ancêtres."""
+        links = CategoryClosure.objects.filter(descendant_id=category.pk)
+        if not include_self:
+            links = links.exclude(ancestor_id=category.pk)
+        return list(links.values_list('ancestor_id', flat=True))
+
+    @staticmethod
+    def get_root_ids(user):
+        """
+        Retourne {category_id: root_id} pour toutes les catégories de l'utilisateur,
+        root_id étant la catégorie principale (sans parent) de sa branche.
+        """
+        return dict(CategoryClosure.objects.filter(
+            descendant__user=user,
+            ancestor__parent__isnull=True,
+        ).values_list('descendant_id', 'ancestor_id'))
+
+    @staticmethod
+    def subtree_filter(category, field='category'):
+        """
+        Retourne un filtre Q "dans la catégorie ou l'un de ses descendants" pour le champ donné.
+        Ex: Transaction.objects.filter(CategoryClosureService.subtree_filter(category))
+        """
+        return Q(**{f'{field}__ancestor_links__ancestor': category})
+
+    @staticmethod
+    def would_create_cycle(category, new_parent_id):
+        """Indique si rattacher la catégorie à new_parent_id créerait une boucle."""
+        if new_parent_id is None or category.pk is None:
+            return False
+        return CategoryClosure.objects.filter(ancestor_id=category.pk, descendant_id=new_parent_id).exists()
+
+    @staticmethod
+    def detach_subtree(category):
+        """
+        Détache le sous-arbre d'une catégorie de tous ses ancêtres (hors elle-même).
+        Appelé avant la suppression d'une catégorie: ses enfants deviennent des catégories principales.
+        """
+        strict_ancestor_ids = CategoryClosureService.get_ancestor_ids(category, include_self=False)
+        if not strict_ancestor_ids:
+            return
+        CategoryClosure.objects.filter(
+            ancestor_id__in=strict_ancestor_ids,
+            descendant__ancestor_links__ancestor_id=category.pk,
+        ).delete()
+
+    @staticmethod
+    def move(category):
+        """
+        Met à jour les liens après un changement de parent: le sous-arbre de la catégorie
+        est détaché de ses anciens ancêtres puis rattaché à ceux du nouveau parent.
+        """
+        with db_transaction.atomic():
+            subtree = list(CategoryClosure.objects.filter(ancestor_id=category.pk).values_list('descendant_id', 'depth'))
+            subtree_ids = [descendant_id for descendant_id, _ in subtree]
+
+            CategoryClosure.objects.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+
+            if category.parent_id is None:
+                return
+            new_ancestors = list(CategoryClosure.objects.filter(
+                descendant_id=category.parent_id
+            ).values_list('ancestor_id', 'depth'))
+            CategoryClosure.objects.bulk_create([
+                CategoryClosure(
+                    ancestor_id=ancestor_id,
+                    descendant_id=descendant_id,
+                    depth=ancestor_depth + descendant_depth + 1,
+                )
+                for ancestor_id, ancestor_depth in new_ancestors
+                for descendant_id, descendant_depth in subtree
+            ], ignore_conflicts=True)
+
+    @staticmethod
+    def rebuild(user=None):
+        """
+        Reconstruit entièrement la table de fermeture à partir de Category.parent,
+        pour un utilisateur ou pour tous. Retourne le nombre de liens créés.
+        """
+        categories = Category.objects.all()
+        closures = CategoryClosure.objects.all()
+        if user is not None:
+            categories = categories.filter(user=user)
+            closures = closures.filter(descendant__user=user)
+
+        with db_transaction.atomic():
+            closures.delete()
+            category_parents = dict(categories.order_by().values_list('id', 'parent_id'))
+            links = [
+                CategoryClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth)
+                for ancestor_id, descendant_id, depth in CategoryClosureService.build_links(category_parents)
+            ]
+            CategoryClosure.objects.bulk_create(links, batch_size=1000)
+
+        logger.info(f"Table de fermeture des catégories reconstruite: {len(links)} liens.")
+        return len(links)
@@ -0,0 +1,112 @@
+import json
+
+from django.db.models import Exists, OuterRef
+from webapp.models import Category, SavingGoal
+from webapp.services.user_cache_service import UserCacheService
+
+class CategoryTreeService:
+    """
+    Arbre des catégories d'un utilisateur, tel qu'attendu par les scripts Alpine.js
+    (catégories principales et sous-catégories directes, avec leurs indicateurs).
+
+    L'arbre est construit en une seule requête puis mis en cache sous forme de JSON,
+    avec une version propre aux catégories: les transactions n'invalident pas l'arbre,
+    seules les écritures sur Category et SavingGoal le font (voir webapp/signals.py).
+    """
+    CACHE_NAMESPACE = 'categories'
+    CACHE_NAME = 'category-tree'
+
+    @staticmethod
+    def build_tree(user):
+        """
+        Construit l'arbre des catégories de l'utilisateur en une requête.
+        Retourne un dictionnaire de listes: 'categories' (catégories principales),
+        'subcategories' (enfants directs, avec 'parent') et 'fund_managed' (toutes les
+        catégories gérant un fonds, quel que soit leur niveau).
+        """
+        rows = Category.objects.filter(user=user).annotate(
+            is_goal_linked=Exists(SavingGoal.objects.filter(category=OuterRef('pk'), status='OU')),
+        ).order_by('name').values('id', 'name', 'parent_id', 'is_fund_managed', 'is_budgeted', 'is_goal_linked')
+
+        children_by_parent = {}
+        top_level = []
+        fund_managed = []
+        for row in rows:
+            if row['parent_id'] is None:
+                top_level.append(row)
+            else:
+                children_by_parent.setdefault(row['parent_id'], []).append(row)
+            if row['is_fund_managed']:
+                fund_managed.append({
+                    'id': row['id'],
+                    'name': row['name'],
+                    'is_fund_managed': True,
+                })
+
+        categories = []
+        subcategories = []
+        for cat in top_level:
+            categories.append({
+                'id': cat['id'],
+                'name': cat['name'],
+                'is_fund_managed': cat['is_fund_managed'],
+                'is_budgeted': cat['is_budgeted'],
+                'is_goal_linked': cat['is_goal_linked'],
+            })
+            for child_cat in children_by_parent.get(cat['id'], []):
+                subcategories.append({
+                    'id': child_cat['id'],
+                    'name': child_cat['name'],
+                    'parent': cat['id'],
+                    'is_fund_managed': child_cat['is_fund_managed'],
+                    'is_budgeted': child_cat['is_budgeted'],
+                    'is_goal_linked': child_cat['is_goal_linked'],
+                })
+
+        return {
+            'categories': categories,
+            'subcategories': subcategories,
+            'fund_managed': fund_managed,
+        }
+
+    @staticmethod
+    def get_tree_json(user):
+        """
+        Retourne l'arbre sérialisé ({'categories': str, 'subcategories': str, 'fund_managed': str})
+        depuis le cache, ou le construit pour la version courante des catégories.
+        """
+        def build_json():
+            tree = CategoryTreeService.build_tree(user)
+            return {key: json.dumps(value) for key, value in tree.items()}
+
+        return UserCacheService.get_or_set(
+            user,
+            CategoryTreeService.CACHE_NAME,
+            build_json,
+            namespace=CategoryTreeService.CACHE_NAMESPACE,
+        )
+
+    @staticmethod
+    def get_context(user):
+        """Retourne les variables de template attendues par les formulaires de catégorisation."""
+        tree_json = CategoryTreeService.get_tree_json(user)
+        return {
+            'all_categories_data_json': tree_json['categories'],
+            'all_subcategories_data_json': tree_json['subcategories'],
+        }
+
+    @staticmethod
+    def get_fund_managed_json(user):
+        """Retourne la liste JSON des catégories gérant un fonds (allocations et débits)."""
+        return CategoryTreeService.get_tree_json(user)['fund_managed']
+
+    @staticmethod
+    def get_etag(user):
+        """ETag de l'arbre: change à chaque modification des catégories de l'utilisateur."""
+        version = UserCacheService.get_version(user.pk, CategoryTreeService.CACHE_NAMESPACE)
+        return f'"category-tree-{user.pk}-{version}"'
+
+    @staticmethod
+    def invalidate_on_commit(user_id):
+        """Invalide l'arbre en cache de l'utilisateur une fois la transaction validée."""
+        UserCacheService.bump_version_on_commit(user_id, CategoryTreeService.CACHE_NAMESPACE)
@@ -0,0 +1,89 @@
+import base64
+import json
+from itertools import islice
+
+from django.db.models import Max
+from webapp.models import Transaction, TransactionChange
+from webapp.services.transaction_page_service import InvalidCursorError
+
+class DeltaExportService:
+    """
+    Export incrémental des transactions d'un utilisateur.
+
+    Chaque écriture sur une transaction ajoute une ligne au journal TransactionChange, dans la même
+    transaction base de données. Le curseur est l'identifiant de la dernière ligne du journal déjà
+    exportée: un export avec curseur renvoie l'état actuel des transactions modifiées depuis,
+    les suppressions survenues depuis, puis un nouveau curseur à utiliser pour l'export suivant.
+    Les identifiants du journal suivent l'ordre de validation (un seul rédacteur SQLite à la fois):
+    une écriture longue, validée après un export, a un identifiant plus grand que le curseur
+    et n'est donc jamais sautée.
+
+    Les écritures qui contournent les signaux (bulk_create, QuerySet.update, SQL brut)
+    doivent enregistrer leurs modifications avec record_changes().
+    """
+    CHANGE_BATCH_SIZE = 500
+
+    @staticmethod
+    def encode_cursor(sequence):
+        """Encode la position dans le journal des modifications en curseur opaque."""
+        return base64.urlsafe_b64encode(json.dumps({'s': sequence}).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Décode un curseur en position dans le journal des modifications."""
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            sequence = payload['s']
+        except (ValueError, TypeError, KeyError) as e:
+            raise InvalidCursorError("Curseur d'export invalide.") from e
+        if isinstance(sequence, bool) or not isinstance(sequence, int) or sequence < 0:
+            raise InvalidCursorError("Curseur d'export invalide.")
+        return sequence
+
+    @staticmethod
+    def record_changes(rows, is_deletion=False):
+        """
+        Enregistre dans le journal des modifications les transactions données
+        par des couples (user_id, transaction_id).
+        """
+        rows = iter(rows)
+        while True:
+            batch = [
+                TransactionChange(user_id=user_id, transaction_id=transaction_id, is_deletion=is_deletion)
+                for user_id, transaction_id in islice(rows, DeltaExportService.CHANGE_BATCH_SIZE)
+            ]
+            if not batch:
+                return
+            TransactionChange.objects.bulk_create(batch)
+
+    @staticmethod
+    def record_queryset(transactions):
+        """Enregistre dans le journal des modifications toutes les transactions d'un QuerySet."""
+        DeltaExportService.record_changes(transactions.order_by().values_list('user_id', 'id').iterator())
+
+    @staticmethod
+    def get_delta(user, cursor=None):
+        """
+        Retourne les changements depuis le curseur (toutes les transactions si cursor est None):
+        {'transactions': QuerySet ordonné par id, 'deletions': QuerySet de TransactionChange ordonné
+        par id, 'cursor': nouveau curseur}.
+        Lève InvalidCursorError si le curseur est illisible.
+        """
+        after = DeltaExportService.decode_cursor(cursor) if cursor else None
+        # Figer la fin de l'export: les modifications validées ensuite seront dans l'export suivant
+        until = TransactionChange.objects.filter(user=user).aggregate(last=Max('id'))['last'] or 0
+
+        if after is None:
+            transactions = Transaction.objects.filter(user=user)
+            deletions = TransactionChange.objects.none()
+        else:
+            changes = TransactionChange.objects.filter(user=user, id__gt=after, id__lte=until)
+            # Les identifiants ne sont jamais réutilisés: une transaction absente a été supprimée
+            transactions = Transaction.objects.filter(user=user, id__in=changes.values('transaction_id'))
+            deletions = changes.filter(is_deletion=True)
+
+        return {
+            'transactions': transactions.order_by('id'),
+            'deletions': deletions.order_by('id'),
+            'cursor': DeltaExportService.encode_cursor(max(until, after or 0)),
+        }
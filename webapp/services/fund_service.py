@@ -0,0 +1,62 @@
+from django.db import transaction as db_transaction
+from webapp.models import Fund, Allocation, AllocationLine, FundDebitRecord, FundDebitLine
+from .write_coordinator_service import WriteCoordinatorService
+
+class FundService:
+    """
+    Écritures sur les fonds: allocation d'un revenu et débit d'une dépense.
+    L'enregistrement et les soldes des fonds sont écrits dans une même transaction, qui passe par
+    WriteCoordinatorService (réessayée si la base est verrouillée): les arguments ne sont pas modifiés.
+    """
+
+    @staticmethod
+    @WriteCoordinatorService.coordinated
+    def allocate_income(user, transaction, total_allocated_amount, notes, lines):
+        """
+        Alloue une transaction de revenu aux fonds.
+        'lines' est une liste de dictionnaires {'category', 'amount', 'notes'}; le solde du fonds
+        de chaque catégorie est augmenté du montant alloué. Retourne l'Allocation créée.
+        """
+        with db_transaction.atomic():
+            allocation = Allocation.objects.create(
+                user=user,
+                transaction=transaction,
+                total_allocated_amount=total_allocated_amount,
+                notes=notes,
+            )
+            for line_data in lines:
+                AllocationLine.objects.create(
+                    user=user,
+                    allocation=allocation,
+                    category=line_data['category'],
+                    amount=line_data['amount'],
+                    notes=line_data['notes'],
+                )
+                Fund.objects.add_funds_to_category(line_data['category'], line_data['amount'], user)
+            return allocation
+
+    @staticmethod
+    @WriteCoordinatorService.coordinated
+    def debit_funds(user, transaction, total_debited_amount, notes, lines):
+        """
+        Débite les fonds pour une transaction de dépense.
+        'lines' est une liste de dictionnaires {'category', 'amount', 'notes'}; le solde du fonds
+        de chaque catégorie est diminué du montant débité. Retourne le FundDebitRecord créé.
+        """
+        with db_transaction.atomic():
+            fund_debit_record = FundDebitRecord.objects.create(
+                user=user,
+                transaction=transaction,
+                total_debited_amount=total_debited_amount,
+                notes=notes,
+            )
+            for line_data in lines:
+                FundDebitLine.objects.create(
+                    user=user,
+                    fund_debit_record=fund_debit_record,
+                    category=line_data['category'],
+                    amount=line_data['amount'],
+                    notes=line_data['notes'],
+                )
+                Fund.objects.subtract_funds_from_category(line_data['category'], line_data['amount'], user)
+            return fund_debit_record
@@ -0,0 +1,268 @@
+from collections import defaultdict
+from decimal import Decimal
+import logging
+
+from django.db import IntegrityError
+from django.db import transaction as db_transaction
+from django.db.models import Sum, Case, When, Value, F, DecimalField
+from django.db.models.functions import ExtractYear, ExtractMonth
+from webapp.models import Transaction, MonthlyCategoryTotal, MonthlyTagTotal
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal('0.00')
+
+class MonthlyTotalService:
+    """
+    Service de maintenance et de lecture des cumuls mensuels
+    par catégorie (MonthlyCategoryTotal) et par tag (MonthlyTagTotal).
+
+    Les cumuls sont tenus à jour par les signaux post_save/post_delete de Transaction
+    et m2m_changed de Transaction.tags.
+    Les écritures en masse qui contournent les signaux (bulk_create, QuerySet.update)
+    doivent être suivies d'un appel à rebuild().
+    """
+
+    @staticmethod
+    def snapshot(transaction):
+        """
+        Retourne la clé de cumul et le montant d'une transaction sous forme de tuple
+        (user_id, account_id, category_id, transaction_type, year, month, amount).
+        """
+        transaction_date = Transaction._meta.get_field('date').to_python(transaction.date)
+        return (
+            transaction.user_id,
+            transaction.account_id,
+            transaction.category_id,
+            transaction.transaction_type,
+            transaction_date.year,
+            transaction_date.month,
+            Decimal(str(transaction.amount)),
+        )
+
+    @staticmethod
+    def _add_to_total(model, key, income, expense, count):
+        """
+        Ajoute des montants à la ligne de cumul 'key', créée si elle n'existe pas encore.
+        Deux écritures concurrentes peuvent ne trouver aucune ligne et tenter toutes deux de la créer:
+        la seconde échoue sur la contrainte d'unicité et reprend la mise à jour.
+        Retourne True si une ligne existante a été modifiée.
+        """
+        changes = {
+            'income': F('income') + income,
+            'expense': F('expense') + expense,
+            'count': F('count') + count,
+        }
+        if model.objects.filter(**key).update(**changes):
+            return True
+        try:
+            with db_transaction.atomic():
+                model.objects.create(income=income, expense=expense, count=count, **key)
+            return False
+        except IntegrityError:
+            model.objects.filter(**key).update(**changes)
+            return True
+
+    @staticmethod
+    def _apply_delta(model, key, amount, sign):
+        """
+        Ajoute (sign=1) ou retire (sign=-1) un montant de la ligne de cumul identifiée par 'key'.
+        """
+        income = amount * sign if amount > 0 else ZERO
+        expense = amount * sign if amount < 0 else ZERO
+
+        if sign > 0:
+            MonthlyTotalService._add_to_total(model, key, income, expense, 1)
+        elif model.objects.filter(**key).update(
+            income=F('income') + income,
+            expense=F('expense') + expense,
+            count=F('count') + sign,
+        ):
+            # Supprimer les cumuls devenus vides
+            model.objects.filter(count__lte=0, **key).delete()
+
+    @staticmethod
+    def apply(snapshot, sign=1):
+        """
+        Ajoute (sign=1) ou retire (sign=-1) une transaction du cumul par catégorie correspondant.
+        """
+        user_id, account_id, category_id, transaction_type, year, month, amount = snapshot
+        MonthlyTotalService._apply_delta(MonthlyCategoryTotal, {
+            'user_id': user_id,
+            'account_id': account_id,
+            'category_id': category_id,
+            'transaction_type': transaction_type,
+            'year': year,
+            'month': month,
+        }, amount, sign)
+
+    @staticmethod
+    def apply_tags(snapshot, tag_ids, sign=1):
+        """
+        Ajoute (sign=1) ou retire (sign=-1) une transaction des cumuls des tags donnés.
+        """
+        user_id, _, _, transaction_type, year, month, amount = snapshot
+        for tag_id in tag_ids:
+            MonthlyTotalService._apply_delta(MonthlyTagTotal, {
+                'user_id': user_id,
+                'tag_id': tag_id,
+                'transaction_type': transaction_type,
+                'year': year,
+                'month': month,
+            }, amount, sign)
+
+    @staticmethod
+    def get_tag_ids(transaction):
+        """Retourne les IDs des tags actuellement en base pour une transaction."""
+        if transaction.pk is None:
+            return []
+        return list(Transaction.tags.through.objects.filter(
+            transaction_id=transaction.pk
+        ).values_list('tag_id', flat=True))
+
+    @staticmethod
+    def move_to_uncategorized(category):
+        """
+        Reporte les cumuls d'une catégorie sur les cumuls 'non catégorisés'.
+        Appelé avant la suppression d'une catégorie, car Django passe alors
+        Transaction.category à NULL par un UPDATE groupé qui ne déclenche aucun signal.
+        """
+        with db_transaction.atomic():
+            for total in MonthlyCategoryTotal.objects.filter(category=category):
+                key = {
+                    'user_id': total.user_id,
+                    'account_id': total.account_id,
+                    'category_id': None,
+                    'transaction_type': total.transaction_type,
+                    'year': total.year,
+                    'month': total.month,
+                }
+                MonthlyTotalService._add_to_total(MonthlyCategoryTotal, key, total.income, total.expense, total.count)
+                total.delete()
+
+    @staticmethod
+    def rebuild(user=None):
+        """
+        Recalcule entièrement les cumuls (par catégorie et par tag) à partir des transactions,
+        pour un utilisateur ou pour toute la base. Retourne le nombre de lignes créées.
+        """
+        transactions = Transaction.objects.all()
+        totals = MonthlyCategoryTotal.objects.all()
+        tag_totals = MonthlyTagTotal.objects.all()
+        if user is not None:
+            transactions = transactions.filter(user=user)
+            totals = totals.filter(user=user)
+            tag_totals = tag_totals.filter(user=user)
+
+        amount_field = DecimalField(max_digits=15, decimal_places=2)
+        measures = {
+            'total_income': Sum(Case(When(amount__gt=0, then=F('amount')), default=Value(ZERO), output_field=amount_field)),
+            'total_expense': Sum(Case(When(amount__lt=0, then=F('amount')), default=Value(ZERO), output_field=amount_field)),
+            'total_count': Sum(Value(1)),
+        }
+        periods = transactions.annotate(year=ExtractYear('date'), month=ExtractMonth('date')).order_by()
+        rows = periods.values('user_id', 'account_id', 'category_id', 'transaction_type', 'year', 'month').annotate(**measures)
+        tag_rows = periods.filter(tags__isnull=False).values(
+            'user_id', 'tags', 'transaction_type', 'year', 'month'
+        ).annotate(**measures)
+
+        with db_transaction.atomic():
+            totals.delete()
+            tag_totals.delete()
+            created = MonthlyCategoryTotal.objects.bulk_create([
+                MonthlyCategoryTotal(
+                    user_id=row['user_id'],
+                    account_id=row['account_id'],
+                    category_id=row['category_id'],
+                    transaction_type=row['transaction_type'],
+                    year=row['year'],
+                    month=row['month'],
+                    income=row['total_income'] or ZERO,
+                    expense=row['total_expense'] or ZERO,
+                    count=row['total_count'],
+                )
+                for row in rows
+            ], batch_size=500)
+            created_tags = MonthlyTagTotal.objects.bulk_create([
+                MonthlyTagTotal(
+                    user_id=row['user_id'],
+                    tag_id=row['tags'],
+                    transaction_type=row['transaction_type'],
+                    year=row['year'],
+                    month=row['month'],
+                    income=row['total_income'] or ZERO,
+                    expense=row['total_expense'] or ZERO,
+                    count=row['total_count'],
+                )
+                for row in tag_rows
+            ], batch_size=500)
+
+        created_count = len(created) + len(created_tags)
+        logger.info(f"Cumuls mensuels reconstruits: {created_count} lignes{f' pour {user.username}' if user is not None else ''}.")
+        return created_count
+
+    @staticmethod
+    def get_totals(user, year=None, month=None):
+        """
+        Retourne les totaux (income, expense, count) de l'utilisateur pour une année,
+        un mois ou toute la période si year est None.
+        """
+        totals = MonthlyCategoryTotal.objects.filter(user=user)
+        if year is not None:
+            totals = totals.filter(year=year)
+        if month is not None:
+            totals = totals.filter(month=month)
+        result = totals.aggregate(income=Sum('income'), expense=Sum('expense'), count=Sum('count'))
+        return {
+            'income': result['income'] or ZERO,
+            'expense': result['expense'] or ZERO,
+            'count': result['count'] or 0,
+        }
+
+    @staticmethod
+    def get_type_totals(user, year=None, month=None):
+        """
+        Retourne le montant net par type de transaction ({'IN', 'OUT', 'TRF'}) pour la période demandée
+        (toute la période si year est None): équivalent de la somme des montants filtrée sur transaction_type.
+        Les transferts et les remboursements restent ainsi hors des revenus et des dépenses.
+        """
+        totals = MonthlyCategoryTotal.objects.filter(user=user)
+        if year is not None:
+            totals = totals.filter(year=year)
+        if month is not None:
+            totals = totals.filter(month=month)
+        result = {transaction_type: ZERO for transaction_type, _ in Transaction.TRANSACTION_TYPES}
+        rows = totals.order_by().values('transaction_type').annotate(total_income=Sum('income'), total_expense=Sum('expense'))
+        for row in rows:
+            result[row['transaction_type']] = (row['total_income'] or ZERO) + (row['total_expense'] or ZERO)
+        return result
+
+    @staticmethod
+    def get_category_totals(user, year=None, month=None):
+        """
+        Retourne un dictionnaire {category_id: {'income', 'expense', 'net', 'count'}}
+        pour la période demandée (toute la période si year est None).
+        La clé None regroupe les transactions non catégorisées.
+        """
+        totals = MonthlyCategoryTotal.objects.filter(user=user)
+        if year is not None:
+            totals = totals.filter(year=year)
+        if month is not None:
+            totals = totals.filter(month=month)
+
+        result = defaultdict(lambda: {'income': ZERO, 'expense': ZERO, 'net': ZERO, 'count': 0})
+        rows = totals.order_by().values('category_id').annotate(
+            total_income=Sum('income'),
+            total_expense=Sum('expense'),
+            total_count=Sum('count'),
+        )
+        for row in rows:
+            income = row['total_income'] or ZERO
+            expense = row['total_expense'] or ZERO
+            result[row['category_id']] = {
+                'income': income,
+                'expense': expense,
+                'net': income + expense,
+                'count': row['total_count'] or 0,
+            }
+        return result
@@ -0,0 +1,72 @@
+import calendar
+from datetime import date, timedelta
+
+class PeriodService:
+    """
+    Périodes de calcul (mois, trimestre, année, plage personnalisée).
+    Une période est un couple (start, end) semi-ouvert: start inclus, end exclu.
+    Les filtres 'date__gte=start, date__lt=end' qui en découlent restent utilisables par un index sur la date.
+    """
+
+    @staticmethod
+    def month(year, month):
+        """Retourne la période du mois donné."""
+        start = date(year, month, 1)
+        return start, PeriodService.add_months(start, 1)
+
+    @staticmethod
+    def quarter(year, quarter):
+        """Retourne la période du trimestre donné (1 à 4)."""
+        if quarter < 1 or quarter > 4:
+            raise ValueError("Le trimestre doit être compris entre 1 et 4.")
+        start = date(year, 3 * (quarter - 1) + 1, 1)
+        return start, PeriodService.add_months(start, 3)
+
+    @staticmethod
+    def year(year):
+        """Retourne la période de l'année donnée."""
+        return date(year, 1, 1), date(year + 1, 1, 1)
+
+    @staticmethod
+    def custom(start_date, end_date):
+        """
+        Retourne la période couvrant les dates données, toutes deux incluses
+        (comme saisies par l'utilisateur).
+        """
+        if end_date < start_date:
+            raise ValueError("La date de fin ne peut pas être antérieure à la date de début.")
+        return start_date, end_date + timedelta(days=1)
+
+    @staticmethod
+    def add_months(day, months):
+        """Ajoute un nombre de mois à une date de début de mois."""
+        month_index = day.year * 12 + day.month - 1 + months
+        return date(month_index // 12, month_index % 12 + 1, 1)
+
+    @staticmethod
+    def is_month_aligned(period):
+        """Indique si la période commence et se termine sur un début de mois."""
+        start, end = period
+        return start.day == 1 and end.day == 1
+
+    @staticmethod
+    def iter_months(period):
+        """Itère sur les couples (année, mois) touchés par la période."""
+        start, end = period
+        current = date(start.year, start.month, 1)
+        while current < end:
+            yield current.year, current.month
+            current = PeriodService.add_months(current, 1)
+
+    @staticmethod
+    def days_in_month(year, month):
+        return calendar.monthrange(year, month)[1]
+
+    @staticmethod
+    def overlap(period, other):
+        """Retourne l'intersection de deux périodes, ou None si elles sont disjointes."""
+        start = max(period[0], other[0])
+        end = min(period[1], other[1])
+        if start >= end:
+            return None
+        return start, end
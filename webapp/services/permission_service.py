@@ -1,9 +1,64 @@
 from django.contrib.auth.models import User
-from django.db.models import Q
-from webapp.models import UserProfile, Transaction, Category, Account, Household, HouseholdMember
+from django.db import transaction as db_transaction
+from django.db.models import Q, QuerySet
+from webapp.models import UserProfile, Transaction, Category, Account, Household, HouseholdMember, TransactionVisibilityGrant
+from webapp.services.user_cache_service import UserCacheService
+
+class AccessScope:
+    """
+    Droits d'accès résolus d'un utilisateur: indicateurs du profil et identifiants des utilisateurs
+    liés (membres de ses ménages, membres des ménages qu'il administre, partages explicites).
+    Calculé une fois puis mis en cache (voir PermissionService.get_access_scope): les filtres
+    d'accès en sont déduits sans requête supplémentaire.
+    """
+    def __init__(self, user_id, is_superuser=False, can_view_all_transactions=False,
+                 can_edit_all_transactions=False, can_view_all_categories=False,
+                 member_ids=(), admin_member_ids=(), shared_with_ids=()):
+        self.user_id = user_id
+        self.is_superuser = is_superuser
+        self.can_view_all_transactions = can_view_all_transactions
+        self.can_edit_all_transactions = can_edit_all_transactions
+        self.can_view_all_categories = can_view_all_categories
+        # Membres des ménages de l'utilisateur (lui exclu)
+        self.member_ids = frozenset(member_ids)
+        # Membres des ménages dont l'utilisateur est administrateur (lui exclu)
+        self.admin_member_ids = frozenset(admin_member_ids)
+        # Utilisateurs avec qui le profil partage explicitement ses données
+        self.shared_with_ids = frozenset(shared_with_ids)
+
+    def editable_transactions_filter(self):
+        """Filtre des transactions modifiables (None: toutes)."""
+        if self.is_superuser or self.can_edit_all_transactions:
+            return None
+        query = Q(user_id=self.user_id)  # Ses propres transactions
+        if self.admin_member_ids:
+            # Comptes partagés des membres des ménages qu'il administre
+            query |= Q(user_id__in=self.admin_member_ids, account__is_shared=True)
+        return query
+
+    def accounts_filter(self):
+        """Filtre des comptes accessibles (None: tous)."""
+        if self.is_superuser or self.can_view_all_transactions:
+            return None
+        query = Q(user_id=self.user_id)  # Ses propres comptes
+        if self.member_ids:
+            # Comptes partagés des membres du ménage
+            query |= Q(user_id__in=self.member_ids, is_shared=True)
+        return query
+
+    def categories_filter(self):
+        """Filtre des catégories accessibles (None: toutes)."""
+        if self.is_superuser or self.can_view_all_categories:
+            return None
+        query = Q(user_id=self.user_id)  # Ses propres catégories
+        if self.member_ids:
+            # Catégories partagées des membres du ménage
+            query |= Q(user_id__in=self.member_ids, is_shared=True)
+        return query
 
 class PermissionService:
     """Service pour gérer les permissions de partage entre utilisateurs"""
+    CACHE_NAMESPACE = 'access'
     
     @staticmethod
     def get_user_profile(user):
@@ -22,46 +77,128 @@ class PermissionService:
         households = PermissionService.get_user_households(user)
         return User.objects.filter(households__household__in=households).distinct().exclude(id=user.id)
     
+    @staticmethod
+    def build_access_scope(user):
+        """Calcule les droits d'accès de l'utilisateur à partir de la base."""
+        profile = PermissionService.get_user_profile(user)
+        memberships = HouseholdMember.objects.filter(household__members__user=user).exclude(user=user)
+        # Un seul filter(): le rôle ADMIN porte sur l'appartenance de l'utilisateur lui-même
+        admin_memberships = HouseholdMember.objects.filter(
+            household__members__user=user, household__members__role='ADMIN'
+        ).exclude(user=user)
+        return AccessScope(
+            user_id=user.pk,
+            is_superuser=user.is_superuser,
+            can_view_all_transactions=profile.can_view_all_transactions,
+            can_edit_all_transactions=profile.can_edit_all_transactions,
+            can_view_all_categories=profile.can_view_all_categories,
+            member_ids=memberships.values_list('user_id', flat=True),
+            admin_member_ids=admin_memberships.values_list('user_id', flat=True),
+            shared_with_ids=profile.shared_with_users.values_list('id', flat=True),
+        )
+    
+    @staticmethod
+    def get_access_scope(user):
+        """
+        Retourne les droits d'accès de l'utilisateur.
+        Ils sont gardés sur l'objet utilisateur (donc pour la durée de la requête) et en cache,
+        invalidé lorsque ses ménages, les membres de ceux-ci ou son profil changent (voir webapp/signals.py).
+        """
+        scope = getattr(user, '_access_scope', None)
+        if scope is None:
+            scope = UserCacheService.get_or_set(
+                user,
+                'access-scope',
+                lambda: PermissionService.build_access_scope(user),
+                namespace=PermissionService.CACHE_NAMESPACE,
+            )
+            user._access_scope = scope
+        return scope
+    
+    @staticmethod
+    def invalidate_on_commit(user_id):
+        """
+        Une fois la transaction validée: invalide les droits d'accès en cache de l'utilisateur
+        et resynchronise ses droits de lecture dénormalisés (TransactionVisibilityGrant).
+        """
+        def refresh():
+            UserCacheService.bump_version(user_id, PermissionService.CACHE_NAMESPACE)
+            # L'utilisateur peut avoir été supprimé entre-temps (suppression en cascade)
+            user = User.objects.filter(pk=user_id).first()
+            if user is not None:
+                PermissionService.sync_visibility_grants(user)
+
+        db_transaction.on_commit(refresh)
+    
+    @staticmethod
+    def get_visibility_grants(scope):
+        """
+        Retourne les droits de lecture attendus pour un AccessScope: {owner_id: 'ALL' ou 'SHARED'}.
+        Mêmes règles que l'accès aux transactions: ses propres transactions, celles des comptes partagés
+        des membres de ses ménages, toutes celles des utilisateurs avec qui le partage est explicite.
+        """
+        grants = {scope.user_id: 'ALL'}
+        if scope.member_ids:
+            for owner_id in scope.member_ids:
+                grants.setdefault(owner_id, 'SHARED')
+            for owner_id in scope.shared_with_ids:
+                grants[owner_id] = 'ALL'
+        return grants
+    
+    @staticmethod
+    def sync_visibility_grants(user):
+        """Met à jour les droits de lecture de l'utilisateur: seules les différences sont écrites."""
+        target = PermissionService.get_visibility_grants(PermissionService.build_access_scope(user))
+        with db_transaction.atomic():
+            current = {grant.owner_id: grant for grant in TransactionVisibilityGrant.objects.filter(viewer=user)}
+            stale_ids = [grant.pk for owner_id, grant in current.items() if owner_id not in target]
+            if stale_ids:
+                TransactionVisibilityGrant.objects.filter(pk__in=stale_ids).delete()
+            changed = []
+            for owner_id, grant in current.items():
+                if owner_id in target and grant.scope != target[owner_id]:
+                    grant.scope = target[owner_id]
+                    changed.append(grant)
+            TransactionVisibilityGrant.objects.bulk_update(changed, ['scope'])
+            TransactionVisibilityGrant.objects.bulk_create([
+                TransactionVisibilityGrant(viewer=user, owner_id=owner_id, scope=scope)
+                for owner_id, scope in target.items() if owner_id not in current
+            ])
+    
+    @staticmethod
+    def rebuild_visibility_grants(user=None):
+        """
+        Recalcule les droits de lecture, pour un utilisateur ou pour tous.
+        Retourne le nombre d'utilisateurs traités.
+        """
+        users = User.objects.filter(pk=user.pk) if user is not None else User.objects.all()
+        count = 0
+        for viewer in users.iterator():
+            PermissionService.sync_visibility_grants(viewer)
+            count += 1
+        return count
+    
     @staticmethod
     def get_accessible_transactions(user):
         """
         Retourne les transactions accessibles à l'utilisateur selon les règles:
         1. Ses propres transactions
         2. Transactions des comptes partagés de son ménage
-        3. Transactions explicitement partagées
+        3. Transactions des utilisateurs qui partagent explicitement avec lui (membres de son ménage)
         4. Toutes les transactions s'il a la permission globale
+        La règle 1 ne dépend pas de la table dénormalisée (un utilisateur dont les droits n'ont pas été
+        synchronisés voit toujours ses transactions); les règles 2 et 3 sont lues dans TransactionVisibilityGrant.
         """
-        profile = PermissionService.get_user_profile(user)
-        
-        if user.is_superuser or profile.can_view_all_transactions:
-            # Administrateur ou permission globale
+        scope = PermissionService.get_access_scope(user)
+        if scope.is_superuser or scope.can_view_all_transactions:
             return Transaction.objects.all()
-        
-        # Récupérer les membres des ménages de l'utilisateur
-        household_members = PermissionService.get_household_members(user)
-        
-        # Construire la requête pour les transactions accessibles
-        query = Q(user=user)  # Ses propres transactions
-        
-        if household_members.exists():
-            # Transactions des comptes partagés des membres du ménage
-            query |= Q(
-                user__in=household_members,
-                account__is_shared=True
-            )
-            
-            # Transactions explicitement partagées
-            query |= Q(
-                user__in=household_members,
-                is_shared=True
-            )
-            
-            # Utilisateurs qui ont explicitement partagé avec cet utilisateur
-            shared_with_users = list(profile.shared_with_users.all())
-            if shared_with_users:
-                query |= Q(user__in=shared_with_users)
-        
-        return Transaction.objects.filter(query)
+        # Sous-requêtes non corrélées sur les droits du lecteur: évaluées une fois par SQLite
+        grants = TransactionVisibilityGrant.objects.filter(viewer=user)
+        return Transaction.objects.filter(
+            Q(user=user)
+            | Q(user_id__in=grants.filter(scope='ALL').values('owner_id'))
+            | Q(account__is_shared=True, user_id__in=grants.values('owner_id'))
+        )
     
     @staticmethod
     def get_accessible_accounts(user):
@@ -71,25 +208,8 @@ class PermissionService:
         2. Comptes partagés des membres de son ménage
         3. Tous les comptes s'il a la permission globale
         """
-        profile = PermissionService.get_user_profile(user)
-        
-        if user.is_superuser or profile.can_view_all_transactions:
-            return Account.objects.all()
-        
-        # Récupérer les membres des ménages de l'utilisateur
-        household_members = PermissionService.get_household_members(user)
-        
-        # Construire la requête pour les comptes accessibles
-        query = Q(user=user)  # Ses propres comptes
-        
-        if household_members.exists():
-            # Comptes partagés des membres du ménage
-            query |= Q(
-                user__in=household_members,
-                is_shared=True
-            )
-        
-        return Account.objects.filter(query)
+        query = PermissionService.get_access_scope(user).accounts_filter()
+        return Account.objects.all() if query is None else Account.objects.filter(query)
     
     @staticmethod
     def get_accessible_categories(user):
@@ -99,25 +219,8 @@ class PermissionService:
         2. Catégories partagées des membres de son ménage
         3. Toutes les catégories s'il a la permission globale
         """
-        profile = PermissionService.get_user_profile(user)
-        
-        if user.is_superuser or profile.can_view_all_categories:
-            return Category.objects.all()
-        
-        # Récupérer les membres des ménages de l'utilisateur
-        household_members = PermissionService.get_household_members(user)
-        
-        # Construire la requête pour les catégories accessibles
-        query = Q(user=user)  # Ses propres catégories
-        
-        if household_members.exists():
-            # Catégories partagées des membres du ménage
-            query |= Q(
-                user__in=household_members,
-                is_shared=True
-            )
-        
-        return Category.objects.filter(query)
+        query = PermissionService.get_access_scope(user).categories_filter()
+        return Category.objects.all() if query is None else Category.objects.filter(query)
     
     @staticmethod
     def can_edit_transaction(user, transaction):
@@ -127,29 +230,31 @@ class PermissionService:
         2. Si la transaction est dans un compte partagé et l'utilisateur est admin du ménage
         3. Si l'utilisateur a la permission globale d'édition
         """
-        if user.is_superuser:
-            return True
-        
-        if transaction.user == user:
-            return True
-        
-        profile = PermissionService.get_user_profile(user)
-        if profile.can_edit_all_transactions:
-            return True
-        
-        # Vérifier si l'utilisateur est admin d'un ménage commun avec le propriétaire
-        user_households = Household.objects.filter(members__user=user, members__role='ADMIN')
-        transaction_owner_in_same_household = HouseholdMember.objects.filter(
-            user=transaction.user,
-            household__in=user_households
-        ).exists()
-        
-        # Si le compte est partagé et l'utilisateur est admin du ménage
-        if transaction.account.is_shared and transaction_owner_in_same_household:
-            return True
+        return transaction.pk in PermissionService.can_edit_transactions(user, [transaction])
+    
+    @staticmethod
+    def can_edit_transactions(user, transactions):
+        """
+        Version groupée de can_edit_transaction pour une liste de transactions (objets ou QuerySet).
+        Retourne l'ensemble des identifiants des transactions modifiables par l'utilisateur.
+        Les droits sont résolus une fois (AccessScope): au plus une requête quel que soit le nombre de lignes.
+        """
+        scope = PermissionService.get_access_scope(user)
+        if isinstance(transactions, QuerySet):
+            query = scope.editable_transactions_filter()
+            editable = transactions if query is None else transactions.filter(query)
+            return set(editable.values_list('id', flat=True))
         
-        # Si la transaction est explicitement partagée et l'utilisateur est admin du ménage
-        if transaction.is_shared and transaction_owner_in_same_household:
-            return True
+        transactions = list(transactions)
+        if scope.is_superuser or scope.can_edit_all_transactions:
+            return {transaction.pk for transaction in transactions}
         
-        return False
+        editable = {transaction.pk for transaction in transactions if transaction.user_id == scope.user_id}
+        # Transactions des membres des ménages administrés: modifiables si leur compte est partagé
+        candidates = [transaction for transaction in transactions if transaction.user_id in scope.admin_member_ids]
+        if candidates:
+            shared_account_ids = set(Account.objects.filter(
+                id__in={transaction.account_id for transaction in candidates}, is_shared=True
+            ).values_list('id', flat=True))
+            editable.update(transaction.pk for transaction in candidates if transaction.account_id in shared_account_ids)
+        return editable
@@ -0,0 +1,229 @@
+from datetime import date, timedelta
+from decimal import Decimal
+import logging
+import re
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from webapp.models import Transaction, RecurringSeries
+from webapp.services.user_cache_service import UserCacheService
+
+logger = logging.getLogger(__name__)
+
+EPOCH = date(1970, 1, 1)
+
+class RecurringDetectionService:
+    """
+    Moteur de détection des transactions récurrentes (abonnements, loyer, salaire...).
+
+    Les transactions de l'utilisateur sont chargées en une requête dans des colonnes NumPy,
+    regroupées par libellé normalisé et type (np.unique), puis les statistiques des intervalles entre
+    occurrences et des montants sont calculées pour tous les groupes à la fois (sans boucle Python
+    par transaction). Les groupes réguliers sont enregistrés comme RecurringSeries.
+    """
+    # Fréquences reconnues: (code, intervalle attendu en jours, tolérance en jours)
+    FREQUENCIES = [
+        ('W', 7.0, 1.5),
+        ('M', 30.44, 4.0),
+        ('Q', 91.31, 10.0),
+        ('Y', 365.25, 20.0),
+    ]
+    MIN_OCCURRENCES = 3
+    # Écart-type maximal des montants, relatif au montant moyen
+    AMOUNT_TOLERANCE = 0.15
+
+    _NOISE_RE = re.compile(r'[\d\W_]+')
+    # Marque (cache partagé entre les workers) des utilisateurs dont les séries sont à recalculer
+    STALE_CACHE_KEY = 'recurring_series_stale:{user_id}'
+
+    @staticmethod
+    def canonical_description(description):
+        """
+        Normalise un libellé pour regrouper les occurrences d'une même série:
+        minuscules, chiffres (dates, références) et ponctuation retirés.
+        Ex: 'NETFLIX.COM 0412-3391' -> 'netflix com'
+        """
+        return RecurringDetectionService._NOISE_RE.sub(' ', (description or '').lower()).strip()[:255]
+
+    @staticmethod
+    def load(user):
+        """
+        Retourne les transactions de l'utilisateur en colonnes NumPy, en une seule requête:
+        {'date' (jours depuis 1970-01-01), 'amount', 'description', 'transaction_type', 'account_id', 'category_id'}.
+        """
+        rows = list(Transaction.objects.filter(user=user).order_by().values_list(
+            'date', 'amount', 'description', 'transaction_type', 'account_id', 'category_id',
+        ))
+        dates, amounts, descriptions, transaction_types, account_ids, category_ids = zip(*rows) if rows else ([],) * 6
+        return {
+            'date': np.array(dates, dtype='datetime64[D]').astype(np.int64),
+            'amount': np.array(amounts, dtype=np.float64),
+            'description': np.array(descriptions, dtype=str),
+            'transaction_type': np.array(transaction_types, dtype=str),
+            'account_id': np.array(account_ids, dtype=object),
+            'category_id': np.array(category_ids, dtype=object),
+        }
+
+    @staticmethod
+    def detect_series(columns, today):
+        """
+        Détecte les séries récurrentes dans des colonnes au format de load().
+        Retourne une liste de dictionnaires, un par série détectée.
+        """
+        if not len(columns['date']):
+            return []
+        # Libellés normalisés: une normalisation par libellé distinct, pas par transaction
+        descriptions, description_codes = np.unique(columns['description'], return_inverse=True)
+        canonical = np.array(
+            [RecurringDetectionService.canonical_description(description) for description in descriptions], dtype=str
+        )
+        canonical_keys, canonical_codes = np.unique(canonical, return_inverse=True)
+        canonical_codes = canonical_codes.reshape(-1)[description_codes.reshape(-1)]
+        transaction_types, type_codes = np.unique(columns['transaction_type'], return_inverse=True)
+
+        # Un groupe par (libellé normalisé, type); les libellés vides ne forment pas de série
+        keep = canonical_keys[canonical_codes] != ''
+        if not keep.any():
+            return []
+        row_indexes = np.flatnonzero(keep)
+        group_keys, codes = np.unique(
+            canonical_codes[keep] * len(transaction_types) + type_codes.reshape(-1)[keep], return_inverse=True
+        )
+        codes = codes.reshape(-1)
+        dates = columns['date'][keep]
+        amounts = columns['amount'][keep]
+
+        # Trier par groupe puis par date, et repérer le début de chaque groupe
+        order = np.lexsort((dates, codes))
+        codes, dates, amounts, row_indexes = codes[order], dates[order], amounts[order], row_indexes[order]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        counts = np.diff(np.r_[starts, len(codes)])
+        ends = starts + counts - 1
+
+        # Intervalles entre occurrences consécutives d'un même groupe (0 au début de chaque groupe)
+        intervals = np.zeros(len(dates), dtype=np.float64)
+        intervals[1:] = np.diff(dates)
+        intervals[starts] = 0.0
+
+        interval_counts = np.maximum(counts - 1, 1)
+        interval_mean = np.add.reduceat(intervals, starts) / interval_counts
+        interval_std = np.sqrt(np.maximum(np.add.reduceat(intervals ** 2, starts) / interval_counts - interval_mean ** 2, 0.0))
+        amount_mean = np.add.reduceat(amounts, starts) / counts
+        amount_std = np.sqrt(np.maximum(np.add.reduceat(amounts ** 2, starts) / counts - amount_mean ** 2, 0.0))
+        amount_cv = amount_std / np.maximum(np.abs(amount_mean), 0.01)
+
+        # Fréquence la plus proche de l'intervalle moyen, et tolérance associée
+        expected = np.array([frequency[1] for frequency in RecurringDetectionService.FREQUENCIES])
+        tolerances = np.array([frequency[2] for frequency in RecurringDetectionService.FREQUENCIES])
+        frequency_index = np.abs(interval_mean[:, None] - expected[None, :]).argmin(axis=1)
+        tolerance = tolerances[frequency_index]
+
+        regular = (
+            (counts >= RecurringDetectionService.MIN_OCCURRENCES)
+            & (np.abs(interval_mean - expected[frequency_index]) <= tolerance)
+            & (interval_std <= tolerance)
+            & (amount_cv <= RecurringDetectionService.AMOUNT_TOLERANCE)
+        )
+        confidence = np.clip(
+            1.0 - 0.5 * (interval_std / tolerance + amount_cv / RecurringDetectionService.AMOUNT_TOLERANCE), 0.0, 1.0
+        )
+
+        # Seules les séries détectées (quelques dizaines) sont converties en objets Python
+        series = []
+        for group in np.flatnonzero(regular):
+            last_index = row_indexes[ends[group]]
+            last_date = EPOCH + timedelta(days=int(dates[ends[group]]))
+            next_expected_date = last_date + timedelta(days=round(float(interval_mean[group])))
+            canonical_code, type_code = divmod(int(group_keys[group]), len(transaction_types))
+            series.append({
+                'description_key': str(canonical_keys[canonical_code]),
+                'transaction_type': str(transaction_types[type_code]),
+                'label': str(columns['description'][last_index]),
+                'account_id': columns['account_id'][last_index],
+                'category_id': columns['category_id'][last_index],
+                'frequency': RecurringDetectionService.FREQUENCIES[frequency_index[group]][0],
+                'interval_days': round(float(interval_mean[group]), 2),
+                'average_amount': Decimal(str(round(float(amount_mean[group]), 2))),
+                'occurrence_count': int(counts[group]),
+                'first_date': EPOCH + timedelta(days=int(dates[starts[group]])),
+                'last_date': last_date,
+                'next_expected_date': next_expected_date,
+                'confidence': round(float(confidence[group]), 2),
+                # Une série dont l'occurrence attendue est largement dépassée est considérée comme terminée
+                'is_active': today <= next_expected_date + timedelta(days=2 * float(tolerance[group])),
+            })
+        return series
+
+    @staticmethod
+    def detect(user, today=None):
+        """
+        Détecte les séries récurrentes de l'utilisateur et met à jour ses RecurringSeries:
+        création des nouvelles séries, mise à jour des existantes, désactivation de celles
+        qui ne sont plus détectées. Retourne le nombre de séries actives.
+        """
+        today = today or date.today()
+        detected = RecurringDetectionService.detect_series(RecurringDetectionService.load(user), today)
+        now = timezone.now()
+
+        with db_transaction.atomic():
+            existing = {
+                (series.description_key, series.transaction_type): series
+                for series in RecurringSeries.objects.filter(user=user)
+            }
+            to_create = []
+            to_update = []
+            for values in detected:
+                series = existing.pop((values['description_key'], values['transaction_type']), None)
+                if series is None:
+                    to_create.append(RecurringSeries(user=user, **values))
+                    continue
+                for field, value in values.items():
+                    setattr(series, field, value)
+                series.detected_at = now
+                to_update.append(series)
+
+            RecurringSeries.objects.bulk_create(to_create, batch_size=500)
+            if to_update:
+                RecurringSeries.objects.bulk_update(
+                    to_update,
+                    [field for field in detected[0] if field not in ('description_key', 'transaction_type')] + ['detected_at'],
+                    batch_size=500,
+                )
+            # Séries qui ne sont plus détectées
+            RecurringSeries.objects.filter(pk__in=[series.pk for series in existing.values()]).update(is_active=False)
+            # Les écritures groupées ne déclenchent pas de signal: invalider le cache (prévisions)
+            UserCacheService.bump_version_on_commit(user.pk)
+
+        active_count = sum(1 for values in detected if values['is_active'])
+        logger.info(f"Séries récurrentes détectées pour {user.username}: {len(detected)} ({active_count} actives).")
+        return active_count
+
+    @staticmethod
+    def mark_stale(user_id):
+        """
+        Signale que les séries de l'utilisateur sont à recalculer (par exemple après une importation).
+        La détection est faite à la prochaine lecture (get_active_series), une seule fois
+        pour plusieurs importations successives, et non pendant la requête d'importation.
+        """
+        cache.set(RecurringDetectionService.STALE_CACHE_KEY.format(user_id=user_id), True, None)
+
+    @staticmethod
+    def refresh_if_stale(user):
+        """Recalcule les séries de l'utilisateur si elles sont marquées à recalculer (voir mark_stale)."""
+        stale_key = RecurringDetectionService.STALE_CACHE_KEY.format(user_id=user.pk)
+        if not cache.get(stale_key):
+            return
+        cache.delete(stale_key)
+        # Un échec de la détection laisse les séries précédentes en place
+        try:
+            RecurringDetectionService.detect(user)
+        except Exception as e:
+            logger.error(f"Erreur lors de la détection des séries récurrentes pour {user.username}: {e}", exc_info=True)
+
+    @staticmethod
+    def get_active_series(user):
+        """Retourne les séries actives de l'utilisateur, recalculées d'abord si nécessaire."""
+        RecurringDetectionService.refresh_if_stale(user)
+        return RecurringSeries.objects.filter(user=user, is_active=True)
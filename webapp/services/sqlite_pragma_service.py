@@ -0,0 +1,47 @@
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+
+INTEGER_PATTERN = re.compile(r'-?\d+')
+
+class SqlitePragmaService:
+    """
+    Construction des instructions PRAGMA d'un profil SQLite (settings.SQLITE_PROFILES).
+    Les PRAGMA n'acceptent pas de paramètres liés: le nom et la valeur sont donc vérifiés
+    contre une liste autorisée avant d'être insérés dans l'instruction.
+    """
+    # Nom du PRAGMA: valeurs acceptées (ensemble de mots-clés) ou int pour une valeur entière
+    ALLOWED_PRAGMAS = {
+        'journal_mode': {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'},
+        'synchronous': {'OFF', 'NORMAL', 'FULL', 'EXTRA'},
+        'temp_store': {'DEFAULT', 'FILE', 'MEMORY'},
+        'foreign_keys': {'ON', 'OFF'},
+        'busy_timeout': int,
+        'mmap_size': int,
+        'cache_size': int,
+        'wal_autocheckpoint': int,
+    }
+
+    @staticmethod
+    def clean_value(name, value):
+        """Retourne la valeur normalisée du PRAGMA, ou lève ImproperlyConfigured si elle n'est pas autorisée."""
+        if name not in SqlitePragmaService.ALLOWED_PRAGMAS:
+            raise ImproperlyConfigured(f"PRAGMA SQLite non autorisé: {name!r}.")
+        allowed = SqlitePragmaService.ALLOWED_PRAGMAS[name]
+        if allowed is int:
+            if isinstance(value, bool) or not INTEGER_PATTERN.fullmatch(str(value)):
+                raise ImproperlyConfigured(f"Valeur entière attendue pour le PRAGMA {name}: {value!r}.")
+            return str(int(value))
+        if str(value).upper() not in allowed:
+            raise ImproperlyConfigured(
+                f"Valeur non autorisée pour le PRAGMA {name}: {value!r} (valeurs possibles: {', '.join(sorted(allowed))})."
+            )
+        return str(value).upper()
+
+    @staticmethod
+    def get_statements(pragmas):
+        """Retourne les instructions 'PRAGMA nom = valeur' d'un dictionnaire de PRAGMA, après vérification."""
+        return [
+            f"PRAGMA {name} = {SqlitePragmaService.clean_value(name, value)}"
+            for name, value in pragmas.items()
+        ]
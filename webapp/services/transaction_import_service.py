@@ -2,10 +2,12 @@ import os
 import shutil
 from datetime import datetime
 from django.conf import settings
-from django.db import transaction as db_transaction
+from django.db import OperationalError, transaction as db_transaction
 from webapp.models import Transaction, Account
 from webapp.importers import BaseTransactionImporter
 from .transaction_service import TransactionService
+from .recurring_detection_service import RecurringDetectionService
+from .write_coordinator_service import WriteCoordinatorService
 import logging
 from pathlib import Path
 
@@ -33,9 +35,6 @@ class TransactionImportService:
         """
         Traite le fichier importé et sauvegarde dans data/db.sqlite3
         """
-        imported_count = 0
-        transaction_service = TransactionService()
-
         # Sécurité: S'assurer que le compte appartient à l'utilisateur
         if account.user != user:
             logger.warning(f"Tentative d'importation vers le compte {account.id} par utilisateur {user.username}")
@@ -63,6 +62,23 @@ class TransactionImportService:
             logger.warning(f"Base de données non trouvée à {db_path}")
             # La base sera créée automatiquement par Django si nécessaire
 
+        # Écriture coordonnée: tout l'import est réessayé si la base est verrouillée par un autre worker
+        imported_count = WriteCoordinatorService.run(self._import_into_database, file_path, account, user, db_path)
+
+        # Séries récurrentes recalculées à leur prochaine lecture (prévisions), pas pendant l'importation
+        if imported_count:
+            RecurringDetectionService.mark_stale(user.pk)
+
+        return imported_count
+
+    def _import_into_database(self, file_path, account, user, db_path):
+        """
+        Lit le fichier et enregistre ses transactions (hors doublons) dans une seule transaction de base de données.
+        Retourne le nombre de transactions ajoutées.
+        """
+        imported_count = 0
+        transaction_service = TransactionService()
+
         with db_transaction.atomic():
             try:
                 logger.info(f"Début de l'importation dans la base de données {db_path}")
@@ -114,6 +130,9 @@ class TransactionImportService:
             except ValueError as e:
                 logger.error(f"Erreur de valeur lors de l'importation: {e}")
                 raise e
+            except OperationalError:
+                # Base verrouillée notamment: erreur transmise telle quelle pour que WriteCoordinatorService réessaie
+                raise
             except Exception as e:
                 logger.critical(f"Erreur inattendue lors de l'importation: {e}")
                 raise Exception(f"Erreur lors de l'importation des transactions: {e}")
@@ -0,0 +1,184 @@
+import base64
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q, Sum, Count, Exists, OuterRef, Case, When, DecimalField, Value
+from webapp.models import Transaction, Allocation, FundDebitRecord
+
+class InvalidCursorError(ValueError):
+    """Curseur de pagination illisible ou incompatible avec le tri demandé."""
+
+class InvalidFilterError(ValueError):
+    """Filtre de la liste des transactions invalide (par exemple une catégorie qui n'est pas un identifiant)."""
+
+class TransactionPageService:
+    """
+    Pagination par curseur (keyset) de la liste des transactions d'un utilisateur,
+    avec filtres et tri appliqués côté serveur.
+
+    Le curseur contient les valeurs des colonnes de tri de la dernière ligne renvoyée:
+    la page suivante est lue avec un WHERE sur ces colonnes plutôt qu'avec un OFFSET,
+    ce qui garde un coût constant quelle que soit la profondeur de défilement.
+    Chaque tri se termine par 'id' pour que l'ordre soit total.
+    """
+    SORTS = {
+        '-date': ('-date', '-created_at', '-id'),
+        'date': ('date', 'created_at', 'id'),
+        '-amount': ('-amount', '-id'),
+        'amount': ('amount', 'id'),
+    }
+    DEFAULT_SORT = '-date'
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+
+    @staticmethod
+    def get_queryset(user, filters=None):
+        """
+        Retourne les transactions de l'utilisateur filtrées selon 'filters':
+        search (description ou montant exact), category (id ou 'none'),
+        type ('positive' / 'negative'), status ('allocated' / 'debited' / 'unprocessed').
+        """
+        filters = filters or {}
+        transactions = Transaction.objects.filter(user=user).annotate(
+            is_allocated=Exists(Allocation.objects.filter(transaction=OuterRef('pk'))),
+            is_fund_debited=Exists(FundDebitRecord.objects.filter(transaction=OuterRef('pk'))),
+        )
+
+        search = (filters.get('search') or '').strip()
+        if search:
+            search_filter = Q(description__icontains=search)
+            try:
+                amount = Decimal(search)
+            except InvalidOperation:
+                amount = None
+            # 'NaN' ou 'Infinity' ne sont pas des montants: recherche sur la description seulement
+            if amount is not None and amount.is_finite():
+                search_filter |= Q(amount=amount) | Q(amount=-amount)
+            transactions = transactions.filter(search_filter)
+
+        category = filters.get('category')
+        if category == 'none':
+            transactions = transactions.filter(category__isnull=True)
+        elif category:
+            transactions = transactions.filter(category_id=category)
+
+        if filters.get('type') == 'positive':
+            transactions = transactions.filter(amount__gt=0)
+        elif filters.get('type') == 'negative':
+            transactions = transactions.filter(amount__lt=0)
+
+        status = filters.get('status')
+        if status == 'allocated':
+            transactions = transactions.filter(is_allocated=True)
+        elif status == 'debited':
+            transactions = transactions.filter(is_fund_debited=True)
+        elif status == 'unprocessed':
+            transactions = transactions.filter(is_allocated=False, is_fund_debited=False)
+
+        return transactions
+
+    @staticmethod
+    def get_totals(transactions):
+        """Retourne le nombre, les revenus et les dépenses d'un ensemble filtré, en une requête."""
+        amount_field = DecimalField(max_digits=15, decimal_places=2)
+        totals = transactions.order_by().aggregate(
+            count=Count('id'),
+            income=Sum(Case(When(amount__gt=0, then='amount'), default=Value(0), output_field=amount_field)),
+            expense=Sum(Case(When(amount__lt=0, then='amount'), default=Value(0), output_field=amount_field)),
+        )
+        return {
+            'count': totals['count'],
+            'income': totals['income'] or Decimal('0.00'),
+            'expense': totals['expense'] or Decimal('0.00'),
+        }
+
+    @staticmethod
+    def encode_cursor(transaction, sort):
+        """Encode les valeurs des colonnes de tri d'une transaction en curseur opaque."""
+        values = [str(getattr(transaction, field.lstrip('-'))) for field in TransactionPageService.SORTS[sort]]
+        return base64.urlsafe_b64encode(json.dumps([sort, values]).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor, sort):
+        """
+        Décode un curseur en liste de valeurs Python, dans l'ordre des colonnes de tri.
+        Lève InvalidCursorError si le curseur n'est pas [tri, [valeur par colonne]] sans valeur nulle.
+        """
+        fields = TransactionPageService.SORTS[sort]
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError) as e:
+            raise InvalidCursorError("Curseur de pagination invalide.") from e
+        if not isinstance(payload, list) or len(payload) != 2:
+            raise InvalidCursorError("Curseur de pagination invalide.")
+        cursor_sort, raw_values = payload
+        if cursor_sort != sort:
+            raise InvalidCursorError("Le curseur ne correspond pas au tri demandé.")
+        if not isinstance(raw_values, list) or len(raw_values) != len(fields) or None in raw_values:
+            raise InvalidCursorError("Curseur de pagination invalide.")
+        try:
+            return [
+                Transaction._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(fields, raw_values)
+            ]
+        except Exception as e:
+            raise InvalidCursorError("Curseur de pagination invalide.") from e
+
+    @staticmethod
+    def _after_cursor(fields, values):
+        """
+        Construit la condition "strictement après" pour un tri multi-colonnes:
+        (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z)...
+        """
+        condition = Q()
+        equal_prefix = Q()
+        for field, value in zip(fields, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal_prefix & Q(**{f'{name}__{lookup}': value})
+            equal_prefix &= Q(**{name: value})
+        return condition
+
+    @staticmethod
+    def get_page(transactions, sort=None, cursor=None, page_size=None):
+        """
+        Retourne (transactions de la page, curseur suivant ou None).
+        Lève InvalidCursorError si le curseur est invalide.
+        """
+        sort = sort if sort in TransactionPageService.SORTS else TransactionPageService.DEFAULT_SORT
+        page_size = max(1, min(page_size or TransactionPageService.DEFAULT_PAGE_SIZE, TransactionPageService.MAX_PAGE_SIZE))
+        fields = TransactionPageService.SORTS[sort]
+
+        if cursor:
+            values = TransactionPageService.decode_cursor(cursor, sort)
+            transactions = transactions.filter(TransactionPageService._after_cursor(fields, values))
+
+        # Une ligne de plus que la taille de page pour savoir s'il reste des transactions
+        page = list(transactions.select_related('category', 'account', 'user').order_by(*fields)[:page_size + 1])
+        next_cursor = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            next_cursor = TransactionPageService.encode_cursor(page[-1], sort)
+        return page, next_cursor
+
+    @staticmethod
+    def serialize(transaction, can_edit=True):
+        """
+        Sérialise une transaction pour la liste de toutes les transactions.
+        'can_edit' est calculé pour toute la page avec PermissionService.can_edit_transactions().
+        """
+        return {
+            'id': transaction.id,
+            'date': transaction.date.isoformat(),
+            'description': transaction.description,
+            'amount': float(transaction.amount),
+            'category_name': transaction.category.name if transaction.category else 'N/A',
+            'account_name': transaction.account.name,
+            'account_currency': transaction.account.currency,
+            'transaction_type': transaction.transaction_type,
+            'is_allocated': transaction.is_allocated,
+            'is_fund_debited': transaction.is_fund_debited,
+            'account_type': transaction.account.account_type,
+            'owner': transaction.user.username,
+            'can_edit': can_edit,
+        }
@@ -1,6 +1,7 @@
 from django.db import transaction as db_transaction
 from django.db.models import Sum
 from webapp.models import Transaction, Account, Category, Fund, CategorizationRule, Tag
+from .write_coordinator_service import WriteCoordinatorService
 from datetime import date
 import logging
 from django.utils import timezone
@@ -18,12 +19,16 @@ class TransactionService:
     pour respecter le Principe de Responsabilité Unique (SRP).
     Toutes les opérations ici sont maintenant liées à un utilisateur spécifique.
     """
+    @WriteCoordinatorService.coordinated
     def create_transaction(self, data: dict, user) -> Transaction:
         """
         Crée et sauvegarde une nouvelle transaction pour un utilisateur donné.
         Met à jour le solde du fonds budgétaire associé si pertinent.
         Apprend de la transaction pour les règles de catégorisation de cet utilisateur.
+        L'écriture passe par WriteCoordinatorService (réessayée si la base est verrouillée).
         """
+        # Copie: une nouvelle tentative doit repartir des données d'origine
+        data = dict(data)
         with db_transaction.atomic():
             # Assurez-vous que la transaction est liée à l'utilisateur
             data['user'] = user
@@ -58,20 +63,27 @@ class TransactionService:
     def update_transaction(self, transaction: Transaction, data: dict, user) -> Transaction:
         """
         Met à jour une transaction existante pour un utilisateur donné.
+        L'écriture passe par WriteCoordinatorService (réessayée si la base est verrouillée).
         """
         if transaction.user != user:
             logger.warning(f"Tentative de mise à jour de transaction {transaction.id} par utilisateur {user.username} qui n'en est pas le propriétaire.")
             raise ValueError("Vous n'êtes pas autorisé à modifier cette transaction.")
 
-        with db_transaction.atomic():
-            # Sauvegarder les valeurs originales avant la mise à jour
-            original_amount_normalized = transaction.amount
-            original_category = transaction.category
-            original_type = transaction.transaction_type
-            original_account = transaction.account
+        # Sauvegarder les valeurs originales avant la mise à jour
+        # (avant toute tentative d'écriture: une nouvelle tentative repart de ces valeurs)
+        original = (transaction.amount, transaction.category, transaction.transaction_type, transaction.account)
+        data = dict(data)
+        tags_data = data.pop('tags', None)
+        return WriteCoordinatorService.run(self._save_transaction_update, transaction, data, tags_data, original, user)
 
+    def _save_transaction_update(self, transaction: Transaction, data: dict, tags_data, original, user) -> Transaction:
+        """
+        Enregistre la mise à jour préparée par update_transaction et ajuste les fonds
+        (retrait de l'impact de l'ancienne transaction, puis application de la nouvelle).
+        """
+        original_amount_normalized, original_category, original_type, original_account = original
+        with db_transaction.atomic():
             # Appliquer les nouvelles données à l'instance de la transaction
-            tags_data = data.pop('tags', None)
             for field, value in data.items():
                 setattr(transaction, field, value)
 
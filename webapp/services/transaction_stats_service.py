@@ -0,0 +1,125 @@
+from collections import defaultdict
+from decimal import Decimal
+import logging
+
+from django.contrib.auth.models import User
+from django.db import transaction as db_transaction
+from django.db.models import Count, Q, Sum, Case, When, Value, F, DecimalField
+from django.db.models.functions import ExtractYear
+from webapp.models import Transaction, MonthlyCategoryTotal, UserTransactionStats
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal('0.00')
+CENT = Decimal('0.01')
+
+class TransactionStatsService:
+    """
+    Service de maintenance et de lecture des compteurs par utilisateur (UserTransactionStats).
+
+    Les compteurs sont tenus à jour par les signaux de Transaction, à partir des mêmes
+    instantanés que les cumuls mensuels (MonthlyTotalService.snapshot).
+    Les écritures en masse qui contournent les signaux (bulk_create, QuerySet.update)
+    doivent être suivies d'un appel à rebuild().
+    """
+
+    @staticmethod
+    def _format(amount):
+        """Montant stocké dans le JSON des totaux annuels (chaîne à deux décimales)."""
+        return str(Decimal(amount).quantize(CENT))
+
+    @staticmethod
+    def apply(changes):
+        """
+        Applique une liste de changements [(snapshot, sign), ...] aux compteurs,
+        avec une seule lecture verrouillée et une seule écriture par utilisateur.
+        """
+        changes_by_user = defaultdict(list)
+        for snapshot, sign in changes:
+            changes_by_user[snapshot[0]].append((snapshot, sign))
+
+        with db_transaction.atomic():
+            for user_id, user_changes in changes_by_user.items():
+                stats = UserTransactionStats.objects.select_for_update().filter(user_id=user_id).first()
+                if stats is None:
+                    # Pas encore de compteurs: les calculer depuis les transactions, changements inclus.
+                    # Rien à faire pour une suppression seule (ex: suppression en cascade de l'utilisateur).
+                    if any(sign > 0 for _, sign in user_changes):
+                        TransactionStatsService.rebuild(user=User.objects.get(pk=user_id))
+                    continue
+                for (_, _, category_id, _, year, _, amount), sign in user_changes:
+                    stats.total_count += sign
+                    if category_id is None:
+                        stats.uncategorized_count += sign
+                    totals = stats.yearly_totals.setdefault(str(year), {'income': '0.00', 'expense': '0.00', 'count': 0})
+                    if amount > 0:
+                        totals['income'] = TransactionStatsService._format(Decimal(totals['income']) + amount * sign)
+                    elif amount < 0:
+                        totals['expense'] = TransactionStatsService._format(Decimal(totals['expense']) + amount * sign)
+                    totals['count'] += sign
+                    if totals['count'] <= 0:
+                        del stats.yearly_totals[str(year)]
+                stats.save()
+
+    @staticmethod
+    def move_to_uncategorized(category):
+        """
+        Compte comme non catégorisées les transactions d'une catégorie sur le point d'être supprimée
+        (Django passe alors Transaction.category à NULL sans déclencher de signal).
+        À appeler avant MonthlyTotalService.move_to_uncategorized(), dont il lit les cumuls.
+        """
+        moved_count = MonthlyCategoryTotal.objects.filter(category=category).aggregate(total=Sum('count'))['total']
+        if not moved_count:
+            return
+        UserTransactionStats.objects.filter(user_id=category.user_id).update(
+            uncategorized_count=F('uncategorized_count') + moved_count,
+        )
+
+    @staticmethod
+    def rebuild(user=None):
+        """
+        Recalcule les compteurs à partir des transactions, pour un utilisateur ou pour tous.
+        Retourne le nombre de lignes créées.
+        """
+        transactions = Transaction.objects.all()
+        stats = UserTransactionStats.objects.all()
+        if user is not None:
+            transactions = transactions.filter(user=user)
+            stats = stats.filter(user=user)
+
+        amount_field = DecimalField(max_digits=15, decimal_places=2)
+        rows = transactions.annotate(year=ExtractYear('date')).order_by().values('user_id', 'year').annotate(
+            total_income=Sum(Case(When(amount__gt=0, then=F('amount')), default=Value(ZERO), output_field=amount_field)),
+            total_expense=Sum(Case(When(amount__lt=0, then=F('amount')), default=Value(ZERO), output_field=amount_field)),
+            total_count=Count('id'),
+            uncategorized=Count('id', filter=Q(category__isnull=True)),
+        )
+
+        stats_by_user = {}
+        for row in rows:
+            user_stats = stats_by_user.setdefault(row['user_id'], UserTransactionStats(user_id=row['user_id'], yearly_totals={}))
+            user_stats.total_count += row['total_count']
+            user_stats.uncategorized_count += row['uncategorized']
+            user_stats.yearly_totals[str(row['year'])] = {
+                'income': TransactionStatsService._format(row['total_income'] or ZERO),
+                'expense': TransactionStatsService._format(row['total_expense'] or ZERO),
+                'count': row['total_count'],
+            }
+        if user is not None and user.pk not in stats_by_user:
+            stats_by_user[user.pk] = UserTransactionStats(user_id=user.pk, yearly_totals={})
+
+        with db_transaction.atomic():
+            stats.delete()
+            UserTransactionStats.objects.bulk_create(stats_by_user.values(), batch_size=500)
+
+        logger.info(f"Compteurs des transactions reconstruits: {len(stats_by_user)} utilisateur(s).")
+        return len(stats_by_user)
+
+    @staticmethod
+    def get(user):
+        """Retourne les compteurs de l'utilisateur (lecture par clé primaire), calculés au premier accès."""
+        stats = UserTransactionStats.objects.filter(pk=user.pk).first()
+        if stats is None:
+            TransactionStatsService.rebuild(user=user)
+            stats = UserTransactionStats.objects.get(pk=user.pk)
+        return stats
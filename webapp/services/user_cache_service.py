@@ -0,0 +1,79 @@
+import time
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+
+logger = logging.getLogger(__name__)
+
+class UserCacheService:
+    """
+    Cache versionné par utilisateur pour les blocs de données coûteux
+    (statistiques du tableau de bord, aperçu des budgets...).
+
+    Chaque utilisateur possède un numéro de version de ses données, incrémenté
+    par toute écriture sur Transaction (et ses tags), Fund, Budget, Category, Account, Tag ou SavingGoal (voir webapp/signals.py).
+    Les clés de cache incluent cette version: une écriture rend donc immédiatement
+    obsolètes tous les blocs de l'utilisateur, sans devoir les supprimer un par un.
+
+    Un espace de noms ('namespace') permet de versionner séparément des données
+    qui changent à un autre rythme (ex: l'arbre des catégories, voir CategoryTreeService).
+    """
+    DEFAULT_NAMESPACE = 'data'
+    VERSION_KEY = 'user-{namespace}-version:{user_id}'
+    DATA_KEY = 'user-{namespace}:{user_id}:{name}:v{version}'
+
+    @staticmethod
+    def _new_version():
+        # Basée sur l'horloge: une version réinitialisée (clé expirée ou évincée)
+        # ne retombe jamais sur une version déjà utilisée.
+        return int(time.time() * 1000)
+
+    @staticmethod
+    def get_version(user_id, namespace=DEFAULT_NAMESPACE):
+        """Retourne la version courante des données de l'utilisateur."""
+        key = UserCacheService.VERSION_KEY.format(namespace=namespace, user_id=user_id)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, UserCacheService._new_version(), timeout=None)
+            version = cache.get(key)
+        return version
+
+    @staticmethod
+    def bump_version(user_id, namespace=DEFAULT_NAMESPACE):
+        """Invalide tous les blocs en cache de l'utilisateur."""
+        key = UserCacheService.VERSION_KEY.format(namespace=namespace, user_id=user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, UserCacheService._new_version(), timeout=None)
+
+    @staticmethod
+    def bump_version_on_commit(user_id, namespace=DEFAULT_NAMESPACE):
+        """
+        Invalide le cache de l'utilisateur une fois la transaction de base de données validée,
+        pour qu'une lecture concurrente ne remette pas en cache des données pas encore écrites.
+        """
+        if user_id is None:
+            return
+        db_transaction.on_commit(lambda: UserCacheService.bump_version(user_id, namespace))
+
+    @staticmethod
+    def get_or_set(user, name, builder, timeout=None, namespace=DEFAULT_NAMESPACE):
+        """
+        Retourne le bloc 'name' de l'utilisateur depuis le cache,
+        ou le calcule avec builder() et le met en cache pour la version courante.
+        """
+        key = UserCacheService.DATA_KEY.format(
+            namespace=namespace,
+            user_id=user.pk,
+            name=name,
+            version=UserCacheService.get_version(user.pk, namespace),
+        )
+        data = cache.get(key)
+        if data is None:
+            logger.debug(f"Cache manquant pour '{name}' (utilisateur {user.username}), recalcul.")
+            data = builder()
+            cache.set(key, data, timeout=timeout if timeout is not None else settings.USER_DATA_CACHE_TIMEOUT)
+        return data
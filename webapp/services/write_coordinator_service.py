@@ -0,0 +1,65 @@
+import functools
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import OperationalError
+from django.db import transaction as db_transaction
+
+logger = logging.getLogger(__name__)
+
+class WriteCoordinatorService:
+    """
+    Coordination des écritures en base. SQLite n'accepte qu'un rédacteur à la fois, même en mode WAL:
+    - dans un processus, les écritures coordonnées passent l'une après l'autre par un verrou
+      (les threads attendent ici plutôt que dans le délai d'attente de SQLite);
+    - entre les workers gunicorn, une écriture qui échoue avec "database is locked" est réessayée
+      après un délai croissant (settings.WRITE_RETRY_ATTEMPTS, settings.WRITE_RETRY_DELAY).
+
+    Une nouvelle tentative rejoue toute la fonction: elle doit ouvrir sa propre transaction
+    (atomic) et ne pas modifier ses arguments. Appelée dans une transaction déjà ouverte,
+    la fonction est exécutée une seule fois: c'est l'appelant le plus externe qui réessaie.
+    Désactivable avec settings.WRITE_COORDINATION.
+    """
+    _lock = threading.RLock()
+
+    @staticmethod
+    def is_locked_error(error):
+        """Indique si l'erreur vient d'une base verrouillée par un autre rédacteur."""
+        message = str(error).lower()
+        return 'locked' in message or 'busy' in message
+
+    @staticmethod
+    def run(func, *args, **kwargs):
+        """Exécute 'func' sous le verrou d'écriture du processus, avec nouvelles tentatives si la base est verrouillée."""
+        if not settings.WRITE_COORDINATION:
+            return func(*args, **kwargs)
+        if db_transaction.get_connection().in_atomic_block:
+            with WriteCoordinatorService._lock:
+                return func(*args, **kwargs)
+
+        attempts = max(1, settings.WRITE_RETRY_ATTEMPTS)
+        for attempt in range(1, attempts + 1):
+            try:
+                with WriteCoordinatorService._lock:
+                    return func(*args, **kwargs)
+            except OperationalError as e:
+                if attempt == attempts or not WriteCoordinatorService.is_locked_error(e):
+                    raise
+                # Délai doublé à chaque tentative, avec une part aléatoire pour désynchroniser les workers
+                delay = settings.WRITE_RETRY_DELAY * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+                logger.warning(
+                    f"Base verrouillée pendant {getattr(func, '__qualname__', func)} "
+                    f"(tentative {attempt}/{attempts}), nouvel essai dans {delay:.2f} s."
+                )
+                time.sleep(delay)
+
+    @staticmethod
+    def coordinated(func):
+        """Décorateur: les appels à 'func' passent par WriteCoordinatorService.run."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return WriteCoordinatorService.run(func, *args, **kwargs)
+        return wrapper
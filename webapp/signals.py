@@ -1,7 +1,48 @@
 # webapp/signals.py
-from django.db.models.signals import pre_save
+import functools
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
 from django.dispatch import receiver
-from .models import Transaction # Importez le modèle Transaction depuis le même dossier
+from django.db import IntegrityError
+from django.contrib.auth.models import User
+from .models import Transaction, Category, Fund, Budget, Account, SavingGoal, Tag, HouseholdMember, UserProfile # Importez les modèles depuis le même dossier
+from .services.monthly_total_service import MonthlyTotalService
+from .services.transaction_stats_service import TransactionStatsService
+from .services.user_cache_service import UserCacheService
+from .services.category_tree_service import CategoryTreeService
+from .services.category_closure_service import CategoryClosureService
+from .services.permission_service import PermissionService
+from .services.sqlite_pragma_service import SqlitePragmaService
+from .services.delta_export_service import DeltaExportService
+
+_suspension = threading.local()
+
+@contextmanager
+def derived_data_updates_suspended():
+    """
+    Suspend, pour le thread courant, les receveurs marqués @unless_suspended (cumuls, compteurs,
+    table de fermeture, journal de l'export incrémental, caches). Réservé aux suppressions en masse
+    qui reconstruisent elles-mêmes ces données ensuite (voir BackupService.clear).
+    """
+    previous = getattr(_suspension, 'active', False)
+    _suspension.active = True
+    try:
+        yield
+    finally:
+        _suspension.active = previous
+
+def unless_suspended(receiver_function):
+    """Décorateur: le receveur n'est pas exécuté dans un bloc derived_data_updates_suspended()."""
+    @functools.wraps(receiver_function)
+    def wrapper(*args, **kwargs):
+        if getattr(_suspension, 'active', False):
+            return None
+        return receiver_function(*args, **kwargs)
+    return wrapper
 
 @receiver(pre_save, sender=Transaction)
 def normalize_transaction_amount(sender, instance, **kwargs):
@@ -15,3 +56,309 @@ def normalize_transaction_amount(sender, instance, **kwargs):
     elif instance.transaction_type == 'IN' and instance.amount < 0:
         instance.amount = abs(instance.amount)
 
+@receiver(pre_save, sender=Transaction)
+def remember_previous_monthly_total(sender, instance, raw=False, **kwargs):
+    """
+    Mémorise l'état de la transaction en base avant une mise à jour,
+    afin de pouvoir retirer son ancien montant des cumuls mensuels.
+    """
+    instance._previous_monthly_total = None
+    if raw or instance.pk is None:
+        return
+    previous = Transaction.objects.filter(pk=instance.pk).only(
+        'user_id', 'account_id', 'category_id', 'transaction_type', 'date', 'amount'
+    ).first()
+    if previous is not None:
+        instance._previous_monthly_total = MonthlyTotalService.snapshot(previous)
+
+@receiver(post_save, sender=Transaction)
+def update_monthly_total_on_save(sender, instance, raw=False, **kwargs):
+    """
+    Met à jour les cumuls mensuels (MonthlyCategoryTotal) et les compteurs de l'utilisateur
+    (UserTransactionStats) après la création ou la modification d'une transaction.
+    """
+    if raw:
+        return
+    current = MonthlyTotalService.snapshot(instance)
+    previous = getattr(instance, '_previous_monthly_total', None)
+    if previous == current:
+        return
+    if previous is not None:
+        MonthlyTotalService.apply(previous, sign=-1)
+        # Les tags ne changent pas lors d'un save(): ils suivent la transaction modifiée
+        tag_ids = MonthlyTotalService.get_tag_ids(instance)
+        MonthlyTotalService.apply_tags(previous, tag_ids, sign=-1)
+        MonthlyTotalService.apply_tags(current, tag_ids, sign=1)
+    MonthlyTotalService.apply(current, sign=1)
+    TransactionStatsService.apply(([(previous, -1)] if previous is not None else []) + [(current, 1)])
+
+@receiver(pre_delete, sender=Transaction)
+@unless_suspended
+def remember_transaction_tags_on_delete(sender, instance, **kwargs):
+    """
+    Mémorise les tags d'une transaction supprimée: les liens sont effacés
+    par la suppression en cascade, sans signal m2m_changed.
+    """
+    instance._deleted_tag_ids = MonthlyTotalService.get_tag_ids(instance)
+
+@receiver(post_delete, sender=Transaction)
+@unless_suspended
+def update_monthly_total_on_delete(sender, instance, **kwargs):
+    """
+    Retire une transaction supprimée des cumuls mensuels (par catégorie et par tag) et des compteurs.
+    """
+    snapshot = MonthlyTotalService.snapshot(instance)
+    MonthlyTotalService.apply(snapshot, sign=-1)
+    MonthlyTotalService.apply_tags(snapshot, getattr(instance, '_deleted_tag_ids', []), sign=-1)
+    TransactionStatsService.apply([(snapshot, -1)])
+
+@receiver(post_save, sender=Transaction)
+def record_transaction_change_on_save(sender, instance, raw=False, **kwargs):
+    """Inscrit une transaction créée ou modifiée au journal de l'export incrémental."""
+    if raw:
+        return
+    DeltaExportService.record_changes([(instance.user_id, instance.pk)])
+
+@receiver(post_delete, sender=Transaction)
+@unless_suspended
+def record_transaction_change_on_delete(sender, instance, origin=None, **kwargs):
+    """
+    Inscrit la suppression d'une transaction au journal de l'export incrémental.
+    Ignoré lorsque c'est l'utilisateur lui-même qui est supprimé.
+    """
+    if isinstance(origin, User) or getattr(origin, 'model', None) is User:
+        return
+    DeltaExportService.record_changes([(instance.user_id, instance.pk)], is_deletion=True)
+
+@receiver(m2m_changed, sender=Transaction.tags.through)
+def update_monthly_tag_totals_on_tags_change(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """
+    Met à jour les cumuls mensuels par tag lorsque des tags sont ajoutés à une transaction,
+    retirés ou effacés (depuis la transaction ou depuis le tag).
+    """
+    if action == 'pre_clear':
+        # Mémoriser les liens avant leur suppression
+        if reverse:
+            instance._cleared_transaction_ids = list(instance.transactions.values_list('pk', flat=True))
+        else:
+            instance._cleared_tag_ids = MonthlyTotalService.get_tag_ids(instance)
+        return
+    if action == 'post_clear':
+        sign = -1
+        pk_set = getattr(instance, '_cleared_transaction_ids' if reverse else '_cleared_tag_ids', [])
+    elif action in ('post_add', 'post_remove'):
+        sign = 1 if action == 'post_add' else -1
+    else:
+        return
+    if not pk_set:
+        return
+
+    if reverse:
+        # instance est un Tag, pk_set contient des transactions
+        for transaction in Transaction.objects.filter(pk__in=pk_set):
+            MonthlyTotalService.apply_tags(MonthlyTotalService.snapshot(transaction), [instance.pk], sign=sign)
+    else:
+        MonthlyTotalService.apply_tags(MonthlyTotalService.snapshot(instance), pk_set, sign=sign)
+    UserCacheService.bump_version_on_commit(instance.user_id)
+
+@receiver(pre_delete, sender=Category)
+@unless_suspended
+def move_monthly_totals_to_uncategorized(sender, instance, origin=None, **kwargs):
+    """
+    Les transactions d'une catégorie supprimée deviennent non catégorisées:
+    leurs cumuls mensuels et les compteurs de l'utilisateur sont mis à jour en conséquence.
+    Ignoré lorsque la suppression provient d'une cascade (utilisateur supprimé, etc.).
+    """
+    if isinstance(origin, Category) or getattr(origin, 'model', None) is Category:
+        TransactionStatsService.move_to_uncategorized(instance)
+        MonthlyTotalService.move_to_uncategorized(instance)
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_save, sender=Fund)
+@receiver(post_delete, sender=Fund)
+@receiver(post_save, sender=Budget)
+@receiver(post_delete, sender=Budget)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=SavingGoal)
+@receiver(post_delete, sender=SavingGoal)
+@unless_suspended
+def invalidate_user_data_cache(sender, instance, raw=False, **kwargs):
+    """
+    Incrémente la version des données de l'utilisateur propriétaire
+    pour invalider ses blocs en cache (tableau de bord, aperçu des budgets).
+    """
+    if raw:
+        return
+    UserCacheService.bump_version_on_commit(instance.user_id)
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=SavingGoal)
+@receiver(post_delete, sender=SavingGoal)
+@unless_suspended
+def invalidate_category_tree_cache(sender, instance, raw=False, **kwargs):
+    """
+    Invalide l'arbre des catégories en cache de l'utilisateur propriétaire
+    (nom, parent, indicateurs ou objectif d'épargne lié modifiés).
+    """
+    if raw:
+        return
+    CategoryTreeService.invalidate_on_commit(instance.user_id)
+
+@receiver(pre_save, sender=Category)
+def remember_previous_category_parent(sender, instance, raw=False, **kwargs):
+    """
+    Mémorise le parent et le nom actuels en base d'une catégorie modifiée, pour détecter un déplacement
+    ou un changement de nom.
+    Un déplacement sous l'un de ses propres descendants est refusé par Category.clean()
+    (erreur de formulaire); un enregistrement direct qui le tenterait échoue ici avec IntegrityError
+    plutôt que de corrompre la table de fermeture.
+    """
+    instance._previous_parent_id = None
+    instance._previous_name = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_parent_id, instance._previous_name = (
+        Category.objects.filter(pk=instance.pk).values_list('parent_id', 'name').first() or (None, None)
+    )
+    if instance.parent_id != instance._previous_parent_id and CategoryClosureService.would_create_cycle(instance, instance.parent_id):
+        raise IntegrityError(f"Boucle dans l'arbre des catégories: {instance.pk} sous son descendant {instance.parent_id}.")
+
+@receiver(post_save, sender=Category)
+def update_category_closure_on_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Met à jour la table de fermeture (CategoryClosure) à la création
+    ou au déplacement d'une catégorie.
+    """
+    if raw:
+        return
+    if created:
+        CategoryClosureService.insert(instance)
+    elif instance.parent_id != getattr(instance, '_previous_parent_id', instance.parent_id):
+        CategoryClosureService.move(instance)
+
+@receiver(post_save, sender=Category)
+def record_category_rename(sender, instance, created, raw=False, **kwargs):
+    """Le nom de la catégorie fait partie de l'export: ses transactions sont inscrites au journal de l'export incrémental."""
+    if raw or created or instance.name == getattr(instance, '_previous_name', instance.name):
+        return
+    DeltaExportService.record_queryset(Transaction.objects.filter(category=instance))
+
+@receiver(pre_delete, sender=Category)
+@unless_suspended
+def record_category_delete(sender, instance, origin=None, **kwargs):
+    """
+    Les transactions d'une catégorie supprimée deviennent non catégorisées (mise à jour en masse,
+    sans signal): elles sont inscrites au journal de l'export incrémental.
+    Ignoré lorsque la suppression provient d'une cascade (utilisateur supprimé, etc.).
+    """
+    if isinstance(origin, Category) or getattr(origin, 'model', None) is Category:
+        DeltaExportService.record_queryset(Transaction.objects.filter(category=instance))
+
+@receiver(pre_save, sender=Account)
+def remember_previous_account_export_fields(sender, instance, raw=False, **kwargs):
+    """Mémorise les colonnes exportées (nom, devise, type) d'un compte modifié."""
+    instance._previous_export_fields = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_export_fields = Account.objects.filter(pk=instance.pk).values_list(
+        'name', 'currency', 'account_type'
+    ).first()
+
+@receiver(post_save, sender=Account)
+def record_account_change(sender, instance, created, raw=False, **kwargs):
+    """Le nom, la devise et le type du compte font partie de l'export: ses transactions sont inscrites au journal."""
+    previous = getattr(instance, '_previous_export_fields', None)
+    if raw or created or previous is None or previous == (instance.name, instance.currency, instance.account_type):
+        return
+    DeltaExportService.record_queryset(Transaction.objects.filter(account=instance))
+
+@receiver(pre_delete, sender=Category)
+@unless_suspended
+def detach_category_closure_on_delete(sender, instance, origin=None, **kwargs):
+    """
+    Les sous-catégories d'une catégorie supprimée deviennent des catégories principales:
+    leur sous-arbre est détaché des anciens ancêtres.
+    Ignoré lorsque la suppression provient d'une cascade (utilisateur supprimé, etc.).
+    """
+    if isinstance(origin, Category) or getattr(origin, 'model', None) is Category:
+        CategoryClosureService.detach_subtree(instance)
+
+@receiver(post_save, sender=HouseholdMember)
+@receiver(post_delete, sender=HouseholdMember)
+def invalidate_household_access_scopes(sender, instance, raw=False, **kwargs):
+    """
+    Invalide les droits d'accès en cache du membre et des autres membres du ménage
+    (arrivée, départ ou changement de rôle d'un membre).
+    """
+    if raw:
+        return
+    member_ids = set(HouseholdMember.objects.filter(household_id=instance.household_id).values_list('user_id', flat=True))
+    for user_id in member_ids | {instance.user_id}:
+        PermissionService.invalidate_on_commit(user_id)
+
+@receiver(post_save, sender=UserProfile)
+def invalidate_access_scope(sender, instance, raw=False, **kwargs):
+    """Invalide les droits d'accès en cache lorsque le profil (indicateurs de partage) change."""
+    if raw:
+        return
+    PermissionService.invalidate_on_commit(instance.user_id)
+
+@receiver(pre_save, sender=User)
+def remember_previous_superuser_flag(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Mémorise l'indicateur superutilisateur actuel en base, seul champ de l'utilisateur repris dans les droits d'accès.
+    Rien à lire lorsque l'enregistrement ne le modifie pas (ex: mise à jour de last_login à la connexion).
+    """
+    instance._previous_is_superuser = None
+    if raw or instance.pk is None or (update_fields is not None and 'is_superuser' not in update_fields):
+        return
+    instance._previous_is_superuser = User.objects.filter(pk=instance.pk).values_list('is_superuser', flat=True).first()
+
+@receiver(post_save, sender=User)
+def invalidate_access_scope_on_superuser_change(sender, instance, created, raw=False, **kwargs):
+    """
+    Invalide les droits d'accès en cache à la création de l'utilisateur ou lorsque is_superuser change.
+    Les autres enregistrements (connexion, profil de compte) gardent la session et les droits de lecture.
+    """
+    previous = getattr(instance, '_previous_is_superuser', None)
+    if raw or (not created and (previous is None or previous == instance.is_superuser)):
+        return
+    PermissionService.invalidate_on_commit(instance.pk)
+
+@receiver(m2m_changed, sender=UserProfile.shared_with_users.through)
+def invalidate_access_scope_on_sharing_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalide les droits d'accès en cache lorsque les utilisateurs avec qui un profil partage changent."""
+    if not reverse:
+        if action.startswith('post_'):
+            PermissionService.invalidate_on_commit(instance.user_id)
+        return
+    # Depuis l'utilisateur destinataire: pk_set contient des identifiants de profils
+    if action == 'pre_clear':
+        instance._sharing_profile_ids = set(instance.shared_access_from.values_list('pk', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_sharing_profile_ids', set())
+    elif not action.startswith('post_'):
+        return
+    for user_id in UserProfile.objects.filter(pk__in=pk_set).values_list('user_id', flat=True):
+        PermissionService.invalidate_on_commit(user_id)
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """
+    Applique les PRAGMA du profil SQLite (settings.SQLITE_PRAGMAS) à chaque nouvelle connexion.
+    Avec des connexions persistantes (CONN_MAX_AGE), cela n'arrive qu'une fois par connexion et non par requête.
+    Les noms et valeurs sont vérifiés (SqlitePragmaService.ALLOWED_PRAGMAS) avant d'être exécutés.
+    """
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for statement in SqlitePragmaService.get_statements(settings.SQLITE_PRAGMAS):
+            cursor.execute(statement)
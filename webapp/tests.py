@@ -1,3 +1,598 @@
-from django.test import TestCase
+import base64
+import io
+import json
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest.mock import patch
 
-# Create your tests here.
+import numpy as np
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from webapp.management.commands.check_query_budgets import Command as CheckQueryBudgetsCommand
+from webapp.middleware.query_instrumentation_middleware import QueryRecorder
+from webapp.models import (
+    Account, Allocation, AllocationLine, Budget, CategorizationRule, Category, CategoryClosure, Fund,
+    FundDebitLine, FundDebitRecord, Household, HouseholdMember, MonthlyCategoryTotal, MonthlyTagTotal, SavingGoal, Tag,
+    Transaction, TransactionChange, TransactionVisibilityGrant, UserTransactionStats,
+)
+from webapp.services.backup_service import BackupService
+from webapp.services.budget_overview_service import BudgetOverviewService
+from webapp.services.category_closure_service import CategoryClosureService
+from webapp.services.category_tree_service import CategoryTreeService
+from webapp.services.delta_export_service import DeltaExportService
+from webapp.services.monthly_total_service import MonthlyTotalService
+from webapp.services.permission_service import PermissionService
+from webapp.services.recurring_detection_service import RecurringDetectionService
+from webapp.services.transaction_page_service import InvalidCursorError
+from webapp.services.sqlite_pragma_service import SqlitePragmaService
+from webapp.services.transaction_stats_service import TransactionStatsService
+from webapp.services.user_cache_service import UserCacheService
+from webapp.views import budgets as budgets_views
+
+def create_budget_data(username, parent_count, children_per_parent=2):
+    """
+    Crée un utilisateur avec parent_count catégories parentes (un budget chacune, une sur quatre gérée
+    comme un fonds) et leurs sous-catégories, chacune avec deux transactions dans l'année.
+    """
+    user = User.objects.create(username=username)
+    account = Account.objects.create(user=user, name="Compte courant")
+    year = date.today().year
+    for index in range(parent_count):
+        parent = Category.objects.create(user=user, name=f"Catégorie {index}", is_budgeted=True)
+        Budget.objects.create(user=user, category=parent, amount=Decimal('500.00'), start_date=date(year, 1, 1))
+        for child_index in range(children_per_parent):
+            child = Category.objects.create(
+                user=user, name=f"Catégorie {index}.{child_index}", parent=parent,
+                is_fund_managed=index % 4 == 0,
+            )
+            for day in (1, 2):
+                Transaction.objects.create(
+                    user=user, account=account, category=child, date=date(year, 1, day),
+                    description=f"Achat {index}.{child_index}", amount=Decimal('-12.50'), transaction_type='OUT',
+                )
+    return user
+
+class BudgetOverviewServiceTests(TestCase):
+    """L'aperçu des budgets est calculé en un nombre constant de requêtes, quel que soit le nombre de catégories."""
+    # Catégories; évaluation des budgets (arbre des catégories, budgets, dépenses groupées); cumuls groupés par catégorie
+    EXPECTED_QUERIES = 5
+
+    def test_query_count_does_not_grow_with_categories(self):
+        today = date.today()
+        small_user = create_budget_data("aperçu-petit", parent_count=2)
+        large_user = create_budget_data("aperçu-grand", parent_count=22)  # 66 catégories et 22 budgets
+        self.assertGreaterEqual(Category.objects.filter(user=large_user).count(), 60)
+
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            small_overview = BudgetOverviewService.build(small_user, today)
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            large_overview = BudgetOverviewService.build(large_user, today)
+
+        self.assertGreater(len(large_overview['monthly_category_summary_data']), len(small_overview['monthly_category_summary_data']))
+
+class BudgetOverviewViewTests(TestCase):
+    """Revenus et dépenses du mois de l'aperçu des budgets (webapp/views/budgets.py): selon le type de transaction, transferts exclus."""
+
+    def test_transfers_are_not_income_or_expense(self):
+        user = User.objects.create(username="aperçu-transferts")
+        checking = Account.objects.create(user=user, name="Compte courant")
+        savings = Account.objects.create(user=user, name="Épargne", account_type='EP')
+        today = date.today()
+        for account, amount, transaction_type in (
+            (checking, Decimal('4000.00'), 'IN'),
+            (checking, Decimal('-150.00'), 'OUT'),
+            (checking, Decimal('-500.00'), 'TRF'),
+            (savings, Decimal('500.00'), 'TRF'),
+        ):
+            Transaction.objects.create(
+                user=user, account=account, date=today, description="Virement épargne" if transaction_type == 'TRF' else "Mouvement",
+                amount=amount, transaction_type=transaction_type,
+            )
+        request = RequestFactory().get('/')
+        request.user = user
+        with patch('webapp.views.budgets.render') as render:
+            budgets_views.budget_overview(request)
+        context = render.call_args.args[2]
+        self.assertEqual(context['total_income_month'], Decimal('4000.00'))
+        self.assertEqual(context['total_expense_month'], Decimal('150.00'))
+
+def build_recurring_columns(group_count, occurrences):
+    """
+    Colonnes au format de RecurringDetectionService.load() pour group_count libellés de occurrences
+    transactions chacun: intervalles hebdomadaires, mensuels, trimestriels, annuels ou irréguliers (13 jours),
+    avec une référence variable dans le libellé (ex: 'abonnement bcd 0012').
+    """
+    rng = np.random.default_rng(42)
+    steps = rng.choice([7, 30, 91, 365, 13], size=group_count)
+    groups = np.repeat(np.arange(group_count), occurrences)
+    occurrence = np.tile(np.arange(occurrences), group_count)
+    letters = [''.join(chr(97 + int(digit)) for digit in str(group)) for group in range(group_count)]
+    return {
+        'date': 16000 + rng.integers(0, 30, size=group_count)[groups] + steps[groups] * occurrence,
+        'amount': np.full(len(groups), -10.0),
+        'description': np.array([f"ABONNEMENT {letters[group]} {index % 100:04d}" for group, index in zip(groups, occurrence)]),
+        'transaction_type': np.full(len(groups), 'OUT'),
+        'account_id': np.ones(len(groups), dtype=object),
+        'category_id': np.full(len(groups), None, dtype=object),
+    }
+
+class RecurringDetectionServiceTests(TestCase):
+    """Détection des séries récurrentes sur des colonnes NumPy."""
+
+    def test_detects_regular_intervals_only(self):
+        columns = build_recurring_columns(group_count=50, occurrences=12)
+        series = RecurringDetectionService.detect_series(columns, date(2100, 1, 1))
+        irregular = {
+            f"abonnement {''.join(chr(97 + int(digit)) for digit in str(group))}"
+            for group in range(50) if columns['date'][group * 12 + 1] - columns['date'][group * 12] == 13
+        }
+        self.assertTrue(series)
+        self.assertFalse(irregular & {values['description_key'] for values in series})
+        self.assertEqual({values['occurrence_count'] for values in series}, {12})
+
+    def test_detects_100k_transactions(self):
+        # Correction uniquement: la durée du calcul est affichée par la commande detect_recurring_series
+        columns = build_recurring_columns(group_count=2000, occurrences=50)
+        series = RecurringDetectionService.detect_series(columns, date(2100, 1, 1))
+        regular_count = sum(
+            1 for group in range(2000) if columns['date'][group * 50 + 1] - columns['date'][group * 50] != 13
+        )
+        self.assertEqual(len(series), regular_count)
+        self.assertEqual({values['occurrence_count'] for values in series}, {50})
+
+class SqlitePragmaServiceTests(TestCase):
+    """Les PRAGMA des profils SQLite sont vérifiés contre la liste autorisée avant d'être exécutés."""
+
+    def test_production_profile_is_allowed(self):
+        from django.conf import settings
+        statements = SqlitePragmaService.get_statements(settings.SQLITE_PROFILES['production']['PRAGMAS'])
+        self.assertIn("PRAGMA journal_mode = WAL", statements)
+        self.assertIn("PRAGMA cache_size = -64000", statements)
+
+    def test_rejects_unknown_names_and_values(self):
+        for pragmas in (
+            {'writable_schema': 'ON'},
+            {'journal_mode': 'WAL; DROP TABLE webapp_transaction'},
+            {'busy_timeout': '5000; DROP TABLE webapp_transaction'},
+            {'busy_timeout': True},
+        ):
+            with self.subTest(pragmas=pragmas), self.assertRaises(ImproperlyConfigured):
+                SqlitePragmaService.get_statements(pragmas)
+
+class QueryBudgetMixin:
+    """
+    assertQueryBudget: vérifie qu'une page répond sans dépasser un nombre maximal de requêtes SQL.
+    Le cache de l'utilisateur est vidé avant la mesure (cas le plus coûteux); en cas d'échec,
+    les requêtes répétées (boucles N+1 probables) sont listées dans le message.
+    """
+    DUPLICATE_THRESHOLD = 3
+
+    def assertQueryBudget(self, url, budget, user=None):
+        user = user or self.user
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(user)
+        for namespace in [UserCacheService.DEFAULT_NAMESPACE, CategoryTreeService.CACHE_NAMESPACE, PermissionService.CACHE_NAMESPACE]:
+            UserCacheService.bump_version(user.pk, namespace)
+        with QueryRecorder() as recorder:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, f"{url}: réponse HTTP {response.status_code}")
+        duplicates = "".join(
+            f"\n    {group['count']}x [{fingerprint}] {group['sql'][:160]}"
+            for fingerprint, group in recorder.duplicates(self.DUPLICATE_THRESHOLD).items()
+        )
+        self.assertLessEqual(recorder.count, budget, f"{url}: {recorder.count} requête(s) pour un budget de {budget}.{duplicates}")
+        return response
+
+class ViewQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Les pages principales restent sous leur budget de requêtes (budgets de la commande check_query_budgets)."""
+    BUDGETS = {url_name: budget for url_name, kwargs, budget in CheckQueryBudgetsCommand.QUERY_BUDGETS}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CheckQueryBudgetsCommand().create_dataset(transaction_count=500)
+
+    def assertViewQueryBudget(self, url_name):
+        self.assertQueryBudget(reverse(url_name), self.BUDGETS[url_name])
+
+    def test_dashboard(self):
+        self.assertViewQueryBudget('dashboard_view')
+
+    def test_budget_overview(self):
+        self.assertViewQueryBudget('budget_overview')
+
+    def test_recap_overview(self):
+        self.assertViewQueryBudget('recap_overview_view')
+
+    def test_category_transactions_summary(self):
+        self.assertViewQueryBudget('category_transactions_summary_view')
+
+    def test_all_transactions_summary(self):
+        self.assertViewQueryBudget('all_transactions_summary_view')
+
+    def test_all_transactions_summary_data(self):
+        self.assertViewQueryBudget('all_transactions_summary_data')
+
+    def test_review_transactions(self):
+        self.assertViewQueryBudget('review_transactions_view')
+
+def encode_test_cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+class TransactionPageDataTests(TestCase):
+    """Les paramètres invalides de la liste paginée des transactions renvoient une erreur 400, jamais une 500."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_budget_data("pagination", parent_count=1)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get_data(self, **params):
+        return self.client.get(reverse('all_transactions_summary_data'), params)
+
+    def test_page_size_is_clamped(self):
+        response = self.get_data(page_size=-5)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['transactions']), 1)
+        self.assertIsNotNone(response.json()['next_cursor'])
+
+    def test_next_cursor_returns_following_page(self):
+        first = self.get_data(page_size=3).json()
+        second = self.get_data(page_size=3, cursor=first['next_cursor']).json()
+        self.assertEqual(len(second['transactions']), 1)
+        self.assertFalse({row['id'] for row in first['transactions']} & {row['id'] for row in second['transactions']})
+
+    def test_invalid_parameters_return_400(self):
+        for params in (
+            {'page_size': 'abc'},
+            {'category': 'abc'},
+            {'cursor': 'pas-un-curseur'},
+            {'cursor': encode_test_cursor(['-date', 5])},
+            {'cursor': encode_test_cursor(['-date', [None, None, None]])},
+            {'cursor': encode_test_cursor(['-date', ['2024-01-01']])},
+            {'cursor': encode_test_cursor({'sort': '-date'})},
+            {'cursor': encode_test_cursor(['amount', ['1.00', 1]])},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.get_data(**params).status_code, 400)
+
+class DeltaExportServiceTests(TestCase):
+    """Export incrémental: curseur sur le journal des modifications, suppressions et écritures validées tardivement."""
+
+    def setUp(self):
+        self.user = User.objects.create(username="export")
+        self.account = Account.objects.create(user=self.user, name="Compte courant")
+        self.category = Category.objects.create(user=self.user, name="Courses")
+
+    def create_transaction(self, description, category=None):
+        return Transaction.objects.create(
+            user=self.user, account=self.account, category=category or self.category, date=date(2024, 1, 15),
+            description=description, amount=Decimal('-10.00'), transaction_type='OUT',
+        )
+
+    def exported_ids(self, delta):
+        return set(delta['transactions'].values_list('id', flat=True)), set(delta['deletions'].values_list('transaction_id', flat=True))
+
+    def test_cursor_returns_only_later_changes(self):
+        first = self.create_transaction("Migros")
+        second = self.create_transaction("Coop")
+        delta = DeltaExportService.get_delta(self.user)
+        self.assertEqual(self.exported_ids(delta), ({first.pk, second.pk}, set()))
+
+        delta = DeltaExportService.get_delta(self.user, delta['cursor'])
+        self.assertEqual(self.exported_ids(delta), (set(), set()))
+
+        first.description = "Migros Genève"
+        first.save()
+        delta = DeltaExportService.get_delta(self.user, delta['cursor'])
+        self.assertEqual(self.exported_ids(delta), ({first.pk}, set()))
+
+    def test_deletions_are_exported_once(self):
+        transaction = self.create_transaction("Migros")
+        cursor = DeltaExportService.get_delta(self.user)['cursor']
+        transaction_id = transaction.pk
+        transaction.delete()
+
+        delta = DeltaExportService.get_delta(self.user, cursor)
+        self.assertEqual(self.exported_ids(delta), (set(), {transaction_id}))
+        delta = DeltaExportService.get_delta(self.user, delta['cursor'])
+        self.assertEqual(self.exported_ids(delta), (set(), set()))
+
+    def test_write_committed_after_cursor_is_not_skipped(self):
+        cursor = DeltaExportService.get_delta(self.user)['cursor']
+        # Écriture horodatée avant l'export précédent mais validée après (import long): suivie par le journal, pas par l'heure
+        transaction = self.create_transaction("Import")
+        Transaction.objects.filter(pk=transaction.pk).update(updated_at=datetime(2000, 1, 1, tzinfo=dt_timezone.utc))
+
+        delta = DeltaExportService.get_delta(self.user, cursor)
+        self.assertEqual(self.exported_ids(delta), ({transaction.pk}, set()))
+
+    def test_category_and_account_changes_are_exported(self):
+        transaction = self.create_transaction("Migros")
+        cursor = DeltaExportService.get_delta(self.user)['cursor']
+
+        self.category.name = "Alimentation"
+        self.category.save()
+        delta = DeltaExportService.get_delta(self.user, cursor)
+        self.assertEqual(self.exported_ids(delta), ({transaction.pk}, set()))
+
+        self.account.currency = 'EUR'
+        self.account.save()
+        delta = DeltaExportService.get_delta(self.user, delta['cursor'])
+        self.assertEqual(self.exported_ids(delta), ({transaction.pk}, set()))
+
+        self.category.delete()
+        delta = DeltaExportService.get_delta(self.user, delta['cursor'])
+        self.assertEqual(self.exported_ids(delta), ({transaction.pk}, set()))
+        self.assertIsNone(delta['transactions'].get().category_id)
+
+    def test_invalid_cursor(self):
+        for cursor in ('pas-un-curseur', encode_test_cursor({'s': -1}), encode_test_cursor({'s': '3'}), encode_test_cursor([1])):
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidCursorError):
+                DeltaExportService.get_delta(self.user, cursor)
+
+    def test_view_returns_next_cursor(self):
+        transaction = self.create_transaction("Migros")
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('export_transactions_delta'), {'format': 'jsonl'})
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([(line['op'], line['id']) for line in lines], [('upsert', transaction.pk)])
+
+        transaction_id = transaction.pk
+        transaction.delete()
+        response = self.client.get(reverse('export_transactions_delta'), {'format': 'jsonl', 'since': response['X-Export-Cursor']})
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([(line['op'], line['id']) for line in lines], [('delete', transaction_id)])
+        self.assertEqual(self.client.get(reverse('export_transactions_delta'), {'since': 'abc'}).status_code, 400)
+
+def backup_snapshot(user):
+    """Données de l'utilisateur couvertes par la sauvegarde, sans identifiants (comparables après restauration)."""
+    return {
+        'accounts': sorted(Account.objects.filter(user=user).values_list('name', 'account_type', 'initial_balance', 'is_shared')),
+        'categories': sorted(Category.objects.filter(user=user).values_list('name', 'parent__name', 'is_budgeted', 'is_fund_managed'), key=str),
+        'transactions': sorted(Transaction.objects.filter(user=user).values_list(
+            'description', 'amount', 'date', 'transaction_type', 'account__name', 'category__name'
+        ), key=str),
+        'transaction_tags': sorted(Transaction.tags.through.objects.filter(transaction__user=user).values_list('transaction__description', 'tag__name')),
+        'allocation_lines': sorted(AllocationLine.objects.filter(user=user).values_list('allocation__transaction__description', 'category__name', 'amount')),
+        'fund_debit_lines': sorted(FundDebitLine.objects.filter(user=user).values_list('fund_debit_record__transaction__description', 'category__name', 'amount')),
+        'funds': sorted(Fund.objects.filter(user=user).values_list('category__name', 'current_balance')),
+        'budgets': sorted(Budget.objects.filter(user=user).values_list('category__name', 'amount', 'start_date')),
+        'saving_goals': sorted(SavingGoal.objects.filter(user=user).values_list('name', 'category__name', 'target_amount')),
+        'rules': sorted(CategorizationRule.objects.filter(user=user).values_list('description_pattern', 'suggested_category__name', 'suggested_tags__name'), key=str),
+        'monthly_totals': sorted(MonthlyCategoryTotal.objects.filter(user=user).values_list(
+            'account__name', 'category__name', 'transaction_type', 'year', 'month', 'income', 'expense', 'count'
+        ), key=str),
+        'closure_links': CategoryClosure.objects.filter(descendant__user=user).count(),
+    }
+
+class BackupServiceTests(TestCase):
+    """Sauvegarde puis restauration en remplacement des données d'un utilisateur."""
+
+    def setUp(self):
+        self.user = User.objects.create(username="sauvegarde")
+        account = Account.objects.create(user=self.user, name="Compte courant", initial_balance=Decimal('10.50'))
+        housing = Category.objects.create(user=self.user, name="Logement", is_budgeted=True)
+        rent = Category.objects.create(user=self.user, name="Loyer", parent=housing, is_fund_managed=True)
+        tag = Tag.objects.create(user=self.user, name="fixe")
+        expense = Transaction.objects.create(
+            user=self.user, account=account, category=rent, date=date(2024, 1, 5),
+            description="Loyer janvier", amount=Decimal('-1200.00'), transaction_type='OUT',
+        )
+        expense.tags.add(tag)
+        income = Transaction.objects.create(
+            user=self.user, account=account, date=date(2024, 1, 25),
+            description="Salaire", amount=Decimal('5000.00'), transaction_type='IN',
+        )
+        allocation = Allocation.objects.create(user=self.user, transaction=income, total_allocated_amount=Decimal('1200.00'))
+        AllocationLine.objects.create(user=self.user, allocation=allocation, category=rent, amount=Decimal('1200.00'))
+        debit = FundDebitRecord.objects.create(user=self.user, transaction=expense, total_debited_amount=Decimal('1200.00'))
+        FundDebitLine.objects.create(user=self.user, fund_debit_record=debit, category=rent, amount=Decimal('1200.00'))
+        Fund.objects.create(user=self.user, category=rent, current_balance=Decimal('0.00'))
+        Budget.objects.create(user=self.user, category=housing, amount=Decimal('1500.00'), start_date=date(2024, 1, 1))
+        SavingGoal.objects.create(user=self.user, name="Caution", category=housing, target_amount=Decimal('3600.00'), target_date=date(2025, 1, 1))
+        rule = CategorizationRule.objects.create(user=self.user, description_pattern="Loyer", suggested_category=rent)
+        rule.suggested_tags.add(tag)
+
+    def test_export_replace_restore_round_trip(self):
+        before = backup_snapshot(self.user)
+        old_ids = set(Transaction.objects.filter(user=self.user).values_list('id', flat=True))
+        cursor = DeltaExportService.get_delta(self.user)['cursor']
+        archive = io.StringIO()
+        BackupService.write_archive(self.user, archive)
+
+        archive.seek(0)
+        with self.assertRaises(ValueError):
+            BackupService.restore_archive(self.user, archive)
+        archive.seek(0)
+        counts = BackupService.restore_archive(self.user, archive, replace=True)
+
+        self.assertEqual(counts['transaction'], 2)
+        self.assertEqual(backup_snapshot(self.user), before)
+        # Identifiants attribués par la base, jamais réutilisés
+        new_ids = set(Transaction.objects.filter(user=self.user).values_list('id', flat=True))
+        self.assertGreater(min(new_ids), max(old_ids))
+        # Les clients de l'export incrémental voient les suppressions puis les nouvelles transactions
+        delta = DeltaExportService.get_delta(self.user, cursor)
+        self.assertEqual(set(delta['deletions'].values_list('transaction_id', flat=True)), old_ids)
+        self.assertEqual(set(delta['transactions'].values_list('id', flat=True)), new_ids)
+
+    def test_replace_detaches_other_users_transactions(self):
+        member = User.objects.create(username="membre")
+        member_account = Account.objects.create(user=member, name="Compte du membre")
+        shared_category = Category.objects.get(user=self.user, name="Loyer")
+        transaction = Transaction.objects.create(
+            user=member, account=member_account, category=shared_category, date=date(2024, 1, 6),
+            description="Part du loyer", amount=Decimal('-600.00'), transaction_type='OUT',
+        )
+        cursor = DeltaExportService.get_delta(member)['cursor']
+        archive = io.StringIO()
+        BackupService.write_archive(self.user, archive)
+        archive.seek(0)
+        BackupService.restore_archive(self.user, archive, replace=True)
+
+        transaction.refresh_from_db()
+        self.assertIsNone(transaction.category_id)
+        self.assertEqual(
+            list(MonthlyCategoryTotal.objects.filter(user=member).values_list('category_id', 'expense')),
+            [(None, Decimal('-600.00'))],
+        )
+        self.assertEqual(set(DeltaExportService.get_delta(member, cursor)['transactions'].values_list('id', flat=True)), {transaction.pk})
+
+class DerivedDataRebuildTests(TestCase):
+    """Les tables dénormalisées tenues à jour par les signaux sont identiques à leur reconstruction complète."""
+
+    def setUp(self):
+        self.user = User.objects.create(username="dénormalisé")
+        self.checking = Account.objects.create(user=self.user, name="Compte courant")
+        self.savings = Account.objects.create(user=self.user, name="Livret")
+        self.housing = Category.objects.create(user=self.user, name="Logement")
+        self.rent = Category.objects.create(user=self.user, name="Loyer", parent=self.housing)
+        self.food = Category.objects.create(user=self.user, name="Alimentation")
+        self.groceries = Category.objects.create(user=self.user, name="Courses", parent=self.food)
+        self.tag = Tag.objects.create(user=self.user, name="fixe")
+        # Compteurs créés avant les écritures: elles passent ensuite par la mise à jour incrémentale
+        TransactionStatsService.get(self.user)
+
+    def create_transaction(self, category, amount, day, transaction_type='OUT', account=None, year=2024):
+        return Transaction.objects.create(
+            user=self.user, account=account or self.checking, category=category, date=date(year, 1, day),
+            description=f"Transaction {day}", amount=Decimal(amount), transaction_type=transaction_type,
+        )
+
+    def monthly_totals(self):
+        return {
+            'categories': sorted(MonthlyCategoryTotal.objects.filter(user=self.user).values_list(
+                'account_id', 'category_id', 'transaction_type', 'year', 'month', 'income', 'expense', 'count'
+            ), key=str),
+            'tags': sorted(MonthlyTagTotal.objects.filter(user=self.user).values_list(
+                'tag_id', 'transaction_type', 'year', 'month', 'income', 'expense', 'count'
+            ), key=str),
+        }
+
+    def closure_links(self):
+        return sorted(CategoryClosure.objects.filter(descendant__user=self.user).values_list('ancestor_id', 'descendant_id', 'depth'))
+
+    def transaction_stats(self):
+        stats = UserTransactionStats.objects.get(pk=self.user.pk)
+        return stats.total_count, stats.uncategorized_count, stats.yearly_totals
+
+    def assertMatchesRebuild(self, snapshot, rebuild):
+        incremental = snapshot()
+        rebuild()
+        self.assertEqual(incremental, snapshot())
+
+    def test_monthly_totals_and_stats_after_writes(self):
+        rent = self.create_transaction(self.rent, '-900.00', 5)
+        rent.tags.add(self.tag)
+        groceries = self.create_transaction(self.groceries, '-80.00', 6)
+        salary = self.create_transaction(None, '2500.00', 25, transaction_type='IN')
+        self.create_transaction(None, '-300.00', 10, transaction_type='TRF')
+        self.create_transaction(None, '300.00', 10, transaction_type='TRF', account=self.savings)
+
+        # Modification du montant, du type, de la catégorie, du compte et de la période
+        rent.amount = Decimal('-950.00')
+        rent.save()
+        groceries.category = self.rent
+        groceries.account = self.savings
+        groceries.date = date(2023, 12, 30)
+        groceries.save()
+        salary.category = self.food
+        salary.save()
+        salary.amount = Decimal('40.00')
+        salary.transaction_type = 'OUT'
+        salary.save()
+        rent.tags.remove(self.tag)
+        groceries.tags.add(self.tag)
+        # Suppression, puis une ligne de cumul vidée
+        rent.delete()
+        self.create_transaction(self.groceries, '-12.00', 7).delete()
+
+        self.assertMatchesRebuild(self.monthly_totals, lambda: MonthlyTotalService.rebuild(user=self.user))
+        self.assertMatchesRebuild(self.transaction_stats, lambda: TransactionStatsService.rebuild(user=self.user))
+
+    def test_category_delete_merges_into_uncategorized(self):
+        self.create_transaction(self.groceries, '-80.00', 6)
+        self.create_transaction(self.groceries, '-20.00', 8)
+        # Une ligne 'non catégorisée' existe déjà pour ce mois: les cumuls y sont ajoutés
+        self.create_transaction(None, '-5.00', 9)
+        self.create_transaction(self.rent, '-900.00', 5).tags.add(self.tag)
+
+        self.groceries.delete()
+        self.housing.delete()
+
+        self.assertMatchesRebuild(self.monthly_totals, lambda: MonthlyTotalService.rebuild(user=self.user))
+        self.assertMatchesRebuild(self.transaction_stats, lambda: TransactionStatsService.rebuild(user=self.user))
+
+    def test_closure_after_moves_and_deletes(self):
+        bakery = Category.objects.create(user=self.user, name="Boulangerie", parent=self.groceries)
+
+        # Déplacement d'un sous-arbre, passage à la racine, puis suppression d'un nœud intermédiaire
+        self.food.parent = self.housing
+        self.food.save()
+        self.rent.parent = None
+        self.rent.save()
+        self.groceries.delete()
+        bakery.refresh_from_db()
+        self.assertIsNone(bakery.parent_id)
+        self.housing.delete()
+
+        self.assertMatchesRebuild(self.closure_links, lambda: CategoryClosureService.rebuild(user=self.user))
+
+    def test_visibility_grants_after_membership_changes(self):
+        partner = User.objects.create(username="conjoint")
+        roommate = User.objects.create(username="colocataire")
+        users = (self.user, partner, roommate)
+
+        def grants():
+            return sorted(TransactionVisibilityGrant.objects.filter(viewer__in=users).values_list('viewer_id', 'owner_id', 'scope'))
+
+        def rebuild():
+            TransactionVisibilityGrant.objects.filter(viewer__in=users).delete()
+            for user in users:
+                PermissionService.rebuild_visibility_grants(user=user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            couple = Household.objects.create(name="Couple", household_type='COUPLE_SHARED')
+            HouseholdMember.objects.create(household=couple, user=self.user, role='ADMIN')
+            HouseholdMember.objects.create(household=couple, user=partner)
+            couple.apply_sharing_settings()
+            flat = Household.objects.create(name="Colocation", household_type='ROOMMATES')
+            HouseholdMember.objects.create(household=flat, user=self.user)
+            roommate_membership = HouseholdMember.objects.create(household=flat, user=roommate)
+            flat.apply_sharing_settings()
+        self.assertMatchesRebuild(grants, rebuild)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            roommate_membership.delete()
+            couple.household_type = 'COUPLE_SEPARATE'
+            couple.save()
+            couple.apply_sharing_settings()
+        self.assertMatchesRebuild(grants, rebuild)
+        self.assertNotIn(roommate.pk, TransactionVisibilityGrant.objects.filter(viewer=self.user).values_list('owner_id', flat=True))
+
+class AccessScopeInvalidationTests(TestCase):
+    """Les droits d'accès d'un utilisateur ne sont invalidés que lorsque is_superuser change."""
+
+    def setUp(self):
+        self.user = User.objects.create(username="connexion")
+
+    def test_login_does_not_resync_grants(self):
+        with patch.object(PermissionService, 'sync_visibility_grants') as sync:
+            with self.captureOnCommitCallbacks(execute=True):
+                Client().force_login(self.user)
+                self.user.first_name = "Alice"
+                self.user.save()
+        sync.assert_not_called()
+
+    def test_superuser_change_resyncs_grants(self):
+        with patch.object(PermissionService, 'sync_visibility_grants') as sync:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.user.is_superuser = True
+                self.user.save(update_fields=['is_superuser'])
+        sync.assert_called_once_with(self.user)
@@ -1,14 +1,18 @@
 # webapp/urls.py
 from django.urls import path
-from webapp.views.dashboard_views import dashboard_view, budget_overview, glossary_view
+from webapp.views.dashboard_views import dashboard_view, budget_overview, budget_evaluation_data, cash_flow_forecast_data, glossary_view
 from webapp.views.summary_views import (
     recap_overview_view,
     category_transactions_summary_view,
+    category_transactions_summary_data,
     all_transactions_summary_view,
+    all_transactions_summary_data,
     review_transactions_view
 )
 from webapp.views.imports import import_transactions_view
-from webapp.views.exports import export_transactions_csv
+from webapp.views.exports import export_transactions_csv, export_transactions_delta
+from webapp.views.category_views import category_tree_data
+from webapp.views.analytics_views import analytics_cube_data
 from webapp.views import transaction_actions
 from webapp.views.household_views import (
     household_list_view,
@@ -25,11 +29,14 @@ urlpatterns = [
     # Dashboard
     path('', dashboard_view, name='dashboard_view'),
     path('budget-overview/', budget_overview, name='budget_overview'),
+    path('budget-overview/evaluation/', budget_evaluation_data, name='budget_evaluation_data'),
+    path('forecast/', cash_flow_forecast_data, name='cash_flow_forecast_data'),
     path('glossary/', glossary_view, name='glossary_view'),
     
     # Import/Export
     path('import-transactions/', import_transactions_view, name='import_transactions_view'),
     path('export-transactions-csv/', export_transactions_csv, name='export_transactions_csv'),
+    path('export-transactions-delta/', export_transactions_delta, name='export_transactions_delta'),
     
     # Transaction Actions
     path('get-transaction-form/<int:transaction_id>/', transaction_actions.get_transaction_form, name='get_transaction_form'),
@@ -38,12 +45,18 @@ urlpatterns = [
     path('delete-selected-transactions/', transaction_actions.delete_selected_transactions, name='delete_selected_transactions'),
     path('suggest-categorization/', transaction_actions.suggest_transaction_categorization, name='suggest_transaction_categorization'),
     
+    # Catégories
+    path('categories/tree/', category_tree_data, name='category_tree_data'),
+    
     # Summary Views
     path('recap-overview/', recap_overview_view, name='recap_overview_view'),
     path('category-transactions-summary/', category_transactions_summary_view, name='category_transactions_summary_view'),
     path('category-transactions-summary/<int:year>/', category_transactions_summary_view, name='category_transactions_summary_view'),
     path('category-transactions-summary/<int:year>/<int:month>/', category_transactions_summary_view, name='category_transactions_summary_view'),
+    path('category-transactions-summary/data/', category_transactions_summary_data, name='category_transactions_summary_data'),
     path('all-transactions-summary/', all_transactions_summary_view, name='all_transactions_summary_view'),
+    path('all-transactions-summary/data/', all_transactions_summary_data, name='all_transactions_summary_data'),
+    path('analytics/cube/', analytics_cube_data, name='analytics_cube_data'),
     path('review-transactions/', review_transactions_view, name='review_transactions_view'),
     
     # Household Management
@@ -20,4 +20,4 @@ from .transaction_actions import (
     delete_selected_transactions
 )
 
-from .exports import export_transactions_csv
+from .exports import export_transactions_csv, export_transactions_delta
@@ -0,0 +1,60 @@
+# webapp/views/analytics_views.py
+from datetime import date
+
+from django.http import JsonResponse
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_GET
+
+from webapp.models import Transaction
+from webapp.services.analytics_service import AnalyticsService
+from webapp.services.period_service import PeriodService
+
+def _parse_month(value):
+    """Lit un mois au format AAAA-MM et retourne le premier jour du mois."""
+    year, month = value.split('-')
+    return date(int(year), int(month), 1)
+
+def _get_cube_request(params):
+    """
+    Lit les paramètres GET du cube:
+    group_by (liste d'axes séparés par des virgules), from / to (AAAA-MM, inclus),
+    category, account, tag (IDs), type (IN, OUT, TRF) et compare (mom, yoy).
+    Lève ValueError si les paramètres sont invalides.
+    """
+    group_by = [axis for axis in params.get('group_by', 'year,month').split(',') if axis]
+    if not group_by:
+        raise ValueError("Au moins un axe est requis.")
+
+    period = None
+    if params.get('from') or params.get('to'):
+        start = _parse_month(params['from'])
+        end = PeriodService.add_months(_parse_month(params['to']), 1)
+        if end <= start:
+            raise ValueError("Le mois de fin ne peut pas être antérieur au mois de début.")
+        period = (start, end)
+
+    filters = {}
+    for key in ('category', 'account', 'tag'):
+        if params.get(key):
+            filters[key] = int(params[key])
+    if params.get('type'):
+        if params['type'] not in dict(Transaction.TRANSACTION_TYPES):
+            raise ValueError(f"Type de transaction inconnu: {params['type']}")
+        filters['type'] = params['type']
+
+    return group_by, period, filters, params.get('compare') or None
+
+@login_required
+@require_GET
+def analytics_cube_data(request):
+    """
+    Endpoint JSON du cube d'analyse (tendances mensuelles, comparaisons d'une année sur l'autre).
+    Ex: /analytics/cube/?group_by=year,month,category&from=2016-01&to=2025-12&type=OUT&compare=yoy
+    """
+    try:
+        group_by, period, filters, comparison = _get_cube_request(request.GET)
+        data = AnalyticsService.slice_cached(request.user, group_by, period=period, filters=filters, comparison=comparison)
+    except (KeyError, ValueError) as e:
+        return JsonResponse({'success': False, 'message': f"Requête invalide: {e}"}, status=400)
+
+    return JsonResponse({'success': True, **data})
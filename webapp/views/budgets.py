@@ -1,11 +1,16 @@
 # webapp/views/budgets.py
 from datetime import date
 import calendar
+from collections import defaultdict
+from decimal import Decimal
 from django.shortcuts import render
-from django.db.models import Sum, F
 from django.contrib.auth.decorators import login_required
 
-from ..models import Budget, Transaction, Fund, Category
+from ..models import Fund, Category
+from ..services.monthly_total_service import MonthlyTotalService
+from ..services.budget_evaluation_service import BudgetEvaluationService
+from ..services.period_service import PeriodService
+from ..services.category_closure_service import CategoryClosureService
 
 @login_required
 def budget_overview(request):
@@ -17,40 +22,27 @@ def budget_overview(request):
     current_month = date.today().month
     current_year = date.today().year
 
-    # Récupérer les budgets mensuels configurés pour le mois et l'année en cours POUR L'UTILISATEUR CONNECTÉ
-    budgets = Budget.objects.filter(
-        user=request.user,
-        period_type='M',
-        start_date__month=current_month,
-        start_date__year=current_year
-    ).select_related('category')
-
-    budget_data = []
-    for budget in budgets:
-        # Calculer les dépenses réelles pour cette catégorie et ses sous-catégories pour le mois POUR L'UTILISATEUR CONNECTÉ
-        category_and_children_ids = [budget.category.id] + list(budget.category.children.filter(user=request.user).values_list('id', flat=True)) # NOUVEAU
-
-        spent_amount = Transaction.objects.filter(
-            user=request.user,
-            category__id__in=category_and_children_ids,
-            transaction_type='OUT',
-            date__month=current_month,
-            date__year=current_year
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
-
-        spent_amount = abs(spent_amount)
-
-        remaining = budget.amount - spent_amount
-        percentage_spent = (spent_amount / budget.amount * 100) if budget.amount > 0 else 0
-
-        budget_data.append({
-            'category_name': budget.category.name,
-            'budgeted_amount': budget.amount,
-            'spent_amount': spent_amount,
-            'remaining': remaining,
-            'percentage_spent': round(percentage_spent, 2),
-            'status': 'ok' if remaining >= 0 else 'overbudget'
-        })
+    # Budgets évalués sur le mois en cours POUR L'UTILISATEUR CONNECTÉ
+    # (budgets mensuels et annuels, dépenses de toutes les sous-catégories incluses)
+    budget_evaluation = BudgetEvaluationService.evaluate_cached(request.user, PeriodService.month(current_year, current_month))
+    budget_data = [
+        {
+            'category_name': line['category_name'],
+            'budgeted_amount': line['budgeted_amount'],
+            'spent_amount': line['spent_amount'],
+            'remaining': line['remaining'],
+            'percentage_spent': line['percentage_spent'],
+            'status': line['status'],
+        }
+        for line in budget_evaluation['budgets']
+    ]
+
+    # Cumuls mensuels par catégorie et sous-catégories de l'utilisateur (une requête chacun)
+    month_category_totals = MonthlyTotalService.get_category_totals(request.user, year=current_year, month=current_month)
+    # Chaque catégorie est cumulée sur sa catégorie principale, quelle que soit sa profondeur
+    totals_by_root = defaultdict(Decimal)
+    for category_id, root_id in CategoryClosureService.get_root_ids(request.user).items():
+        totals_by_root[root_id] += month_category_totals[category_id]['net']
 
     # Récupérer les soldes des fonds budgétaires POUR L'UTILISATEUR CONNECTÉ
     funds = Fund.objects.filter(user=request.user).select_related('category').all().order_by('category__name')
@@ -67,16 +59,8 @@ def budget_overview(request):
     monthly_category_summary_data = []
 
     for main_cat in all_categories:
-        # Inclure la catégorie principale et toutes ses sous-catégories POUR L'UTILISATEUR CONNECTÉ
-        category_ids_for_summary = [main_cat.id] + list(main_cat.children.filter(user=request.user).values_list('id', flat=True)) # NOUVEAU
-
-        # Calculer le total des transactions (dépenses et revenus) POUR L'UTILISATEUR CONNECTÉ
-        total_for_category = Transaction.objects.filter(
-            user=request.user,
-            category__id__in=category_ids_for_summary,
-            date__month=current_month,
-            date__year=current_year
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
+        # Total des transactions (dépenses et revenus) de la catégorie principale et de toutes ses sous-catégories
+        total_for_category = totals_by_root[main_cat.id]
 
         if total_for_category != 0:
             monthly_category_summary_data.append({
@@ -86,21 +70,10 @@ def budget_overview(request):
             })
     monthly_category_summary_data.sort(key=lambda x: x['category_name'])
 
-    # Filtrer les revenus/dépenses totaux par l'utilisateur
-    total_income_month = Transaction.objects.filter(
-        user=request.user,
-        transaction_type='IN',
-        date__month=current_month,
-        date__year=current_year
-    ).aggregate(Sum('amount'))['amount__sum'] or 0
-
-    total_expense_month = Transaction.objects.filter(
-        user=request.user,
-        transaction_type='OUT',
-        date__month=current_month,
-        date__year=current_year
-    ).aggregate(Sum('amount'))['amount__sum'] or 0
-    total_expense_month = abs(total_expense_month)
+    # Revenus/dépenses totaux du mois pour l'utilisateur, selon le type de transaction (transferts exclus)
+    type_totals = MonthlyTotalService.get_type_totals(request.user, year=current_year, month=current_month)
+    total_income_month = type_totals['IN']
+    total_expense_month = abs(type_totals['OUT'])
 
     context = {
         'page_title': 'Aperçu du Budget et Suivi',
@@ -0,0 +1,23 @@
+# webapp/views/category_views.py
+from django.http import HttpResponse
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_GET, condition
+from django.views.decorators.cache import cache_control
+
+from webapp.services.category_tree_service import CategoryTreeService
+
+def _category_tree_etag(request):
+    return CategoryTreeService.get_etag(request.user)
+
+@login_required
+@require_GET
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_category_tree_etag)
+def category_tree_data(request):
+    """
+    Endpoint JSON de l'arbre des catégories de l'utilisateur.
+    Réponse 304 si l'ETag envoyé par le navigateur correspond à la version courante des catégories.
+    """
+    tree_json = CategoryTreeService.get_tree_json(request.user)
+    body = '{"categories": %s, "subcategories": %s}' % (tree_json['categories'], tree_json['subcategories'])
+    return HttpResponse(body, content_type='application/json')
@@ -1,60 +1,59 @@
 # webapp/views/dashboard_views.py
 from django.shortcuts import render
+from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_GET
 from datetime import date
-from django.db.models import Sum
-from webapp.models import Transaction, Category
+from webapp.services.transaction_stats_service import TransactionStatsService
+from webapp.services.user_cache_service import UserCacheService
+from webapp.services.budget_overview_service import BudgetOverviewService
+from webapp.services.budget_evaluation_service import BudgetEvaluationService
+from webapp.services.period_service import PeriodService
+from webapp.services.cash_flow_forecast_service import CashFlowForecastService
 
-@login_required
-def dashboard_view(request):
+def _build_dashboard_stats(user, today):
     """
-    Vue principale du tableau de bord avec Alpine.js
-    CORRECTION: Ne plus filtrer par mois courant
+    Calcule les statistiques rapides du tableau de bord pour un utilisateur,
+    à partir de ses compteurs (UserTransactionStats, une lecture par clé primaire).
     """
-    today = date.today()
-    current_month = today.month
     current_year = today.year
-    
-    # Statistiques rapides pour l'utilisateur connecté
-    total_transactions = Transaction.objects.filter(user=request.user).count()
+    stats = TransactionStatsService.get(user)
     
     # CORRECTION: Prendre TOUTES les transactions de l'année en cours
-    yearly_transactions = Transaction.objects.filter(
-        user=request.user,
-        date__year=current_year
-    )
+    yearly_totals = stats.get_year_totals(current_year)
     
     # Si pas de transactions cette année, prendre toutes les transactions
-    if not yearly_transactions.exists():
-        yearly_transactions = Transaction.objects.filter(user=request.user)
+    if not yearly_totals['count']:
+        yearly_totals = stats.get_year_totals()
         period_name = "Total"
     else:
         period_name = f"{current_year}"
     
-    yearly_income = yearly_transactions.filter(amount__gt=0).aggregate(
-        total=Sum('amount')
-    )['total'] or 0
-    
-    yearly_expenses = yearly_transactions.filter(amount__lt=0).aggregate(
-        total=Sum('amount')
-    )['total'] or 0
-    
-    # Transactions non catégorisées
-    uncategorized_count = Transaction.objects.filter(
-        user=request.user,
-        category__isnull=True
-    ).count()
+    yearly_income = yearly_totals['income']
+    yearly_expenses = yearly_totals['expense']
     
-    context = {
-        'page_title': 'Tableau de Bord',
-        'total_transactions': total_transactions,
+    return {
+        'total_transactions': stats.total_count,
         'monthly_income': yearly_income,
         'monthly_expenses': abs(yearly_expenses),
         'monthly_balance': yearly_income + yearly_expenses,
-        'uncategorized_count': uncategorized_count,
+        'uncategorized_count': stats.uncategorized_count,
         'current_month_name': period_name,
         'current_year': current_year,
     }
+
+@login_required
+def dashboard_view(request):
+    """
+    Vue principale du tableau de bord avec Alpine.js
+    CORRECTION: Ne plus filtrer par mois courant
+    """
+    dashboard_stats = _build_dashboard_stats(request.user, date.today())
+    
+    context = {
+        'page_title': 'Tableau de Bord',
+        **dashboard_stats,
+    }
     
     return render(request, 'webapp/dashboard.html', context)
 
@@ -63,129 +62,76 @@ def budget_overview(request):
     """
     Vue pour l'aperçu des budgets avec données réelles
     CORRECTION: Supprimer les budgets hardcodés à 500 CHF
+    Les trois sections sont calculées par BudgetOverviewService en un nombre constant de requêtes.
+    Les blocs de données sont servis depuis le cache tant que les données de l'utilisateur n'ont pas changé.
     """
     today = date.today()
-    current_month = today.month
-    current_year = today.year
-    
-    # CORRECTION: Prendre toutes les transactions de l'année
-    yearly_transactions = Transaction.objects.filter(
-        user=request.user,
-        date__year=current_year
+    budget_overview_data = UserCacheService.get_or_set(
+        request.user,
+        f'budget-overview:{today.isoformat()}',
+        lambda: BudgetOverviewService.build(request.user, today),
     )
     
-    # Si pas de transactions cette année, prendre toutes
-    if not yearly_transactions.exists():
-        yearly_transactions = Transaction.objects.filter(user=request.user)
-    
-    # Calculs pour le résumé annuel
-    total_income_year = yearly_transactions.filter(amount__gt=0).aggregate(
-        total=Sum('amount')
-    )['total'] or 0
-    
-    total_expense_year = yearly_transactions.filter(amount__lt=0).aggregate(
-        total=Sum('amount')
-    )['total'] or 0
-    
-    # Données pour les fonds budgétaires (catégories gérées par fonds)
-    fund_managed_categories = Category.objects.filter(
-        user=request.user, 
-        is_fund_managed=True
-    ).order_by('name')
-    
-    fund_data = []
-    for category in fund_managed_categories:
-        # Calculer le solde actuel pour cette catégorie
-        category_transactions = Transaction.objects.filter(
-            user=request.user,
-            category=category
-        )
-        
-        current_balance = category_transactions.aggregate(
-            total=Sum('amount')
-        )['total'] or 0
-        
-        # Déterminer le statut du fonds
-        if current_balance >= 100:  # Seuil arbitraire pour "sain"
-            status = 'healthy'
-        elif current_balance >= 0:
-            status = 'low'
-        else:
-            status = 'critical'
-        
-        fund_data.append({
-            'category_name': category.name,
-            'current_balance': current_balance,
-            'status': status
-        })
-    
-    # CORRECTION: Supprimer les budgets hardcodés
-    # Données pour les budgets de planification (catégories budgétées)
-    from webapp.models import Budget
-    
-    budgeted_categories = Category.objects.filter(
-        user=request.user, 
-        is_budgeted=True
-    ).order_by('name')
-
-    budget_data = []
-    for category in budgeted_categories:
-        # Chercher un budget réel pour cette catégorie
-        budget = Budget.objects.filter(
-            user=request.user,
-            category=category,
-            start_date__lte=today,
-            end_date__gte=today
-        ).first()
-        
-        if budget:
-            # Montant dépensé dans cette catégorie
-            spent_amount = yearly_transactions.filter(
-                category=category,
-                amount__lt=0
-            ).aggregate(total=Sum('amount'))['total'] or 0
-            spent_amount = abs(spent_amount)
-            
-            budgeted_amount = budget.amount
-            remaining = budgeted_amount - spent_amount
-            percentage_spent = float(spent_amount / budgeted_amount * 100) if budgeted_amount > 0 else 0
-            
-            budget_data.append({
-                'category_name': category.name,
-                'budgeted_amount': budgeted_amount,
-                'spent_amount': spent_amount,
-                'remaining': remaining,
-                'percentage_spent': percentage_spent
-            })
-    
-    # Récapitulatif annuel par catégorie
-    monthly_category_summary_data = []
-    categories_with_transactions = Category.objects.filter(
-        user=request.user,
-        transactions__date__year=current_year
-    ).distinct()
-    
-    for category in categories_with_transactions:
-        total_amount = yearly_transactions.filter(
-            category=category
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        
-        monthly_category_summary_data.append({
-            'category_name': category.name,
-            'total_amount': total_amount
-        })
-    
     context = {
         'page_title': 'Aperçu des Budgets',
-        'total_income_month': total_income_year,
-        'total_expense_month': total_expense_year,
-        'fund_data': fund_data,
-        'budget_data': budget_data,
-        'monthly_category_summary_data': monthly_category_summary_data,
+        **budget_overview_data,
     }
     
     return render(request, 'webapp/budget_overview.html', context)
 
+def _get_requested_period(params, today):
+    """
+    Lit la période demandée dans les paramètres GET:
+    period=month|quarter|year|custom, avec year, month, quarter ou start/end (AAAA-MM-JJ, inclus).
+    Lève ValueError si les paramètres sont invalides.
+    """
+    period_type = params.get('period', 'month')
+    year = int(params.get('year', today.year))
+    if period_type == 'month':
+        return PeriodService.month(year, int(params.get('month', today.month)))
+    if period_type == 'quarter':
+        return PeriodService.quarter(year, int(params.get('quarter', (today.month - 1) // 3 + 1)))
+    if period_type == 'year':
+        return PeriodService.year(year)
+    if period_type == 'custom':
+        return PeriodService.custom(date.fromisoformat(params['start']), date.fromisoformat(params['end']))
+    raise ValueError(f"Type de période inconnu: {period_type}")
+
+@login_required
+@require_GET
+def budget_evaluation_data(request):
+    """
+    Endpoint JSON de l'évaluation des budgets (budgété vs réel) sur une période quelconque.
+    Le résultat est mis en cache par période tant que les données de l'utilisateur n'ont pas changé.
+    """
+    try:
+        period = _get_requested_period(request.GET, date.today())
+    except (KeyError, ValueError) as e:
+        return JsonResponse({'success': False, 'message': f"Période invalide: {e}"}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        **BudgetEvaluationService.evaluate_cached(request.user, period),
+    })
+
+@login_required
+@require_GET
+def cash_flow_forecast_data(request):
+    """
+    Endpoint JSON de la prévision de trésorerie: soldes projetés par compte et par jour.
+    Paramètre GET: months (horizon en mois, de 3 à 12, 3 par défaut).
+    """
+    try:
+        months = int(request.GET.get('months', CashFlowForecastService.DEFAULT_MONTHS))
+        forecast = CashFlowForecastService.forecast_cached(request.user, months=months)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': f"Horizon invalide: {e}"}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        **forecast,
+    })
+
 @login_required
 def glossary_view(request):
     """
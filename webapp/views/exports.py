@@ -1,53 +1,196 @@
 # webapp/views/exports.py
 import csv
-from django.http import HttpResponse
+import json
+import zlib
+from django.http import JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
-from webapp.models import Transaction
+from webapp.models import Transaction, Account
+from webapp.services.delta_export_service import DeltaExportService
+from webapp.services.transaction_page_service import InvalidCursorError
+
+EXPORT_HEADER = [
+    'Date',
+    'Description',
+    'Montant',
+    'Devise',
+    'Compte',
+    'Type de Compte',
+    'Catégorie',
+    'Type de Transaction',
+    'Créé le',
+    'Modifié le'
+]
+# Nombre de lignes lues par requête et regroupées avant d'être envoyées au client
+EXPORT_CHUNK_SIZE = 2000
+
+# Colonnes lues pour l'export, dans l'ordre de EXPORT_HEADER
+EXPORT_FIELDS = [
+    'date',
+    'description',
+    'amount',
+    'account__currency',
+    'account__name',
+    'account__account_type',
+    'category__name',
+    'transaction_type',
+    'created_at',
+    'updated_at',
+]
+
+class _Echo:
+    """Pseudo-fichier pour csv.writer: write() retourne la ligne formatée au lieu de la stocker."""
+    def write(self, value):
+        return value
+
+def _format_row(row, account_types, transaction_types):
+    """Formate une ligne lue avec EXPORT_FIELDS en valeurs d'export (dans l'ordre de EXPORT_HEADER)."""
+    (transaction_date, description, amount, currency, account_name, account_type,
+     category_name, transaction_type, created_at, updated_at) = row
+    return [
+        transaction_date.strftime('%Y-%m-%d'),
+        description,
+        str(amount),
+        currency,
+        account_name,
+        account_types.get(account_type, account_type),
+        category_name or 'Non catégorisé',
+        transaction_types.get(transaction_type, transaction_type),
+        created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        updated_at.strftime('%Y-%m-%d %H:%M:%S')
+    ]
+
+def _batched(lines):
+    """Regroupe les lignes produites par blocs de EXPORT_CHUNK_SIZE avant envoi."""
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= EXPORT_CHUNK_SIZE:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+def _iter_export_csv(user):
+    """
+    Produit le CSV des transactions de l'utilisateur par blocs de lignes.
+    Les transactions sont lues par paquets avec .values_list() (sans instancier de modèles
+    ni garder en mémoire les lignes déjà envoyées): la mémoire reste constante quel que soit l'historique.
+    """
+    writer = csv.writer(_Echo())
+    account_types = dict(Account.ACCOUNT_TYPES)
+    transaction_types = dict(Transaction.TRANSACTION_TYPES)
+
+    # L'en-tête part immédiatement, avant la première requête
+    yield writer.writerow(EXPORT_HEADER)
+
+    rows = Transaction.objects.filter(user=user).order_by('-date', '-created_at').values_list(
+        *EXPORT_FIELDS
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    yield from _batched(writer.writerow(_format_row(row, account_types, transaction_types)) for row in rows)
+
+def _iter_delta_csv(delta):
+    """
+    Produit le CSV d'un export incrémental: une ligne 'upsert' par transaction créée ou modifiée,
+    puis une ligne 'delete' par transaction supprimée (ID et date de suppression seulement).
+    """
+    writer = csv.writer(_Echo())
+    account_types = dict(Account.ACCOUNT_TYPES)
+    transaction_types = dict(Transaction.TRANSACTION_TYPES)
+
+    yield writer.writerow(['ID', 'Opération'] + EXPORT_HEADER)
+
+    rows = delta['transactions'].values_list('id', *EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    yield from _batched(
+        writer.writerow([row[0], 'upsert'] + _format_row(row[1:], account_types, transaction_types)) for row in rows
+    )
+    deletions = delta['deletions'].values_list('transaction_id', 'changed_at').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    yield from _batched(
+        writer.writerow([transaction_id, 'delete'] + [''] * (len(EXPORT_HEADER) - 1) + [deleted_at.strftime('%Y-%m-%d %H:%M:%S')])
+        for transaction_id, deleted_at in deletions
+    )
+
+def _iter_delta_jsonl(delta):
+    """
+    Produit un export incrémental au format JSON Lines: un objet par transaction créée ou modifiée
+    ({"op": "upsert", ...}), puis un par transaction supprimée ({"op": "delete", "id", "deleted_at"}).
+    """
+    rows = delta['transactions'].values_list('id', *EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    yield from _batched(
+        json.dumps({
+            'op': 'upsert',
+            'id': row[0],
+            'date': row[1].isoformat(),
+            'description': row[2],
+            'amount': str(row[3]),
+            'currency': row[4],
+            'account': row[5],
+            'account_type': row[6],
+            'category': row[7],
+            'transaction_type': row[8],
+            'created_at': row[9].isoformat(),
+            'updated_at': row[10].isoformat(),
+        }, ensure_ascii=False) + '\n'
+        for row in rows
+    )
+    deletions = delta['deletions'].values_list('transaction_id', 'changed_at').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    yield from _batched(
+        json.dumps({'op': 'delete', 'id': transaction_id, 'deleted_at': deleted_at.isoformat()}) + '\n'
+        for transaction_id, deleted_at in deletions
+    )
+
+def _gzip_stream(chunks):
+    """Compresse au fil de l'eau un flux de texte au format gzip."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+def _streaming_export(chunks, filename, content_type, compress):
+    """Réponse en flux, compressée en gzip si demandé."""
+    if compress:
+        response = StreamingHttpResponse(_gzip_stream(chunks), content_type='application/gzip')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.gz"'
+    else:
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
 @login_required
 def export_transactions_csv(request):
     """
     Vue pour exporter toutes les transactions de l'utilisateur connecté au format CSV.
+    La réponse est envoyée en flux (StreamingHttpResponse) au fur et à mesure de la lecture.
+    Paramètre GET optionnel: gzip=1 pour un fichier compressé (transactions_export.csv.gz).
+    """
+    return _streaming_export(
+        _iter_export_csv(request.user),
+        'transactions_export.csv',
+        'text/csv',
+        compress=request.GET.get('gzip') in ('1', 'true'),
+    )
+
+@login_required
+def export_transactions_delta(request):
+    """
+    Export incrémental: transactions créées ou modifiées et transactions supprimées depuis un curseur.
+    Paramètres GET: since (curseur renvoyé par l'export précédent, absent pour un premier export complet),
+    format (csv ou jsonl, csv par défaut) et gzip=1 pour une réponse compressée.
+    Le curseur à utiliser pour l'export suivant est renvoyé dans l'en-tête X-Export-Cursor.
     """
-    # Créer la réponse HTTP avec le type de contenu CSV
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="transactions_export.csv"'
-    
-    # Créer l'objet writer CSV
-    writer = csv.writer(response)
-    
-    # Écrire l'en-tête
-    writer.writerow([
-        'Date',
-        'Description',
-        'Montant',
-        'Devise',
-        'Compte',
-        'Type de Compte',
-        'Catégorie',
-        'Type de Transaction',
-        'Créé le',
-        'Modifié le'
-    ])
-    
-    # Récupérer toutes les transactions de l'utilisateur
-    transactions = Transaction.objects.filter(user=request.user).select_related(
-        'account', 'category'
-    ).order_by('-date', '-created_at')
-    
-    # Écrire les données des transactions
-    for transaction in transactions:
-        writer.writerow([
-            transaction.date.strftime('%Y-%m-%d'),
-            transaction.description,
-            str(transaction.amount),
-            transaction.account.currency,
-            transaction.account.name,
-            transaction.account.get_account_type_display(),
-            transaction.category.name if transaction.category else 'Non catégorisé',
-            transaction.get_transaction_type_display(),
-            transaction.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-            transaction.updated_at.strftime('%Y-%m-%d %H:%M:%S')
-        ])
-    
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in ('csv', 'jsonl'):
+        return JsonResponse({'success': False, 'message': f"Format d'export inconnu: {export_format}"}, status=400)
+    try:
+        delta = DeltaExportService.get_delta(request.user, cursor=request.GET.get('since') or None)
+    except InvalidCursorError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    compress = request.GET.get('gzip') in ('1', 'true')
+    if export_format == 'jsonl':
+        response = _streaming_export(_iter_delta_jsonl(delta), 'transactions_delta.jsonl', 'application/x-ndjson', compress)
+    else:
+        response = _streaming_export(_iter_delta_csv(delta), 'transactions_delta.csv', 'text/csv', compress)
+    response['X-Export-Cursor'] = delta['cursor']
     return response
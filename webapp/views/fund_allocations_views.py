@@ -2,11 +2,12 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.decorators.http import require_POST, require_GET
 from django.contrib import messages
-import json
 from decimal import Decimal
 from django.contrib.auth.decorators import login_required
-from webapp.models import Category, Transaction, Fund, Allocation, AllocationLine
+from webapp.models import Transaction
 from webapp.forms import AllocationForm, AllocationLineFormset
+from webapp.services.category_tree_service import CategoryTreeService
+from webapp.services.fund_service import FundService
 
 @login_required
 @require_GET
@@ -35,21 +36,12 @@ def allocate_income_view(request, transaction_id):
     # Passer l'utilisateur au formset pour filtrer les choix de catégorie
     formset = AllocationLineFormset(user=request.user)
 
-    # Récupérer toutes les catégories qui gèrent un fonds POUR L'UTILISATEUR CONNECTÉ
-    fund_managed_categories = []
-    for cat in Category.objects.filter(user=request.user, is_fund_managed=True).order_by('name'):
-        fund_managed_categories.append({
-            'id': cat.id,
-            'name': cat.name,
-            'is_fund_managed': cat.is_fund_managed
-        })
-
     context = {
         'page_title': 'Allouer un Revenu aux Fonds',
         'original_transaction': original_transaction,
         'form': form,
         'formset': formset,
-        'fund_managed_categories_json': json.dumps(fund_managed_categories),
+        'fund_managed_categories_json': CategoryTreeService.get_fund_managed_json(request.user),
     }
     return render(request, 'webapp/allocate_income.html', context)
 
@@ -90,20 +82,12 @@ def process_allocation_income(request, transaction_id):
                 if not category.is_fund_managed or category.user != request.user:
                     messages.error(request, f"La catégorie '{category.name}' ne gère pas de fonds ou n'appartient pas à votre compte et ne peut pas recevoir d'allocation directe.")
                     # Re-rendre la page avec les erreurs
-                    fund_managed_categories = []
-                    # Filtrer les catégories par l'utilisateur pour le re-rendu
-                    for cat in Category.objects.filter(user=request.user, is_fund_managed=True).order_by('name'):
-                        fund_managed_categories.append({
-                            'id': cat.id,
-                            'name': cat.name,
-                            'is_fund_managed': cat.is_fund_managed
-                        })
                     context = {
                         'page_title': 'Allouer un Revenu aux Fonds',
                         'original_transaction': original_transaction,
                         'form': form,
                         'formset': formset, # Le formset avec les erreurs
-                        'fund_managed_categories_json': json.dumps(fund_managed_categories),
+                        'fund_managed_categories_json': CategoryTreeService.get_fund_managed_json(request.user),
                     }
                     return render(request, 'webapp/allocate_income.html', context)
 
@@ -116,47 +100,24 @@ def process_allocation_income(request, transaction_id):
 
         if total_allocated_amount > abs(original_transaction.amount) + Decimal('0.01'):
             messages.error(request, f"Le montant total alloué ({total_allocated_amount:.2f} CHF) dépasse le montant de la transaction originale ({abs(original_transaction.amount):.2f} CHF).")
-            fund_managed_categories = []
-            # Filtrer les catégories par l'utilisateur pour le re-rendu
-            for cat in Category.objects.filter(user=request.user, is_fund_managed=True).order_by('name'):
-                fund_managed_categories.append({
-                    'id': cat.id,
-                    'name': cat.name,
-                    'is_fund_managed': cat.is_fund_managed
-                })
             context = {
                 'page_title': 'Allouer un Revenu aux Fonds',
                 'original_transaction': original_transaction,
                 'form': form,
                 'formset': formset, # Le formset avec les erreurs
-                'fund_managed_categories_json': json.dumps(fund_managed_categories),
+                'fund_managed_categories_json': CategoryTreeService.get_fund_managed_json(request.user),
             }
             return render(request, 'webapp/allocate_income.html', context)
 
         try:
-            with Transaction.objects.atomic():
-                # Créer l'objet Allocation
-                # Assigner l'utilisateur à l'Allocation
-                allocation = Allocation.objects.create(
-                    user=request.user, # NOUVEAU
-                    transaction=original_transaction,
-                    total_allocated_amount=total_allocated_amount,
-                    notes=form.cleaned_data.get('notes', '')
-                )
-
-                # Créer les lignes d'allocation et mettre à jour les fonds
-                for line_data in lines_to_create:
-                    # Assigner l'utilisateur à l'AllocationLine
-                    AllocationLine.objects.create(
-                        user=request.user, # NOUVEAU
-                        allocation=allocation,
-                        category=line_data['category'],
-                        amount=line_data['amount'],
-                        notes=line_data['notes']
-                    )
-                    # Mettre à jour le solde du fonds
-                    # Passer l'utilisateur au FundManager
-                    Fund.objects.add_funds_to_category(line_data['category'], line_data['amount'], request.user)
+            # Écriture coordonnée (FundService): l'allocation et les soldes des fonds sont enregistrés ensemble
+            FundService.allocate_income(
+                request.user,
+                original_transaction,
+                total_allocated_amount,
+                form.cleaned_data.get('notes', ''),
+                lines_to_create,
+            )
 
             messages.success(request, f"Revenu de {original_transaction.amount:.2f} CHF alloué avec succès aux fonds.")
             return redirect('all_transactions_summary_view')
@@ -167,20 +128,11 @@ def process_allocation_income(request, transaction_id):
         messages.error(request, "Veuillez corriger les erreurs dans le formulaire d'allocation.")
 
     # Si le formulaire n'est pas valide ou s'il y a une erreur, re-rendre la page d'allocation
-    fund_managed_categories = []
-    # Filtrer les catégories par l'utilisateur pour le re-rendu
-    for cat in Category.objects.filter(user=request.user, is_fund_managed=True).order_by('name'):
-        fund_managed_categories.append({
-            'id': cat.id,
-            'name': cat.name,
-            'is_fund_managed': cat.is_fund_managed
-        })
-
     context = {
         'page_title': 'Allouer un Revenu aux Fonds',
         'original_transaction': original_transaction,
         'form': form, # Le formulaire avec les erreurs
         'formset': formset, # Le formset avec les erreurs
-        'fund_managed_categories_json': json.dumps(fund_managed_categories),
+        'fund_managed_categories_json': CategoryTreeService.get_fund_managed_json(request.user),
     }
     return render(request, 'webapp/allocate_income.html', context)
@@ -2,12 +2,13 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.decorators.http import require_POST, require_GET
 from django.contrib import messages
-import json
 from decimal import Decimal
 from django.contrib.auth.decorators import login_required
 
-from webapp.models import Category, Transaction, Fund, FundDebitRecord, FundDebitLine
+from webapp.models import Transaction
 from webapp.forms import FundDebitRecordForm, FundDebitLineFormset
+from webapp.services.category_tree_service import CategoryTreeService
+from webapp.services.fund_service import FundService
 
 @login_required
 @require_GET
@@ -35,21 +36,12 @@ def debit_funds_view(request, transaction_id):
     # Passer l'utilisateur au formset pour filtrer les choix de catégorie
     formset = FundDebitLineFormset(user=request.user)
 
-    # Récupérer toutes les catégories qui gèrent un fonds POUR L'UTILISATEUR CONNECTÉ
-    fund_managed_categories = []
-    for cat in Category.objects.filter(user=request.user, is_fund_managed=True).order_by('name'):
-        fund_managed_categories.append({
-            'id': cat.id,
-            'name': cat.name,
-            'is_fund_managed': cat.is_fund_managed
-        })
-
     context = {
         'page_title': 'Débiter des Fonds',
         'original_transaction': original_transaction,
         'form': form,
         'formset': formset,
-        'fund_managed_categories_json': json.dumps(fund_managed_categories),
+        'fund_managed_categories_json': CategoryTreeService.get_fund_managed_json(request.user),
     }
     return render(request, 'webapp/debit_funds.html', context)
 
@@ -90,20 +82,12 @@ def process_fund_debit(request, transaction_id):
                 if not category.is_fund_managed or category.user != request.user:
                     messages.error(request, f"La catégorie '{category.name}' ne gère pas de fonds ou n'appartient pas à votre compte et ne peut pas être débitée directement.")
                     # Re-rendre la page avec les erreurs
-                    fund_managed_categories = []
-                    # Filtrer les catégories par l'utilisateur pour le re-rendu
-                    for cat in Category.objects.filter(user=request.user, is_fund_managed=True).order_by('name'):
-                        fund_managed_categories.append({
-                            'id': cat.id,
-                            'name': cat.name,
-                            'is_fund_managed': cat.is_fund_managed
-                        })
                     context = {
                         'page_title': 'Débiter des Fonds',
                         'original_transaction': original_transaction,
                         'form': form,
                         'formset': formset, # Le formset avec les erreurs
-                        'fund_managed_categories_json': json.dumps(fund_managed_categories),
+                        'fund_managed_categories_json': CategoryTreeService.get_fund_managed_json(request.user),
                     }
                     return render(request, 'webapp/debit_funds.html', context)
 
@@ -116,47 +100,24 @@ def process_fund_debit(request, transaction_id):
 
         if total_debited_amount > abs(original_transaction.amount) + Decimal('0.01'):
             messages.error(request, f"Le montant total débité ({total_debited_amount:.2f} CHF) dépasse le montant de la transaction originale ({abs(original_transaction.amount):.2f} CHF).")
-            fund_managed_categories = []
-            # Filtrer les catégories par l'utilisateur pour le re-rendu
-            for cat in Category.objects.filter(user=request.user, is_fund_managed=True).order_by('name'):
-                fund_managed_categories.append({
-                    'id': cat.id,
-                    'name': cat.name,
-                    'is_fund_managed': cat.is_fund_managed
-                })
             context = {
                 'page_title': 'Débiter des Fonds',
                 'original_transaction': original_transaction,
                 'form': form,
                 'formset': formset, # Le formset avec les erreurs
-                'fund_managed_categories_json': json.dumps(fund_managed_categories),
+                'fund_managed_categories_json': CategoryTreeService.get_fund_managed_json(request.user),
             }
             return render(request, 'webapp/debit_funds.html', context)
 
         try:
-            with Transaction.objects.atomic():
-                # Créer l'objet FundDebitRecord
-                # Assigner l'utilisateur au FundDebitRecord
-                fund_debit_record = FundDebitRecord.objects.create(
-                    user=request.user, # NOUVEAU
-                    transaction=original_transaction,
-                    total_debited_amount=total_debited_amount,
-                    notes=form.cleaned_data.get('notes', '')
-                )
-
-                # Créer les lignes de débit et mettre à jour les fonds
-                for line_data in lines_to_create:
-                    # Assigner l'utilisateur au FundDebitLine
-                    FundDebitLine.objects.create(
-                        user=request.user, # NOUVEAU
-                        fund_debit_record=fund_debit_record,
-                        category=line_data['category'],
-                        amount=line_data['amount'],
-                        notes=line_data['notes']
-                    )
-                    # Mettre à jour le solde du fonds
-                    # Passer l'utilisateur au FundManager
-                    Fund.objects.subtract_funds_from_category(line_data['category'], line_data['amount'], request.user)
+            # Écriture coordonnée (FundService): le débit et les soldes des fonds sont enregistrés ensemble
+            FundService.debit_funds(
+                request.user,
+                original_transaction,
+                total_debited_amount,
+                form.cleaned_data.get('notes', ''),
+                lines_to_create,
+            )
 
             messages.success(request, f"Dépense de {abs(original_transaction.amount):.2f} CHF débitée avec succès des fonds.")
             return redirect('all_transactions_summary_view')
@@ -167,20 +128,11 @@ def process_fund_debit(request, transaction_id):
         messages.error(request, "Veuillez corriger les erreurs dans le formulaire de débit de fonds.")
 
     # Si le formulaire n'est pas valide ou s'il y a une erreur, re-rendre la page de débit
-    fund_managed_categories = []
-    # Filtrer les catégories par l'utilisateur pour le re-rendu
-    for cat in Category.objects.filter(user=request.user, is_fund_managed=True).order_by('name'):
-        fund_managed_categories.append({
-            'id': cat.id,
-            'name': cat.name,
-            'is_fund_managed': cat.is_fund_managed
-        })
-
     context = {
         'page_title': 'Débiter des Fonds',
         'original_transaction': original_transaction,
         'form': form, # Le formulaire avec les erreurs
         'formset': formset, # Le formset avec les erreurs
-        'fund_managed_categories_json': json.dumps(fund_managed_categories),
+        'fund_managed_categories_json': CategoryTreeService.get_fund_managed_json(request.user),
     }
     return render(request, 'webapp/debit_funds.html', context)
@@ -4,7 +4,6 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_POST, require_GET
 from django.contrib import messages
 from django.db.models import F, Sum
-import json
 
 from datetime import date
 from django.contrib.auth.decorators import login_required
@@ -13,9 +12,11 @@ from django.utils import timezone
 import csv
 from django.utils.translation import gettext as _
 
-from webapp.models import Category, Transaction, Account, Budget, SavingGoal, Tag
+from webapp.models import Transaction, Account, Tag
 from webapp.forms import TransactionForm
 from webapp.services import TransactionService
+from webapp.services.category_tree_service import CategoryTreeService
+from webapp.services.period_service import PeriodService
 
 @login_required
 def dashboard_view(request):
@@ -37,8 +38,9 @@ def dashboard_view(request):
     latest_transactions = transaction_service.get_latest_transactions(request.user, limit=10)
 
     # Calcul des totaux pour l'aperçu rapide
-    current_month = date.today().month
-    current_year = date.today().year
+    today = date.today()
+    # Mois courant en période semi-ouverte (utilisable par l'index sur la date)
+    month_start, month_end = PeriodService.month(today.year, today.month)
 
     # Solde total de tous les comptes de l'utilisateur
     total_balance_change = Transaction.objects.filter(user=request.user).aggregate(Sum('amount'))['amount__sum'] or 0
@@ -52,72 +54,22 @@ def dashboard_view(request):
     monthly_income = Transaction.objects.filter(
         user=request.user,
         transaction_type='IN',
-        date__month=current_month,
-        date__year=current_year
+        date__gte=month_start,
+        date__lt=month_end
     ).aggregate(Sum('amount'))['amount__sum'] or 0
 
     # Dépenses du mois courant (en valeur absolue)
     monthly_expense = Transaction.objects.filter(
         user=request.user,
         transaction_type='OUT',
-        date__month=current_month,
-        date__year=current_year
+        date__gte=month_start,
+        date__lt=month_end
     ).aggregate(Sum('amount'))['amount__sum'] or 0
     monthly_expense = abs(monthly_expense)
 
     # Préparation des données pour les catégories et sous-catégories (pour Alpine.js)
     form = TransactionForm(user=request.user)
 
-    all_categories_data = []
-    all_subcategories_data = []
-
-    categories = Category.objects.filter(user=request.user, parent__isnull=True).order_by('name')
-
-    budgeted_category_ids_for_current_period = set(
-        Budget.objects.filter(
-            user=request.user,
-            period_type='M',
-            start_date__year=current_year,
-            start_date__month=current_month
-        ).values_list('category__id', flat=True)
-    )
-
-    goal_linked_category_ids = set(
-        SavingGoal.objects.filter(
-            user=request.user,
-            status='OU'
-        ).values_list('category__id', flat=True)
-    )
-
-    for cat in categories:
-        is_budgeted_for_display = cat.is_budgeted
-        is_fund_managed_for_display = cat.is_fund_managed
-        is_goal_linked_for_display = cat.id in goal_linked_category_ids
-
-        all_categories_data.append({
-            'id': cat.id,
-            'name': cat.name,
-            'is_fund_managed': is_fund_managed_for_display,
-            'is_budgeted': is_budgeted_for_display,
-            'is_goal_linked': is_goal_linked_for_display
-        })
-        for child_cat in cat.children.filter(user=request.user).order_by('name'):
-            child_is_budgeted_for_display = child_cat.is_budgeted
-            child_is_fund_managed_for_display = child_cat.is_fund_managed
-            child_is_goal_linked_for_display = child_cat.id in goal_linked_category_ids
-
-            all_subcategories_data.append({
-                'id': child_cat.id,
-                'name': child_cat.name,
-                'parent': cat.id,
-                'is_fund_managed': child_is_fund_managed_for_display,
-                'is_budgeted': child_is_budgeted_for_display,
-                'is_goal_linked': child_is_goal_linked_for_display
-            })
-
-    all_categories_data_json = json.dumps(all_categories_data)
-    all_subcategories_data_json = json.dumps(all_subcategories_data)
-
     # Récupérer tous les tags disponibles pour l'utilisateur
     available_tags = Tag.objects.filter(user=request.user).order_by('name')
 
@@ -126,8 +78,7 @@ def dashboard_view(request):
         'accounts': accounts,  # Objets Account avec balance calculée
         'latest_transactions': latest_transactions,
         'form': form,
-        'all_categories_data_json': all_categories_data_json,
-        'all_subcategories_data_json': all_subcategories_data_json,
+        **CategoryTreeService.get_context(request.user),
         'available_tags': available_tags,  # Pour les checkboxes des tags
         'total_balance': total_balance,
         'base_currency': base_currency,
@@ -204,30 +155,8 @@ def split_transaction_view(request, transaction_id):
     # S'assurer que la transaction appartient à l'utilisateur connecté
     original_transaction = get_object_or_404(Transaction, pk=transaction_id, user=request.user)
     
-    # Récupérer toutes les catégories pour cet utilisateur
-    all_categories = Category.objects.filter(user=request.user, parent__isnull=True).order_by('name')
-    all_subcategories = Category.objects.filter(user=request.user, parent__isnull=False).order_by('name')
-    
-    all_categories_json = json.dumps([
-        {
-            'id': cat.id,
-            'name': cat.name,
-            'is_fund_managed': cat.is_fund_managed,
-            'is_budgeted': cat.is_budgeted
-        }
-        for cat in all_categories
-    ])
-    
-    all_subcategories_json = json.dumps([
-        {
-            'id': cat.id,
-            'name': cat.name,
-            'parent': cat.parent.id,
-            'is_fund_managed': cat.is_fund_managed,
-            'is_budgeted': cat.is_budgeted
-        }
-        for cat in all_subcategories
-    ])
+    # Arbre des catégories de cet utilisateur (mis en cache)
+    category_tree_json = CategoryTreeService.get_tree_json(request.user)
     
     if request.method == 'POST':
         # Traitement du formulaire de division
@@ -236,8 +165,8 @@ def split_transaction_view(request, transaction_id):
     
     context = {
         'original_transaction': original_transaction,
-        'all_categories_json': all_categories_json,
-        'all_subcategories_json': all_subcategories_json,
+        'all_categories_json': category_tree_json['categories'],
+        'all_subcategories_json': category_tree_json['subcategories'],
     }
     
     return render(request, 'webapp/split_transaction.html', context)
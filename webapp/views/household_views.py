@@ -47,7 +47,7 @@ def household_detail_view(request, household_id):
     household = get_object_or_404(Household, id=household_id)
     
     # Vérifier que l'utilisateur est membre du ménage
-    if not HouseholdMember.objects.filter(household=household, user=request.user).exists():
+    if not request.user_context.is_household_member(household.id):
         messages.error(request, "Vous n'avez pas accès à ce ménage.")
         return redirect('household_list')
     
@@ -55,7 +55,7 @@ def household_detail_view(request, household_id):
     members = HouseholdService.get_household_members(household)
     
     # Vérifier si l'utilisateur est administrateur
-    is_admin = HouseholdService.is_household_admin(request.user, household)
+    is_admin = request.user_context.is_household_admin(household.id)
     
     context = {
         'page_title': f'Ménage: {household.name}',
@@ -71,7 +71,7 @@ def add_household_member_view(request, household_id):
     household = get_object_or_404(Household, id=household_id)
     
     # Vérifier que l'utilisateur est administrateur du ménage
-    if not HouseholdService.is_household_admin(request.user, household):
+    if not request.user_context.is_household_admin(household.id):
         messages.error(request, "Vous devez être administrateur pour ajouter des membres.")
         return redirect('household_detail', household_id=household.id)
     
@@ -100,7 +100,7 @@ def remove_household_member_view(request, household_id, user_id):
     household = get_object_or_404(Household, id=household_id)
     
     # Vérifier que l'utilisateur est administrateur du ménage
-    if not HouseholdService.is_household_admin(request.user, household):
+    if not request.user_context.is_household_admin(household.id):
         messages.error(request, "Vous devez être administrateur pour retirer des membres.")
         return redirect('household_detail', household_id=household.id)
     
@@ -125,7 +125,7 @@ def change_household_type_view(request, household_id):
     household = get_object_or_404(Household, id=household_id)
     
     # Vérifier que l'utilisateur est administrateur du ménage
-    if not HouseholdService.is_household_admin(request.user, household):
+    if not request.user_context.is_household_admin(household.id):
         messages.error(request, "Vous devez être administrateur pour modifier le type de ménage.")
         return redirect('household_detail', household_id=household.id)
     
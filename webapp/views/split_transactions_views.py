@@ -2,13 +2,12 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.decorators.http import require_POST, require_GET
 from django.contrib import messages
-import json
 from decimal import Decimal
-from datetime import date
 from django.contrib.auth.decorators import login_required
-from webapp.models import Transaction, Category, Budget, SavingGoal
+from webapp.models import Transaction
 from webapp.forms import SplitTransactionFormset
 from webapp.services import TransactionService
+from webapp.services.category_tree_service import CategoryTreeService
 
 
 @login_required 
@@ -36,63 +35,11 @@ def split_transaction_view(request, transaction_id=None):
             })
             formset = SplitTransactionFormset(initial=initial_data, user=request.user) # Passer l'utilisateur au formset
 
-    all_categories_data = []
-    all_subcategories_data = []
-
-    current_year = date.today().year
-    current_month = date.today().month
-    # Filtrer les budgets par l'utilisateur
-    budgeted_category_ids_for_current_period = set(
-        Budget.objects.filter(
-            user=request.user, 
-            period_type='M',
-            start_date__year=current_year,
-            start_date__month=current_month
-        ).values_list('category__id', flat=True)
-    )
-
-    # Filtrer les objectifs d'épargne par l'utilisateur
-    goal_linked_category_ids = set(
-        SavingGoal.objects.filter(
-            user=request.user, # NOUVEAU
-            status='OU'
-        ).values_list('category__id', flat=True)
-    )
-
-    # Filtrer les catégories par l'utilisateur
-    for cat in Category.objects.filter(user=request.user, parent__isnull=True).order_by('name'):
-        is_budgeted_for_display = cat.is_budgeted
-        is_fund_managed_for_display = cat.is_fund_managed
-        is_goal_linked_for_display = cat.id in goal_linked_category_ids
-
-        all_categories_data.append({
-            'id': cat.id,
-            'name': cat.name,
-            'is_fund_managed': is_fund_managed_for_display,
-            'is_budgeted': is_budgeted_for_display,
-            'is_goal_linked': is_goal_linked_for_display
-        })
-        # Filtrer les sous-catégories par l'utilisateur
-        for child_cat in cat.children.filter(user=request.user).order_by('name'):
-            child_is_budgeted_for_display = child_cat.is_budgeted
-            child_is_fund_managed_for_display = child_cat.is_fund_managed
-            child_is_goal_linked_for_display = child_cat.id in goal_linked_category_ids
-
-            all_subcategories_data.append({
-                'id': child_cat.id,
-                'name': child_cat.name,
-                'parent': cat.id,
-                'is_fund_managed': child_is_fund_managed_for_display,
-                'is_budgeted': child_is_budgeted_for_display,
-                'is_goal_linked': child_is_goal_linked_for_display
-            })
-
     context = {
         'page_title': 'Diviser une Transaction',
         'original_transaction': original_transaction,
         'formset': formset,
-        'all_categories_data_json': json.dumps(all_categories_data),
-        'all_subcategories_data_json': json.dumps(all_subcategories_data),
+        **CategoryTreeService.get_context(request.user),
     }
     return render(request, 'webapp/split_transaction.html', context)
 
@@ -151,62 +98,10 @@ def _render_split_transaction_page_with_errors(request, original_transaction, fo
     Fonction helper pour rendre la page de division de transaction avec les erreurs.
     Maintenant, elle filtre toutes les données par l'utilisateur connecté.
     """
-    all_categories_data = []
-    all_subcategories_data = []
-
-    current_year = date.today().year
-    current_month = date.today().month
-    # Filtrer les budgets par l'utilisateur
-    budgeted_category_ids_for_current_period = set(
-        Budget.objects.filter(
-            user=request.user, # NOUVEAU
-            period_type='M',
-            start_date__year=current_year,
-            start_date__month=current_month
-        ).values_list('category__id', flat=True)
-    )
-
-    # Filtrer les objectifs d'épargne par l'utilisateur
-    goal_linked_category_ids = set(
-        SavingGoal.objects.filter(
-            user=request.user, # NOUVEAU
-            status='OU'
-        ).values_list('category__id', flat=True)
-    )
-
-    # Filtrer les catégories par l'utilisateur
-    for cat in Category.objects.filter(user=request.user, parent__isnull=True).order_by('name'):
-        is_budgeted_for_display = cat.is_budgeted
-        is_fund_managed_for_display = cat.is_fund_managed
-        is_goal_linked_for_display = cat.id in goal_linked_category_ids
-
-        all_categories_data.append({
-            'id': cat.id,
-            'name': cat.name,
-            'is_fund_managed': is_fund_managed_for_display,
-            'is_budgeted': is_budgeted_for_display,
-            'is_goal_linked': is_goal_linked_for_display
-        })
-        # Filtrer les sous-catégories par l'utilisateur
-        for child_cat in cat.children.filter(user=request.user).order_by('name'):
-            child_is_budgeted_for_display = child_cat.is_budgeted
-            child_is_fund_managed_for_display = child_cat.is_fund_managed
-            child_is_goal_linked_for_display = child_cat.id in goal_linked_category_ids
-
-            all_subcategories_data.append({
-                'id': child_cat.id,
-                'name': child_cat.name,
-                'parent': cat.id,
-                'is_fund_managed': child_is_fund_managed_for_display,
-                'is_budgeted': child_is_budgeted_for_display,
-                'is_goal_linked': child_is_goal_linked_for_display
-            })
-
     context = {
         'page_title': 'Diviser une Transaction',
         'original_transaction': original_transaction,
         'formset': formset,
-        'all_categories_data_json': json.dumps(all_categories_data),
-        'all_subcategories_data_json': json.dumps(all_subcategories_data),
+        **CategoryTreeService.get_context(request.user),
     }
     return render(request, 'webapp/split_transaction.html', context)
@@ -1,13 +1,19 @@
 # webapp/views/summary_views.py
 from django.shortcuts import render, redirect
 from django.db.models import Sum
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 import calendar
 import json
 from datetime import date
+from itertools import groupby
 from django.contrib.auth.decorators import login_required 
 
 from webapp.models import Transaction, Category
 from webapp.services.permission_service import PermissionService
+from webapp.services.monthly_total_service import MonthlyTotalService
+from webapp.services.period_service import PeriodService
+from webapp.services.transaction_page_service import TransactionPageService, InvalidCursorError, InvalidFilterError
 
 @login_required
 def recap_overview_view(request):
@@ -19,11 +25,65 @@ def recap_overview_view(request):
     }
     return render(request, 'webapp/recap_overview.html', context)
 
+def _get_period_bounds(selected_year, selected_month=None):
+    """
+    Retourne la période (début inclus, fin exclue) de l'année ou du mois sélectionné.
+    """
+    if selected_month is None:
+        return PeriodService.year(selected_year)
+    return PeriodService.month(selected_year, selected_month)
+
+def _serialize_category_transaction(transaction):
+    """Sérialise une transaction pour le récapitulatif par catégorie."""
+    return {
+        'id': transaction.id,
+        'date': transaction.date.isoformat(),
+        'description': transaction.description,
+        'amount': float(transaction.amount),
+        'transaction_type': transaction.get_transaction_type_display(),
+        'account_name': transaction.account.name,
+        'account_currency': transaction.account.currency,
+        'owner': transaction.user.username,
+    }
+
+def _iter_transactions_by_category(transactions):
+    """
+    Regroupe en une seule passe des transactions déjà triées par catégorie.
+    Produit un dictionnaire par catégorie, sans charger toute la période en mémoire d'un coup.
+    """
+    for (category_id, category_name), category_transactions in groupby(
+        transactions, key=lambda transaction: (transaction.category_id, transaction.category.name)
+    ):
+        yield {
+            'category_id': category_id,
+            'category_name': category_name,
+            'transactions': [_serialize_category_transaction(transaction) for transaction in category_transactions],
+        }
+
+def _get_period_category_transactions(user, start_date, end_date, category_id=None):
+    """
+    Une seule requête ordonnée sur la période, comptes, utilisateurs et catégories joints.
+    """
+    transactions = Transaction.objects.filter(
+        user=user,
+        category__isnull=False,
+        date__gte=start_date,
+        date__lt=end_date,
+    )
+    if category_id is not None:
+        transactions = transactions.filter(category_id=category_id)
+    return transactions.select_related('account', 'user', 'category').order_by(
+        'category__name', 'category_id', 'date', 'created_at'
+    ).iterator(chunk_size=500)
+
 @login_required 
 def category_transactions_summary_view(request, year=None, month=None):
     """
     Vue affichant un récapitulatif des transactions par catégories.
     CORRECTION: Afficher les transactions même sans catégories de fonds
+    La page ne contient que les en-têtes de catégories (nombre de transactions et totaux lus
+    depuis les cumuls mensuels); les transactions d'une catégorie sont chargées à la demande
+    via category_transactions_summary_data lorsque l'utilisateur la déplie.
     """
     today = date.today()
 
@@ -53,51 +113,28 @@ def category_transactions_summary_view(request, year=None, month=None):
         selected_month = None
 
     if month is None:
-        start_date = date(selected_year, 1, 1)
-        end_date = date(selected_year, 12, 31)
         period_display = f"Année {selected_year}"
     else:
-        start_date = date(selected_year, selected_month, 1)
-        _, last_day = calendar.monthrange(selected_year, selected_month)
-        end_date = date(selected_year, selected_month, last_day)
         month_name = calendar.month_name[selected_month]
         period_display = f"{month_name} {selected_year}"
 
     # CORRECTION: Afficher TOUTES les catégories avec transactions, pas seulement celles gérées par fonds
+    # Les cumuls mensuels indiquent directement quelles catégories ont des transactions sur la période
+    period_category_totals = MonthlyTotalService.get_category_totals(request.user, year=selected_year, month=selected_month)
     categories_with_transactions = accessible_categories.filter(
-        transactions__date__gte=start_date,
-        transactions__date__lte=end_date,
-        transactions__user=request.user
-    ).distinct().order_by('name')
+        id__in=[category_id for category_id, totals in period_category_totals.items() if category_id and totals['count']]
+    ).order_by('name')
 
     category_transactions_summary = []
-
     for category in categories_with_transactions:
-        # Filtrer les transactions pour la période donnée
-        transactions_in_category = accessible_transactions.filter(
-            category=category,
-            date__gte=start_date,
-            date__lte=end_date
-        ).order_by('date', 'created_at')
-
-        if transactions_in_category.exists():
-            transaction_list_data = []
-            for transaction in transactions_in_category:
-                transaction_list_data.append({
-                    'id': transaction.id,
-                    'date': transaction.date.isoformat(),
-                    'description': transaction.description,
-                    'amount': float(transaction.amount),
-                    'transaction_type': transaction.get_transaction_type_display(),
-                    'account_name': transaction.account.name,
-                    'account_currency': transaction.account.currency,
-                    'owner': transaction.user.username,
-                })
-
-            category_transactions_summary.append({
-                'category_name': category.name,
-                'transactions': transaction_list_data
-            })
+        totals = period_category_totals[category.id]
+        category_transactions_summary.append({
+            'category_id': category.id,
+            'category_name': category.name,
+            'transaction_count': totals['count'],
+            'total_income': float(totals['income']),
+            'total_expense': float(totals['expense']),
+        })
 
     # Convertir en JSON pour Alpine.js
     category_transactions_summary_json = json.dumps(category_transactions_summary)
@@ -121,72 +158,132 @@ def category_transactions_summary_view(request, year=None, month=None):
     }
     return render(request, 'webapp/category_transactions_summary.html', context)
 
+@login_required
+@require_GET
+def category_transactions_summary_data(request):
+    """
+    Endpoint JSON du récapitulatif par catégorie.
+    Paramètres GET: year (obligatoire), month (optionnel), category (optionnel).
+    Sans catégorie, renvoie les transactions de toutes les catégories de la période
+    (utilisé lorsque l'utilisateur filtre ou recherche sur l'ensemble de la page).
+    """
+    try:
+        selected_year = int(request.GET['year'])
+        selected_month = int(request.GET['month']) if request.GET.get('month') else None
+        category_id = int(request.GET['category']) if request.GET.get('category') else None
+        start_date, end_date = _get_period_bounds(selected_year, selected_month)
+    except (KeyError, ValueError, TypeError):
+        return JsonResponse({'success': False, 'message': 'Période ou catégorie invalide.'}, status=400)
+
+    transactions = _get_period_category_transactions(request.user, start_date, end_date, category_id=category_id)
+    # Réponse envoyée en flux, une catégorie à la fois: la période n'est jamais chargée entière en mémoire
+    return StreamingHttpResponse(_stream_categories_json(transactions), content_type='application/json')
+
+def _stream_categories_json(transactions):
+    """Produit le JSON {"success": true, "categories": [...]} morceau par morceau, une catégorie par morceau."""
+    yield '{"success": true, "categories": ['
+    for index, category in enumerate(_iter_transactions_by_category(transactions)):
+        yield (',' if index else '') + json.dumps(category)
+    yield ']}'
+
+def _get_transaction_page_filters(params):
+    """
+    Extrait les filtres de la liste des transactions des paramètres GET.
+    La catégorie doit être un identifiant ou 'none' (sinon InvalidFilterError).
+    """
+    category = params.get('category', '')
+    if category and category != 'none':
+        try:
+            category = int(category)
+        except ValueError:
+            raise InvalidFilterError("Catégorie invalide.")
+    return {
+        'search': params.get('search', ''),
+        'category': category,
+        'type': params.get('type', ''),
+        'status': params.get('status', ''),
+    }
+
+def _build_transaction_page(user, params):
+    """
+    Calcule une page de la liste des transactions à partir des paramètres GET
+    (filtres, sort, cursor, page_size). Les totaux du filtre ne sont calculés
+    que pour la première page: ils ne changent pas au fil du défilement.
+    Lève InvalidFilterError si page_size n'est pas un entier.
+    """
+    transactions = TransactionPageService.get_queryset(user, _get_transaction_page_filters(params))
+    try:
+        page_size = int(params.get('page_size') or 0) or None
+    except ValueError:
+        raise InvalidFilterError("Taille de page invalide.")
+    cursor = params.get('cursor')
+    page, next_cursor = TransactionPageService.get_page(
+        transactions,
+        sort=params.get('sort'),
+        cursor=cursor,
+        page_size=page_size,
+    )
+    editable_ids = PermissionService.can_edit_transactions(user, page)
+    page_data = {
+        'transactions': [
+            TransactionPageService.serialize(transaction, can_edit=transaction.id in editable_ids)
+            for transaction in page
+        ],
+        'next_cursor': next_cursor,
+    }
+    if not cursor:
+        totals = TransactionPageService.get_totals(transactions)
+        page_data['totals'] = {
+            'count': totals['count'],
+            'income': float(totals['income']),
+            'expense': float(totals['expense']),
+        }
+    return page_data
+
 @login_required
 def all_transactions_summary_view(request):
     """
     Vue affichant toutes les transactions accessibles selon les permissions.
     CORRECTION: Simplifier pour afficher vraiment toutes les transactions
+    Seule la première page est incluse dans le template; la suite est chargée
+    au défilement via all_transactions_summary_data (pagination par curseur).
     """
-    # DEBUG: Informations de diagnostic
-    debug_info = {
-        'current_user': request.user.username,
-        'user_id': request.user.id,
-        'is_superuser': request.user.is_superuser,
-    }
-    
-    # CORRECTION: Récupérer directement les transactions de l'utilisateur
-    all_transactions_query = Transaction.objects.filter(user=request.user)
-    
-    debug_info.update({
-        'total_transactions_in_db': Transaction.objects.count(),
-        'user_own_transactions': all_transactions_query.count(),
-        'accessible_transactions_count': all_transactions_query.count(),
-        'permission_bypass': "Accès direct aux transactions de l'utilisateur"
-    })
-    
-    all_transactions = all_transactions_query.select_related('category', 'account').order_by('-date', '-created_at')
-
-    transactions_data = []
-    for transaction in all_transactions:
-        transactions_data.append({
-            'id': transaction.id,
-            'date': transaction.date,
-            'description': transaction.description,
-            'amount': transaction.amount,
-            'category_name': transaction.category.name if transaction.category else 'N/A',
-            'account_name': transaction.account.name,
-            'account_currency': transaction.account.currency,
-            'transaction_type': transaction.transaction_type,
-            'is_allocated': False,
-            'is_fund_debited': False,
-            'account_type': transaction.account.account_type,
-            'owner': transaction.user.username,
-            'can_edit': True,  # L'utilisateur peut toujours éditer ses propres transactions
-        })
+    first_page = _build_transaction_page(request.user, {})
+    categories = list(Category.objects.filter(user=request.user).order_by('name').values('id', 'name'))
 
     context = {
         'page_title': 'Toutes les Transactions',
-        'transactions': transactions_data,
-        'debug_info': debug_info,
+        'first_page_json': json.dumps(first_page),
+        'categories_json': json.dumps(categories),
     }
     return render(request, 'webapp/all_transactions_summary.html', context)
 
+@login_required
+@require_GET
+def all_transactions_summary_data(request):
+    """
+    Endpoint JSON paginé de la liste des transactions.
+    Paramètres GET: search, category, type, status, sort, cursor, page_size.
+    Un curseur ou un filtre invalide renvoie une erreur 400.
+    """
+    try:
+        page_data = _build_transaction_page(request.user, request.GET)
+    except (InvalidCursorError, InvalidFilterError) as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    return JsonResponse({'success': True, **page_data})
+
 @login_required
 def review_transactions_view(request):
     """
     Vue affichant les transactions qui nécessitent une révision.
     CORRECTION MAJEURE: Récupération directe sans service de permissions
     """
-    print(f"DEBUG: Utilisateur connecté: {request.user.username}")
-    
     # CORRECTION: Récupération directe des transactions non catégorisées
     transactions_to_review = Transaction.objects.filter(
         user=request.user,
         category__isnull=True
     ).select_related('account').order_by('-date', '-created_at')
     
-    print(f"DEBUG: Transactions trouvées: {transactions_to_review.count()}")
-    
     # Créer le JSON des transactions de manière sécurisée
     transactions_data = []
     for transaction in transactions_to_review:
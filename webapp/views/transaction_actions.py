@@ -1,14 +1,13 @@
-import json
 import logging
 from django.shortcuts import get_object_or_404, redirect
 from django.http import JsonResponse
 from django.template.loader import render_to_string
 from django.contrib.auth.decorators import login_required
-from django.utils.safestring import mark_safe
 from django.views.decorators.http import require_http_methods
 from django.contrib import messages
-from ..models import Transaction, Category
+from ..models import Transaction
 from ..forms.transaction_form import TransactionForm
+from ..services.category_tree_service import CategoryTreeService
 
 # Ajoutez cette fonction en haut du fichier
 from datetime import datetime
@@ -41,40 +40,8 @@ def get_transaction_form(request, transaction_id):
         if hasattr(transaction, 'date'):
             form.initial['date'] = format_date_for_input(transaction.date)
         
-        # Préparer les données de catégories
-        all_categories_data = []
-        all_subcategories_data = []
-        
-        # Récupérer les catégories principales
-        categories = Category.objects.filter(
-            user=request.user, 
-            parent__isnull=True
-        ).order_by('name')
-        
-        logger.info(f"Found {categories.count()} main categories")
-        
-        for cat in categories:
-            all_categories_data.append({
-                'id': cat.id,
-                'name': cat.name,
-                'is_fund_managed': getattr(cat, 'is_fund_managed', False),
-                'is_budgeted': getattr(cat, 'is_budgeted', False),
-            })
-            
-            # Récupérer les sous-catégories
-            subcategories = cat.children.filter(user=request.user).order_by('name')
-            logger.info(f"Found {subcategories.count()} subcategories for {cat.name}")
-            
-            for child_cat in subcategories:
-                all_subcategories_data.append({
-                    'id': child_cat.id,
-                    'name': child_cat.name,
-                    'parent': cat.id,
-                    'is_fund_managed': getattr(child_cat, 'is_fund_managed', False),
-                    'is_budgeted': getattr(child_cat, 'is_budgeted', False),
-                })
-
-        logger.info(f"Total: {len(all_categories_data)} categories and {len(all_subcategories_data)} subcategories")
+        # Arbre des catégories (une requête, mis en cache par utilisateur)
+        category_tree_context = CategoryTreeService.get_context(request.user)
 
         # Rendre le template
         form_html = render_to_string(
@@ -83,8 +50,7 @@ def get_transaction_form(request, transaction_id):
                 'form': form,
                 'transaction': transaction,
                 'transaction_id': transaction_id,
-                'all_categories_data_json': mark_safe(json.dumps(all_categories_data)),
-                'all_subcategories_data_json': mark_safe(json.dumps(all_subcategories_data)),
+                **category_tree_context,
             },
             request=request
         )
@@ -139,34 +105,13 @@ def edit_transaction(request, transaction_id):
             logger.warning(f"Form validation failed for transaction {transaction_id}: {form.errors}")
             
             # Retourner le formulaire avec les erreurs
-            all_categories_data = []
-            all_subcategories_data = []
-            
-            for cat in Category.objects.filter(user=request.user, parent__isnull=True).order_by('name'):
-                all_categories_data.append({
-                    'id': cat.id,
-                    'name': cat.name,
-                    'is_fund_managed': getattr(cat, 'is_fund_managed', False),
-                    'is_budgeted': getattr(cat, 'is_budgeted', False),
-                })
-                
-                for child_cat in cat.children.filter(user=request.user).order_by('name'):
-                    all_subcategories_data.append({
-                        'id': child_cat.id,
-                        'name': child_cat.name,
-                        'parent': cat.id,
-                        'is_fund_managed': getattr(child_cat, 'is_fund_managed', False),
-                        'is_budgeted': getattr(child_cat, 'is_budgeted', False),
-                    })
-
             form_html = render_to_string(
                 'webapp/dashboard_includes/edit_transaction_form_partial.html',
                 {
                     'form': form,
                     'transaction': transaction,
                     'transaction_id': transaction_id,
-                    'all_categories_data_json': mark_safe(json.dumps(all_categories_data)),
-                    'all_subcategories_data_json': mark_safe(json.dumps(all_subcategories_data)),
+                    **CategoryTreeService.get_context(request.user),
                 },
                 request=request
             )
@@ -7,12 +7,14 @@ from django.db.models import F
 from django.db import transaction as db_transaction
 from datetime import date, timedelta
 import calendar
-import json
 from decimal import Decimal # Assurez-vous d'importer Decimal
 
 from webapp.models import Category, Transaction, Account, Tag, Allocation, AllocationLine, Fund # Importez Allocation, AllocationLine, Fund
 from webapp.forms import TransactionForm, SplitTransactionFormset, AllocationForm, AllocationLineFormset # Importez les formulaires d'allocation
 from webapp.services import TransactionService
+from webapp.services.category_tree_service import CategoryTreeService
+from webapp.services.category_closure_service import CategoryClosureService
+from webapp.services.period_service import PeriodService
 
 
 @require_POST
@@ -50,31 +52,12 @@ def add_transaction_submit(request):
         except Exception as e:
             messages.error(request, f"Erreur lors de l'enregistrement de la transaction: {e}")
     
-    # Récupérer toutes les catégories pour le JS, incluant l'info is_fund_managed
-    all_categories_data = []
-    all_subcategories_data = []
-
-    for cat in Category.objects.filter(parent__isnull=True).order_by('name'):
-        all_categories_data.append({
-            'id': cat.id,
-            'name': cat.name,
-            'is_fund_managed': cat.is_fund_managed
-        })
-        for child_cat in cat.children.all().order_by('name'):
-            all_subcategories_data.append({
-                'id': child_cat.id,
-                'name': child_cat.name,
-                'parent': cat.id,
-                'is_fund_managed': child_cat.is_fund_managed
-            })
-    
     context = {
         'page_title': 'Tableau de Bord',
         'account_balances': transaction_service.get_account_balances(), # Actualiser les soldes
         'transactions': transaction_service.get_latest_transactions(limit=10), # Actualiser les transactions
         'form': form, # Re-passer le formulaire avec les erreurs
-        'all_categories_data_json': json.dumps(all_categories_data),
-        'all_subcategories_data_json': json.dumps(all_subcategories_data),
+        **CategoryTreeService.get_context(request.user),
     }
     return render(request, 'webapp/index.html', context)
 
@@ -155,29 +138,10 @@ def get_transaction_form_for_edit(request, transaction_id):
     transaction = get_object_or_404(Transaction, pk=transaction_id)
     form = TransactionForm(instance=transaction)
     
-    # Récupérer toutes les catégories pour le JS, incluant l'info is_fund_managed
-    all_categories_data = []
-    all_subcategories_data = []
-
-    for cat in Category.objects.filter(parent__isnull=True).order_by('name'):
-        all_categories_data.append({
-            'id': cat.id,
-            'name': cat.name,
-            'is_fund_managed': cat.is_fund_managed
-        })
-        for child_cat in cat.children.all().order_by('name'):
-            all_subcategories_data.append({
-                'id': child_cat.id,
-                'name': child_cat.name,
-                'parent': cat.id,
-                'is_fund_managed': child_cat.is_fund_managed
-            })
-
     context = {
         'form': form, 
         'transaction_id': transaction_id,
-        'all_categories_data_json': json.dumps(all_categories_data), # Pour la modale d'édition
-        'all_subcategories_data_json': json.dumps(all_subcategories_data), # Pour la modale d'édition
+        **CategoryTreeService.get_context(request.user),
     }
     return render(request, 'webapp/dashboard_includes/edit_transaction_form_partial.html', context)
 
@@ -214,18 +178,13 @@ def category_transactions_summary_view(request, year=None, month=None):
     if month is None:
         # Si le mois n'est pas spécifié, on est en mode "année courante"
         period_type = 'year'
-        start_date = date(selected_year, 1, 1)
-        # Pour l'année courante, la date de fin doit être le 31 décembre de cette année.
-        end_date = date(selected_year, 12, 31) 
+        start_date, end_date = PeriodService.year(selected_year)
         period_display = f"Année {selected_year}"
     else:
         # Si le mois est spécifié, on est en mode "mois courant"
         period_type = 'month'
         selected_month = int(month) # Convertir en int
-        start_date = date(selected_year, selected_month, 1)
-        # Calculer le dernier jour du mois
-        _, last_day = calendar.monthrange(selected_year, selected_month)
-        end_date = date(selected_year, selected_month, last_day)
+        start_date, end_date = PeriodService.month(selected_year, selected_month)
         period_display = f"{calendar.month_name[selected_month]} {selected_year}"
 
 
@@ -235,14 +194,11 @@ def category_transactions_summary_view(request, year=None, month=None):
     category_transactions_summary = []
 
     for category in fund_managed_categories:
-        # Obtenir les IDs de la catégorie et de ses enfants
-        category_ids_for_query = [category.id] + list(category.children.values_list('id', flat=True))
-
-        # Filtrer les transactions pour la période donnée
+        # Filtrer les transactions de la catégorie et de tous ses descendants pour la période donnée
         transactions_in_category = Transaction.objects.filter(
-            category__id__in=category_ids_for_query,
+            CategoryClosureService.subtree_filter(category),
             date__gte=start_date, # Date supérieure ou égale à la date de début
-            date__lte=end_date # Date inférieure ou égale à la date de fin
+            date__lt=end_date # Date strictement inférieure à la date de fin (période semi-ouverte)
         ).order_by('date', 'created_at') # Ordonner pour un affichage cohérent
 
         # Si des transactions existent pour cette catégorie dans la période
@@ -335,30 +291,11 @@ def split_transaction_view(request, transaction_id=None):
             })
             formset = SplitTransactionFormset(initial=initial_data)
 
-    # Récupérer toutes les catégories pour le JS, incluant l'info is_fund_managed
-    all_categories_data = []
-    all_subcategories_data = []
-
-    for cat in Category.objects.filter(parent__isnull=True).order_by('name'):
-        all_categories_data.append({
-            'id': cat.id,
-            'name': cat.name,
-            'is_fund_managed': cat.is_fund_managed
-        })
-        for child_cat in cat.children.all().order_by('name'):
-            all_subcategories_data.append({
-                'id': child_cat.id,
-                'name': child_cat.name,
-                'parent': cat.id,
-                'is_fund_managed': child_cat.is_fund_managed
-            })
-    
     context = {
         'page_title': 'Diviser une Transaction',
         'original_transaction': original_transaction,
         'formset': formset,
-        'all_categories_data_json': json.dumps(all_categories_data), # Données pour le JS
-        'all_subcategories_data_json': json.dumps(all_subcategories_data), # Données pour le JS
+        **CategoryTreeService.get_context(request.user),
     }
     return render(request, 'webapp/split_transaction.html', context)
 
@@ -402,29 +339,11 @@ def process_split_transaction(request):
     
     # Si le formulaire n'est pas valide ou s'il y a une erreur, re-rendre la page de division
     # avec les erreurs et les données du formset.
-    all_categories_data = []
-    all_subcategories_data = []
-
-    for cat in Category.objects.filter(parent__isnull=True).order_by('name'):
-        all_categories_data.append({
-            'id': cat.id,
-            'name': cat.name,
-            'is_fund_managed': cat.is_fund_managed
-        })
-        for child_cat in cat.children.all().order_by('name'):
-            all_subcategories_data.append({
-                'id': child_cat.id,
-                'name': child_cat.name,
-                'parent': cat.id,
-                'is_fund_managed': child_cat.is_fund_managed
-            })
-
     context = {
         'page_title': 'Diviser une Transaction',
         'original_transaction': original_transaction,
         'formset': formset, # Le formset avec les erreurs
-        'all_categories_data_json': json.dumps(all_categories_data), 
-        'all_subcategories_data_json': json.dumps(all_subcategories_data),
+        **CategoryTreeService.get_context(request.user),
     }
     return render(request, 'webapp/split_transaction.html', context)
 
@@ -453,21 +372,12 @@ def allocate_income_view(request, transaction_id):
     # Le formset sera vide par défaut pour permettre à l'utilisateur d'ajouter des lignes.
     formset = AllocationLineFormset()
 
-    # Récupérer toutes les catégories qui gèrent un fonds pour le JS
-    fund_managed_categories = []
-    for cat in Category.objects.filter(is_fund_managed=True).order_by('name'):
-        fund_managed_categories.append({
-            'id': cat.id,
-            'name': cat.name,
-            'is_fund_managed': cat.is_fund_managed
-        })
-
     context = {
         'page_title': 'Allouer un Revenu aux Fonds',
         'original_transaction': original_transaction,
         'form': form,
         'formset': formset,
-        'fund_managed_categories_json': json.dumps(fund_managed_categories), # Pour le JS de la page d'allocation
+        'fund_managed_categories_json': CategoryTreeService.get_fund_managed_json(request.user), # Pour le JS de la page d'allocation
     }
     return render(request, 'webapp/allocate_income.html', context)
 
@@ -504,19 +414,12 @@ def process_allocation_income(request, transaction_id):
                 if not category.is_fund_managed:
                     messages.error(request, f"La catégorie '{category.name}' ne gère pas de fonds et ne peut pas recevoir d'allocation directe.")
                     # Re-rendre la page avec les erreurs
-                    fund_managed_categories = []
-                    for cat in Category.objects.filter(is_fund_managed=True).order_by('name'):
-                        fund_managed_categories.append({
-                            'id': cat.id,
-                            'name': cat.name,
-                            'is_fund_managed': cat.is_fund_managed
-                        })
                     context = {
                         'page_title': 'Allouer un Revenu aux Fonds',
                         'original_transaction': original_transaction,
                         'form': form,
                         'formset': formset, # Le formset avec les erreurs
-                        'fund_managed_categories_json': json.dumps(fund_managed_categories),
+                        'fund_managed_categories_json': CategoryTreeService.get_fund_managed_json(request.user),
                     }
                     return render(request, 'webapp/allocate_income.html', context)
 
@@ -533,19 +436,12 @@ def process_allocation_income(request, transaction_id):
         if total_allocated_amount > abs(original_transaction.amount) + Decimal('0.01'): # Ajouter une petite tolérance
             messages.error(request, f"Le montant total alloué ({total_allocated_amount:.2f} CHF) dépasse le montant de la transaction originale ({abs(original_transaction.amount):.2f} CHF).")
             # Re-rendre la page avec les erreurs
-            fund_managed_categories = []
-            for cat in Category.objects.filter(is_fund_managed=True).order_by('name'):
-                fund_managed_categories.append({
-                    'id': cat.id,
-                    'name': cat.name,
-                    'is_fund_managed': cat.is_fund_managed
-                })
             context = {
                 'page_title': 'Allouer un Revenu aux Fonds',
                 'original_transaction': original_transaction,
                 'form': form,
                 'formset': formset, # Le formset avec les erreurs
-                'fund_managed_categories_json': json.dumps(fund_managed_categories),
+                'fund_managed_categories_json': CategoryTreeService.get_fund_managed_json(request.user),
             }
             return render(request, 'webapp/allocate_income.html', context)
         
@@ -583,19 +479,11 @@ def process_allocation_income(request, transaction_id):
         messages.error(request, "Veuillez corriger les erreurs dans le formulaire d'allocation.")
 
     # Si le formulaire n'est pas valide ou s'il y a une erreur, re-rendre la page d'allocation
-    fund_managed_categories = []
-    for cat in Category.objects.filter(is_fund_managed=True).order_by('name'):
-        fund_managed_categories.append({
-            'id': cat.id,
-            'name': cat.name,
-            'is_fund_managed': cat.is_fund_managed
-        })
-
     context = {
         'page_title': 'Allouer un Revenu aux Fonds',
         'original_transaction': original_transaction,
         'form': form, # Le formulaire avec les erreurs
         'formset': formset, # Le formset avec les erreurs
-        'fund_managed_categories_json': json.dumps(fund_managed_categories),
+        'fund_managed_categories_json': CategoryTreeService.get_fund_managed_json(request.user),
     }
     return render(request, 'webapp/allocate_income.html', context)